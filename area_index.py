@@ -0,0 +1,99 @@
+import logging
+from typing import Optional
+
+from consts import BOT_VERSION, VERSION_KEY
+from utils import canonicalize, intern_strings, load, store
+
+log = logging.getLogger(__name__)
+
+
+def area_index_filename(guild_id) -> str:
+    return f"{guild_id}-areas.json"
+
+
+class AreaIndex:
+    """Index of the checks in each area of each world, from the area groupings in the spoiler log's location list."""
+
+    DATA_KEY = "data"
+    NAME_KEY = "name"
+    CHECKS_KEY = "checks"
+    """
+    Serialized structure:
+    {
+        VERSION_KEY: BOT_VERSION,
+        DATA_KEY: {
+            "area key": {
+                NAME_KEY: "original area name",
+                CHECKS_KEY: [
+                    ["check key1 in world 1", "check key2 in world 1", ...],
+                    ["check key1 in world 2", "check key2 in world 2", ...],
+                ]
+            },
+            ...
+        }
+    }
+    """
+
+    def __init__(self, guild_id, areas: Optional[dict[str, dict]] = None, save=True):
+        """
+        Creates an area index from the given areas, saving it unless save is False. Otherwise, the index is populated
+        from existing file (or empty if no file exists).
+        """
+        self.filename = area_index_filename(guild_id)
+        if areas is not None:
+            self.areas = areas
+            if save:
+                self.save()
+        else:
+            try:
+                self.areas = self._get_areas_from_file()
+            except FileNotFoundError:
+                self.areas = {}
+
+    def find_matches(self, query: str) -> list[str]:
+        """Returns names of areas matching the given search query."""
+        query = canonicalize(query)
+        return sorted(
+            area[AreaIndex.NAME_KEY]
+            for area_key, area in self.areas.items()
+            if query in area_key
+        )
+
+    def get_checks(self, world: int, area_query: str) -> tuple[str, list[str]]:
+        """
+        Returns a tuple of the area name and list of check keys in the area in the given world. The query may be any
+        part of the area's name, as long as it only matches one area.
+        Raises FileNotFoundError if no areas are stored, and ValueError for unrecognized world num or area query.
+        """
+        if not len(self.areas):
+            raise FileNotFoundError
+
+        area_key = canonicalize(area_query)
+        if area_key not in self.areas:
+            matching_keys = [key for key in self.areas if area_key in key]
+            if len(matching_keys) != 1:
+                raise ValueError(
+                    f"Area {area_query} not recognized. Try !search <keyword> to find it!"
+                )
+            area_key = matching_keys[0]
+
+        area = self.areas[area_key]
+        if world < 1 or world > len(area[AreaIndex.CHECKS_KEY]):
+            raise ValueError(f"Invalid player number {world}.")
+        return area[AreaIndex.NAME_KEY], area[AreaIndex.CHECKS_KEY][world - 1]
+
+    def _get_areas_from_file(self) -> dict[str, dict]:
+        data = load(self.filename)
+        data_version = data.get(VERSION_KEY)
+        if data_version == BOT_VERSION:
+            return intern_strings(data[AreaIndex.DATA_KEY])
+
+        # Data in file is outdated or corrupt. If it's a known old version, use it; otherwise ignore it.
+        log.info(f"No protocol for updating area index with version {data_version}")
+        raise FileNotFoundError
+
+    def _get_filedata(self):
+        return {VERSION_KEY: BOT_VERSION, AreaIndex.DATA_KEY: self.areas}
+
+    def save(self):
+        store(self._get_filedata(), self.filename)
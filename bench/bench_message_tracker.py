@@ -0,0 +1,67 @@
+"""
+Measures how long MessageTracker.edit_messages takes to update tracked !show-hints messages, as the number of
+tracked messages grows, with simulated Discord API latency on every fetch and edit.
+
+Run from the repo root:
+    python -m bench.bench_message_tracker [--latency-ms 50]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from test.utils import MockBot, MockChannel, MockMessage
+
+import message_tracker as message_tracker_module
+from message_tracker import MessageTracker
+from utils import HintType, PlayerShowHints, SuccessfulHintResult
+
+BENCH_GUILD_ID = "bench-guild-id"
+MESSAGE_COUNTS = [1, 3, 6, 12, 24, 48]
+CHANNEL_COUNT = 4
+
+
+async def time_edit_messages(message_count: int, latency: float) -> float:
+    """Returns wall-clock seconds for one edit_messages pass over message_count tracked messages."""
+    # No caps on tracked messages or edits, to measure a full pass
+    message_tracker = MessageTracker(BENCH_GUILD_ID, message_count, message_count)
+    hint_result = SuccessfulHintResult("foo", ["World 2 bar"], HintType.ITEM, 1, True)
+    player_show_hints = PlayerShowHints(
+        {HintType.ITEM: {hint_result.item_name: hint_result.results}}
+    )
+    channels = [MockChannel(i, latency=latency) for i in range(CHANNEL_COUNT)]
+    for message_id in range(message_count):
+        channel = channels[message_id % CHANNEL_COUNT]
+        channel.messages[message_id] = MockMessage(message_id, "", latency)
+        message_tracker.track_show_hints_message(1, "all", channel.id, message_id)
+    bot = MockBot(channels)
+
+    start = time.perf_counter()
+    await message_tracker.edit_messages(bot, hint_result, player_show_hints)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    concurrency = message_tracker_module.MAX_CONCURRENT_REQUESTS
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)  # tracker files are written to the working directory
+        print(f"Simulated latency: {args.latency_ms:g}ms per request")
+        print(
+            f"{'messages':>8}  {'sequential (s)':>14}  {f'{concurrency} in flight (s)':>16}"
+        )
+        for message_count in MESSAGE_COUNTS:
+            message_tracker_module.MAX_CONCURRENT_REQUESTS = 1
+            sequential = asyncio.run(time_edit_messages(message_count, latency))
+            message_tracker_module.MAX_CONCURRENT_REQUESTS = concurrency
+            concurrent = asyncio.run(time_edit_messages(message_count, latency))
+            print(f"{message_count:>8}  {sequential:>14.3f}  {concurrent:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
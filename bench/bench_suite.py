@@ -0,0 +1,173 @@
+"""
+Times the bot's hot paths against a synthetic spoiler log, reporting wall time and peak traced memory for each, and
+compares them with saved baselines.
+
+Run from the repo root:
+    python -m bench.bench_suite [--players 16] [--locations 2000] [--save-baseline]
+
+Baselines are saved per log size in bench/baselines.json. They're only comparable on the machine that saved them.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+import seed_data
+from bench.spoiler_generator import generate_spoiler_log
+from guild import Guild
+from hint_handler import get_hint_response, get_show_checks_response
+from hint_times import HintTimes
+from spoiler_log_handler import handle_spoiler_log
+from utils import HintType
+
+BENCH_GUILD_ID = "bench-guild-id"
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+# Hints redeemed before timing the calls that depend on past hints
+PAST_HINT_COUNT = 500
+
+
+class Benchmark:
+    def __init__(self, name: str, run: Callable[[], None], ops: int = 1):
+        """run is called once per sample and performs ops operations."""
+        self.name = name
+        self.run = run
+        self.ops = ops
+
+    def measure(self, repeat: int) -> dict[str, float]:
+        """Returns the median seconds per operation and the peak traced memory of one sample, in KiB."""
+        self.run()  # warm up
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.run()
+            samples.append((time.perf_counter() - start) / self.ops)
+        # Traced separately, since tracing slows everything down
+        tracemalloc.start()
+        self.run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"sec_per_op": statistics.median(samples), "peak_kib": peak / 1024}
+
+
+def get_benchmarks(spoiler_log_lines: list[str]) -> list[Benchmark]:
+    rng = random.Random(0)
+    handle_spoiler_log(spoiler_log_lines, BENCH_GUILD_ID)
+    g = Guild(BENCH_GUILD_ID)
+    player_count = len(
+        next(iter(g.item_locations.items.values()))[g.item_locations.RESULTS_KEY]
+    )
+    items = list(g.item_locations.items)
+    checks = list(g.checks.items)
+    hint_times = HintTimes(BENCH_GUILD_ID)
+    hint_times.cooldowns = {ht: 0 for ht in HintType}
+
+    def redeem_hints():
+        for i in range(PAST_HINT_COUNT):
+            if i % 2:
+                hint_data, query = g.item_locations, rng.choice(items)
+            else:
+                hint_data, query = g.checks, rng.choice(checks)
+            get_hint_response(
+                rng.randint(1, player_count),
+                query,
+                rng.randint(1, 100),
+                hint_data,
+                hint_times,
+                save=False,
+            )
+
+    search_queries = ["sword", "mask", "temple", "chest", "rupee", "song", "zz"]
+
+    def find_matches():
+        for query in search_queries:
+            g.item_locations.find_matches(query)
+            g.checks.find_matches(query)
+
+    def load_guild():
+        # Otherwise the seed data shared by g would be reused instead of parsed
+        seed_data.clear_shared()
+        Guild(BENCH_GUILD_ID)
+
+    def show_checks():
+        for player in range(1, player_count + 1):
+            get_show_checks_response(player, hint_times)
+
+    return [
+        Benchmark(
+            "handle_spoiler_log",
+            lambda: handle_spoiler_log(spoiler_log_lines, BENCH_GUILD_ID),
+        ),
+        Benchmark("Guild load", load_guild),
+        Benchmark("Guild load (shared seed)", lambda: Guild(BENCH_GUILD_ID)),
+        Benchmark("get_hint_response", redeem_hints, PAST_HINT_COUNT),
+        Benchmark("find_matches", find_matches, len(search_queries) * 2),
+        Benchmark("get_show_checks_response", show_checks, player_count),
+        Benchmark("HintTimes.save", hint_times.save),
+    ]
+
+
+def load_baselines() -> dict:
+    try:
+        with open(BASELINES_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def format_change(value: float, baseline: float | None) -> str:
+    if not baseline:
+        return ""
+    return f"{(value - baseline) / baseline:+.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--locations", type=int, default=2000, help="Per world")
+    parser.add_argument("--no-entrances", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Save results as the baseline"
+    )
+    args = parser.parse_args()
+
+    config = f"players={args.players} locations={args.locations} entrances={not args.no_entrances}"
+    spoiler_log_lines = generate_spoiler_log(
+        args.players, args.locations, not args.no_entrances
+    )
+    baselines = load_baselines()
+    config_baselines = baselines.get(config, {})
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)  # guild files are written to the working directory
+        print(f"{config}, {len(spoiler_log_lines)} lines")
+        print(
+            f"{'benchmark':<26}  {'ms/op':>10}  {'vs base':>7}  {'peak KiB':>10}  {'vs base':>7}"
+        )
+        for benchmark in get_benchmarks(spoiler_log_lines):
+            result = benchmark.measure(args.repeat)
+            results[benchmark.name] = result
+            baseline = config_baselines.get(benchmark.name, {})
+            print(
+                f"{benchmark.name:<26}  {result['sec_per_op'] * 1000:>10.3f}  "
+                + f"{format_change(result['sec_per_op'], baseline.get('sec_per_op')):>7}  "
+                + f"{result['peak_kib']:>10.1f}  "
+                + f"{format_change(result['peak_kib'], baseline.get('peak_kib')):>7}"
+            )
+
+    if args.save_baseline:
+        baselines[config] = results
+        with open(BASELINES_FILE, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline to {BASELINES_FILE}")
+
+
+if __name__ == "__main__":
+    main()
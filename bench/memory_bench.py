@@ -0,0 +1,151 @@
+"""
+Measures the memory retained by many loaded guilds, each with its own synthetic spoiler log and some past hints.
+
+Run from the repo root:
+    python -m bench.memory_bench [--guilds 100] [--players 4] [--locations 500] [--same-seed] [--no-sharing]
+
+Guilds are ingested with !set-log's code path, then reloaded from their files as after a restart. For both, the
+growth in resident memory and the traced memory retained by the guilds are reported. Each is measured in a fresh
+process forked before any guild is loaded, so memory freed by an earlier measurement can't hide what a later one
+uses. --no-sharing turns off string interning and seed data sharing, for comparing with how guilds were stored
+before them.
+"""
+
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import tracemalloc
+from typing import Callable
+
+import seed_data
+import utils
+from bench.spoiler_generator import generate_spoiler_log
+from guild import Guild
+from hint_handler import get_hint_response
+from memory import format_bytes
+from spoiler_log_handler import handle_spoiler_log
+from utils import HintType
+
+# Hints redeemed per guild, so past hints are part of what's retained
+PAST_HINTS_PER_GUILD = 50
+
+
+def redeem_hints(g: Guild, player_count: int, rng: random.Random):
+    g.hint_times.cooldowns = {ht: 0 for ht in HintType}
+    items = list(g.item_locations.items)
+    for _ in range(PAST_HINTS_PER_GUILD):
+        get_hint_response(
+            rng.randint(1, player_count),
+            rng.choice(items),
+            rng.randint(1, 100),
+            g.item_locations,
+            g.hint_times,
+        )
+
+
+def get_rss() -> int:
+    """
+    Returns the process's resident memory in bytes. Where that isn't available (outside Linux), returns its peak
+    resident memory instead, which is the same as long as nothing has been freed.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except FileNotFoundError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # In bytes on macOS, KiB elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(guild_ids: list[str], load: Callable[[str], Guild]) -> tuple[int, int]:
+    """
+    Returns the growth in resident memory while the guilds load returns are loaded, and the traced memory they
+    retain. The guilds are loaded twice, since tracing inflates resident memory.
+    """
+    gc.collect()
+    rss_before = get_rss()
+    guilds = {guild_id: load(guild_id) for guild_id in guild_ids}
+    gc.collect()
+    rss = get_rss() - rss_before
+    del guilds
+    gc.collect()
+
+    tracemalloc.start()
+    guilds = {guild_id: load(guild_id) for guild_id in guild_ids}
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rss, traced
+
+
+def measure_in_child(
+    guild_ids: list[str], load: Callable[[str], Guild]
+) -> tuple[int, int]:
+    """Runs measure in a forked process, which starts with no guilds loaded and exits with everything it loaded."""
+    context = multiprocessing.get_context("fork")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=lambda: child_conn.send(measure(guild_ids, load)))
+    process.start()
+    result = parent_conn.recv()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--locations", type=int, default=500, help="Per world")
+    parser.add_argument(
+        "--same-seed", action="store_true", help="Give every guild the same log"
+    )
+    parser.add_argument(
+        "--no-sharing",
+        action="store_true",
+        help="Don't intern strings or share seed data between guilds",
+    )
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.no_sharing:
+        utils.set_interning_enabled(False)
+        seed_data.set_sharing_enabled(False)
+
+    rng = random.Random(0)
+    guild_ids = [f"bench-guild-{i}" for i in range(args.guilds)]
+    spoiler_logs = {
+        guild_id: generate_spoiler_log(
+            args.players, args.locations, seed=0 if args.same_seed else i
+        )
+        for i, guild_id in enumerate(guild_ids)
+    }
+
+    def ingest(guild_id) -> Guild:
+        _, item_locs, checks, entrances, seed_stats, areas = handle_spoiler_log(
+            spoiler_logs[guild_id], guild_id
+        )
+        g = Guild(guild_id, item_locs, checks, entrances, seed_stats, areas)
+        redeem_hints(g, args.players, rng)
+        return g
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)  # guild files are written to the working directory
+        print(
+            f"{args.guilds} guilds, players={args.players} locations={args.locations} "
+            + f"{'same seed' if args.same_seed else 'distinct seeds'}, "
+            + f"{'no interning or sharing' if args.no_sharing else 'interned and shared'}"
+        )
+        for name, load in (("ingested", ingest), ("reloaded", Guild)):
+            rss, traced = measure_in_child(guild_ids, load)
+            print(
+                f"{name:<9} {format_bytes(rss):>10} resident, {format_bytes(traced):>10} traced, "
+                + f"{format_bytes(traced / len(guild_ids)):>10} traced per guild"
+            )
+
+
+if __name__ == "__main__":
+    main()
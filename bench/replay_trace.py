@@ -0,0 +1,214 @@
+"""
+Replays a command trace recorded with TRACE_FILE against the bot's command handlers, through the same fake Discord
+layer as the load test. Reports command latency and Discord API calls, and can compare them with an earlier run.
+
+Run from the repo root:
+    python -m bench.replay_trace trace.jsonl [--snapshot guild_files_dir] [--speed 60] [--save out.json]
+    python -m bench.replay_trace trace.jsonl --compare out.json
+
+Timing, including the update scheduler's debounce windows, is compressed by --speed, so an hour-long session at the
+default speed replays in a minute with the same hints coalesced.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from test.utils import (
+    MockAttachment,
+    MockAuthor,
+    MockBot,
+    MockChannel,
+    MockContext,
+    MockRateLimiter,
+    MockRole,
+)
+
+import bot as bot_module
+import update_scheduler
+from trace_recorder import TraceEntry, read_trace, trace_attachments_dir
+
+
+class Replay:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.entries = read_trace(args.trace)
+        self.attachments_dir = os.path.abspath(trace_attachments_dir(args.trace))
+        self.latency = args.latency_ms / 1000
+        self.bot = MockBot()
+        # command -> seconds taken by each call
+        self.latencies: dict[str, list[float]] = {}
+        self.errors = 0
+
+    def get_guild_ids(self) -> set:
+        return {entry.guild_id for entry in self.entries}
+
+    def get_channel(self, channel_id) -> MockChannel:
+        if channel_id not in self.bot.channels:
+            rate_limiter = None
+            if self.args.rate_limit:
+                limit, window_sec = self.args.rate_limit.split("/")
+                rate_limiter = MockRateLimiter(int(limit), float(window_sec))
+            self.bot.channels[channel_id] = MockChannel(
+                channel_id, latency=self.latency, rate_limiter=rate_limiter
+            )
+        return self.bot.channels[channel_id]
+
+    async def run_entry(self, entry: TraceEntry):
+        author = MockAuthor(entry.author_id)
+        author.roles = [MockRole(name, role_id) for role_id, name in entry.roles]
+        attachments = []
+        for name in entry.attachments:
+            with open(os.path.join(self.attachments_dir, name), "rb") as f:
+                attachments.append(MockAttachment(f.read()))
+        ctx = MockContext(
+            entry.guild_id,
+            author,
+            self.get_channel(entry.channel_id),
+            attachments,
+            self.latency,
+        )
+        command = bot_module.bot.get_command(entry.command)
+        start = time.perf_counter()
+        try:
+            await command.callback(ctx, *entry.args, **entry.kwargs)
+        except Exception:
+            logging.exception(f"Failed to replay {entry.to_json()}")
+            self.errors += 1
+        self.latencies.setdefault(entry.command, []).append(time.perf_counter() - start)
+
+    async def run(self) -> float:
+        """Replays the trace, returning the wall-clock seconds it took."""
+        if not len(self.entries):
+            return 0
+        loop = asyncio.get_running_loop()
+        start_time = self.entries[0].timestamp
+        start = loop.time()
+        tasks = []
+        for entry in self.entries:
+            delay = start + (entry.timestamp - start_time) / self.args.speed
+            await asyncio.sleep(delay - loop.time())
+            tasks.append(asyncio.create_task(self.run_entry(entry)))
+        await asyncio.gather(*tasks)
+        for g in bot_module.guilds.values():
+            await g.update_scheduler.flush()
+        return loop.time() - start
+
+    def get_results(self, elapsed: float) -> dict:
+        channels = self.bot.channels.values()
+        messages = [m for channel in channels for m in channel.messages.values()]
+        results = {
+            "elapsed_sec": elapsed,
+            "errors": self.errors,
+            "sends": len(messages),
+            "edits": sum(message.edit_count for message in messages),
+            "fetches": sum(channel.fetch_count for channel in channels),
+            "rate_limited": sum(
+                channel.rate_limiter.rate_limited_count
+                for channel in channels
+                if channel.rate_limiter is not None
+            ),
+            "commands": {},
+        }
+        for command, latencies in self.latencies.items():
+            percentiles = (
+                statistics.quantiles(latencies, n=100)
+                if len(latencies) > 1
+                else latencies * 99
+            )
+            results["commands"][command] = {
+                "count": len(latencies),
+                "p50_ms": percentiles[49] * 1000,
+                "p99_ms": percentiles[98] * 1000,
+            }
+        return results
+
+
+def format_change(value: float, baseline: dict, key: str) -> str:
+    if key not in baseline:
+        return ""
+    if not baseline[key]:
+        return "" if not value else "new"
+    return f"{(value - baseline[key]) / baseline[key]:+.0%}"
+
+
+def report(results: dict, baseline: dict):
+    print(f"Replayed in {results['elapsed_sec']:.2f}s, {results['errors']} errors")
+    print(f"{'Discord calls':<14}  {'count':>7}  {'vs base':>7}")
+    for key in ["sends", "edits", "fetches", "rate_limited"]:
+        change = format_change(results[key], baseline, key)
+        print(f"{key:<14}  {results[key]:>7}  {change:>7}")
+    print(
+        f"{'command':<14}  {'count':>7}  {'p50 (ms)':>9}  {'vs base':>7}  {'p99 (ms)':>9}  {'vs base':>7}"
+    )
+    for command, stats in sorted(results["commands"].items()):
+        command_baseline = baseline.get("commands", {}).get(command, {})
+        print(
+            f"{command:<14}  {stats['count']:>7}  {stats['p50_ms']:>9.1f}  "
+            + f"{format_change(stats['p50_ms'], command_baseline, 'p50_ms'):>7}  "
+            + f"{stats['p99_ms']:>9.1f}  "
+            + f"{format_change(stats['p99_ms'], command_baseline, 'p99_ms'):>7}"
+        )
+
+
+def copy_guild_files(src_dir: str, dst_dir: str, guild_ids):
+    """
+    Copies every file belonging to the guilds, whatever its kind: JSON state, hint logs, and the files of each of
+    their games and seed snapshots, which are all named after the guild ID.
+    """
+    prefixes = tuple(f"{guild_id}-" for guild_id in guild_ids)
+    for name in os.listdir(src_dir):
+        path = os.path.join(src_dir, name)
+        if name.startswith(prefixes) and os.path.isfile(path):
+            shutil.copy(path, dst_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("trace", help="Trace file recorded with TRACE_FILE")
+    parser.add_argument(
+        "--snapshot", help="Directory of guild files to start from, instead of none"
+    )
+    parser.add_argument("--speed", type=float, default=60)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument(
+        "--rate-limit", default="5/5", help="Requests/seconds allowed per channel"
+    )
+    parser.add_argument("--save", help="Save results to this JSON file")
+    parser.add_argument("--compare", help="Compare with results saved by --save")
+    args = parser.parse_args()
+
+    # The bot logs every command at INFO level
+    logging.getLogger().setLevel(logging.WARNING)
+    update_scheduler.DEFAULT_UPDATE_WINDOW_SEC /= args.speed
+    update_scheduler.DEFAULT_MAX_UPDATE_DELAY_SEC /= args.speed
+    replay = Replay(args)
+    bot_module.bot.get_channel = replay.bot.get_channel
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.snapshot:
+            copy_guild_files(args.snapshot, tmp_dir, replay.get_guild_ids())
+        cwd = os.getcwd()
+        # Guild files are read from and written to the working directory
+        os.chdir(tmp_dir)
+        elapsed = asyncio.run(replay.run())
+        os.chdir(cwd)
+    results = replay.get_results(elapsed)
+    report(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
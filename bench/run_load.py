@@ -0,0 +1,227 @@
+"""
+Load-tests the bot's command handlers with many guilds and concurrent users, through a fake Discord layer with
+simulated API latency and per-channel rate limits. Reports throughput, command latency percentiles and event loop
+stalls.
+
+Run from the repo root:
+    python -m bench.run_load [--guilds 20] [--players 8] [--commands 50] [--mix hint=50,search=20,...]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from test.utils import (
+    MockAttachment,
+    MockAuthor,
+    MockBot,
+    MockChannel,
+    MockContext,
+    MockRateLimiter,
+)
+
+import bot as bot_module
+from bench.spoiler_generator import generate_spoiler_log
+
+LOAD_TEST_GUILD_ID = "load-test-guild-id"
+DEFAULT_MIX = "hint=50,search=20,show-hints=25,set-log=1"
+# How often the stall monitor checks in on the event loop
+STALL_CHECK_INTERVAL_SEC = 0.01
+# Wake-ups later than this count as stalls, rather than scheduling jitter
+STALL_THRESHOLD_SEC = 0.005
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.latency = args.latency_ms / 1000
+        limit, window_sec = args.rate_limit.split("/")
+        self.rate_limit = (int(limit), float(window_sec))
+        self.mix = {}
+        for entry in args.mix.split(","):
+            command, weight = entry.split("=")
+            self.mix[command] = float(weight)
+        self.spoiler = "\n".join(
+            generate_spoiler_log(args.players, args.locations, not args.no_entrances)
+        ).encode("utf-8")
+        self.guild_ids = [f"{LOAD_TEST_GUILD_ID}-{i}" for i in range(args.guilds)]
+        self.channels = {}
+        self.authors = {}
+        for i, guild_id in enumerate(self.guild_ids):
+            self.channels[guild_id] = MockChannel(
+                i, latency=self.latency, rate_limiter=MockRateLimiter(*self.rate_limit)
+            )
+            self.authors[guild_id] = [
+                MockAuthor(player, f"player{player}")
+                for player in range(1, args.players + 1)
+            ]
+        self.bot = MockBot(self.channels.values())
+        # Queries users pick from, filled in once the first log is loaded
+        self.hint_queries: list[str] = []
+        self.search_queries: list[str] = []
+        # command -> seconds taken by each call
+        self.latencies: dict[str, list[float]] = {command: [] for command in self.mix}
+        self.stalls: list[float] = []
+
+    def make_ctx(self, guild_id, author, attachments=None) -> MockContext:
+        return MockContext(
+            guild_id, author, self.channels[guild_id], attachments, self.latency
+        )
+
+    async def set_log(self, guild_id, author):
+        ctx = self.make_ctx(guild_id, author, [MockAttachment(self.spoiler)])
+        await bot_module.set_spoiler_log.callback(ctx)
+
+    async def hint(self, guild_id, author):
+        query = self.rng.choice(self.hint_queries)
+        await bot_module.hint.callback(
+            self.make_ctx(guild_id, author), None, query=query
+        )
+
+    async def search(self, guild_id, author):
+        query = self.rng.choice(self.search_queries)
+        await bot_module.search.callback(self.make_ctx(guild_id, author), query=query)
+
+    async def show_hints(self, guild_id, author):
+        hint_type = self.rng.choice(["all", "item", "check"])
+        await bot_module.show_hints.callback(
+            self.make_ctx(guild_id, author), None, hint_type
+        )
+
+    async def show_checks(self, guild_id, author):
+        await bot_module.show_checks.callback(self.make_ctx(guild_id, author), None)
+
+    async def setup(self):
+        for guild_id in self.guild_ids:
+            admin = self.authors[guild_id][0]
+            await self.set_log(guild_id, admin)
+            await bot_module.set_hint_cooldown.callback(
+                self.make_ctx(guild_id, admin), self.args.cooldown_min, "all"
+            )
+        g = bot_module.guilds[self.guild_ids[0]]
+        for hint_data in (g.item_locations, g.checks, g.entrances):
+            self.hint_queries += [
+                item[hint_data.NAME_KEY] for item in hint_data.items.values()
+            ]
+        words = {word for query in self.hint_queries for word in query.split()}
+        self.search_queries = sorted(word for word in words if len(word) > 3)
+
+    async def run_user(self, guild_id, author):
+        commands = {
+            "hint": self.hint,
+            "search": self.search,
+            "show-hints": self.show_hints,
+            "show-checks": self.show_checks,
+            "set-log": self.set_log,
+        }
+        names = list(self.mix)
+        weights = list(self.mix.values())
+        for _ in range(self.args.commands):
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think_sec))
+            command = self.rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            await commands[command](guild_id, author)
+            self.latencies[command].append(time.perf_counter() - start)
+
+    async def monitor_stalls(self):
+        """Records how late the event loop was each time it should have woken this task up."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + STALL_CHECK_INTERVAL_SEC
+            await asyncio.sleep(STALL_CHECK_INTERVAL_SEC)
+            self.stalls.append(loop.time() - expected)
+
+    async def run(self) -> float:
+        """Runs the load test, returning the wall-clock seconds the commands took."""
+        await self.setup()
+        monitor = asyncio.create_task(self.monitor_stalls())
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                self.run_user(guild_id, author)
+                for guild_id in self.guild_ids
+                for author in self.authors[guild_id]
+            )
+        )
+        elapsed = time.perf_counter() - start
+        monitor.cancel()
+        for g in bot_module.guilds.values():
+            await g.update_scheduler.flush()
+        return elapsed
+
+    def report(self, elapsed: float):
+        args = self.args
+        all_latencies = [t for latencies in self.latencies.values() for t in latencies]
+        print(
+            f"{args.guilds} guilds x {args.players} players x {args.commands} commands, "
+            + f"{args.latency_ms:g}ms latency, {args.rate_limit} rate limit per channel"
+        )
+        print(
+            f"{len(all_latencies)} commands in {elapsed:.2f}s: "
+            + f"{len(all_latencies) / elapsed:.1f} commands/s"
+        )
+        print(f"{'command':<12}  {'count':>6}  {'p50 (ms)':>9}  {'p99 (ms)':>9}")
+        for command, latencies in list(self.latencies.items()) + [
+            ("all", all_latencies)
+        ]:
+            if len(latencies) < 2:
+                continue
+            percentiles = statistics.quantiles(latencies, n=100)
+            print(
+                f"{command:<12}  {len(latencies):>6}  "
+                + f"{percentiles[49] * 1000:>9.1f}  {percentiles[98] * 1000:>9.1f}"
+            )
+        stalls = [stall for stall in self.stalls if stall > STALL_THRESHOLD_SEC]
+        print(
+            f"Event loop stalls over {STALL_THRESHOLD_SEC * 1000:g}ms: {len(stalls)}, "
+            + f"{sum(stalls):.2f}s total, {max(stalls, default=0) * 1000:.1f}ms max"
+        )
+        rate_limiters = [channel.rate_limiter for channel in self.channels.values()]
+        requests = sum(limiter.request_count for limiter in rate_limiters)
+        rate_limited = sum(limiter.rate_limited_count for limiter in rate_limiters)
+        print(f"Discord requests: {requests}, rate limited: {rate_limited}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--players", type=int, default=8, help="Users per guild")
+    parser.add_argument("--commands", type=int, default=50, help="Per user")
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help=f"Relative command weights (default {DEFAULT_MIX}); show-checks is also available",
+    )
+    parser.add_argument(
+        "--think-sec",
+        type=float,
+        default=1.0,
+        help="Mean wait between a user's commands",
+    )
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument(
+        "--rate-limit", default="5/5", help="Requests/seconds allowed per channel"
+    )
+    parser.add_argument("--cooldown-min", type=int, default=0)
+    parser.add_argument("--locations", type=int, default=2000, help="Per world")
+    parser.add_argument("--no-entrances", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # The bot logs every command at INFO level
+    logging.getLogger().setLevel(logging.WARNING)
+    load_test = LoadTest(args)
+    bot_module.bot.get_channel = load_test.bot.get_channel
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)  # guild files are written to the working directory
+        elapsed = asyncio.run(load_test.run())
+    load_test.report(elapsed)
+
+
+if __name__ == "__main__":
+    main()
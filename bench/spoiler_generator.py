@@ -0,0 +1,343 @@
+"""
+Generates synthetic OoTMM spoiler logs in the format handle_spoiler_log parses, for benchmarks and load tests.
+
+Every world shares one layout of areas and locations, as in a real multiworld seed, while items are shuffled across
+all players. With entrance rando on, each world also gets its own shuffle of entrances.
+
+Run from the repo root:
+    python -m bench.spoiler_generator out.txt [--players 16] [--locations 2000] [--no-entrances]
+"""
+
+import argparse
+import random
+
+from consts import IGNORED_ITEMS
+
+MM_AREAS = [
+    "Tingle",
+    "Clock Town",
+    "South Clock Town",
+    "North Clock Town",
+    "East Clock Town",
+    "West Clock Town",
+    "Termina Field",
+    "Southern Swamp",
+    "Deku Palace",
+    "Woodfall",
+    "Woodfall Temple",
+    "Mountain Village",
+    "Goron Village",
+    "Snowhead",
+    "Snowhead Temple",
+    "Romani Ranch",
+    "Milk Road",
+    "Great Bay Coast",
+    "Zora Hall",
+    "Pirate Fortress",
+    "Great Bay Temple",
+    "Ikana Canyon",
+    "Ikana Graveyard",
+    "Beneath the Well",
+    "Ancient Castle of Ikana",
+    "Stone Tower",
+    "Stone Tower Temple",
+    "Swamp Spider House",
+    "Ocean Spider House",
+    "Moon",
+]
+OOT_AREAS = [
+    "Kokiri Forest",
+    "Lost Woods",
+    "Sacred Forest Meadow",
+    "Deku Tree",
+    "Hyrule Field",
+    "Lon Lon Ranch",
+    "Market",
+    "Hyrule Castle",
+    "Kakariko Village",
+    "Graveyard",
+    "Death Mountain Trail",
+    "Dodongo Cavern",
+    "Goron City",
+    "Death Mountain Crater",
+    "Zora River",
+    "Zora's Domain",
+    "Jabu-Jabu",
+    "Lake Hylia",
+    "Gerudo Valley",
+    "Gerudo Fortress",
+    "Desert Colossus",
+    "Forest Temple",
+    "Fire Temple",
+    "Water Temple",
+    "Shadow Temple",
+    "Spirit Temple",
+    "Ganon's Castle",
+]
+CHECK_KINDS = [
+    "Chest",
+    "Pot",
+    "Grass",
+    "Heart Piece",
+    "Gold Skulltula",
+    "Rupee",
+    "Scrub",
+    "Crate",
+    "Hive",
+    "Owl",
+    "Wonder Item",
+    "Butterfly Fairy",
+]
+
+MM_ITEMS = [
+    "Progressive Sword",
+    "Progressive Shield",
+    "Progressive Bow",
+    "Progressive Wallet",
+    "Progressive Magic",
+    "Progressive Bomb Bag",
+    "Light Arrows",
+    "Fire Arrows",
+    "Ice Arrows",
+    "Hookshot",
+    "Lens of Truth",
+    "Deku Mask",
+    "Goron Mask",
+    "Zora Mask",
+    "Bunny Hood",
+    "Kafei's Mask",
+    "Mask of Scents",
+    "Postman's Hat",
+    "Pictograph Box",
+    "Powder Keg",
+    "Song of Soaring",
+    "Sonata of Awakening",
+    "Goron Lullaby",
+    "New Wave Bossa Nova",
+    "Elegy of Emptiness",
+    "Oath to Order",
+    "Bottle",
+    "Stray Fairy (Woodfall)",
+    "Stray Fairy (Snowhead)",
+    "Stray Fairy (Great Bay)",
+    "Stray Fairy (Stone Tower)",
+]
+OOT_ITEMS = [
+    "Progressive Sword",
+    "Progressive Strength Upgrade",
+    "Progressive Hookshot",
+    "Progressive Scale",
+    "Progressive Wallet",
+    "Slingshot",
+    "Boomerang",
+    "Megaton Hammer",
+    "Iron Boots",
+    "Hover Boots",
+    "Mirror Shield",
+    "Din's Fire",
+    "Farore's Wind",
+    "Nayru's Love",
+    "Zelda's Letter",
+    "Ruto's Letter",
+    "Zeldas Lullaby",
+    "Eponas Song",
+    "Sarias Song",
+    "Suns Song",
+    "Song of Storms",
+    "Minuet of Forest",
+    "Bolero of Fire",
+    "Serenade of Water",
+    "Requiem of Spirit",
+    "Nocturne of Shadow",
+    "Prelude of Light",
+    "Gold Skulltula Token",
+    "Bottle",
+]
+# Fraction of locations holding an item from IGNORED_ITEMS, roughly matching real seeds
+JUNK_FRACTION = 0.6
+
+MM_ENTRANCES = [
+    ("Woodfall Front of Temple", "Woodfall Temple", "MM_TEMPLE_WOODFALL"),
+    ("Snowhead", "Snowhead Temple", "MM_TEMPLE_SNOWHEAD"),
+    ("Zora Cape", "Great Bay Temple", "MM_TEMPLE_GREAT_BAY"),
+    ("Stone Tower Front of Temple", "Stone Tower Temple", "MM_TEMPLE_STONE_TOWER"),
+    ("Clock Tower Platform", "Clock Tower Roof", "MM_CLOCK_TOWER_ROOF"),
+    ("Milk Road", "Romani Ranch", "MM_ROMANI_RANCH"),
+    ("Southern Swamp", "Swamp Spider House", "MM_SPIDER_HOUSE_SWAMP"),
+    ("Great Bay Coast", "Ocean Spider House", "MM_SPIDER_HOUSE_OCEAN"),
+    ("Ikana Canyon", "Beneath the Well", "MM_BENEATH_THE_WELL"),
+    ("Ikana Castle Exterior", "Ancient Castle of Ikana", "MM_IKANA_CASTLE"),
+    ("Great Bay Coast", "Pirate Fortress", "MM_PIRATE_FORTRESS"),
+    ("Deku Palace", "Deku Palace Interior", "MM_DEKU_PALACE_INTERIOR"),
+]
+OOT_ENTRANCES = [
+    ("Kokiri Forest", "Deku Tree", "OOT_DEKU_TREE"),
+    ("Death Mountain Trail", "Dodongo Cavern", "OOT_DODONGO_CAVERN"),
+    ("Zora's Fountain", "Jabu-Jabu", "OOT_JABU_JABU"),
+    ("Sacred Forest Meadow", "Forest Temple", "OOT_TEMPLE_FOREST"),
+    ("Death Mountain Crater", "Fire Temple", "OOT_TEMPLE_FIRE"),
+    ("Lake Hylia", "Water Temple", "OOT_TEMPLE_WATER"),
+    ("Graveyard", "Shadow Temple", "OOT_TEMPLE_SHADOW"),
+    ("Desert Colossus", "Spirit Temple", "OOT_TEMPLE_SPIRIT"),
+    ("Kakariko Village", "Bottom of the Well", "OOT_BOTTOM_OF_THE_WELL"),
+    ("Zora's Fountain", "Ice Cavern", "OOT_ICE_CAVERN"),
+    ("Gerudo Fortress", "Gerudo Training Grounds", "OOT_GERUDO_TRAINING_GROUNDS"),
+]
+
+
+def generate_spoiler_log(
+    players: int = 16,
+    locations_per_world: int = 2000,
+    entrances: bool = True,
+    areas_per_world: int = len(MM_AREAS) + len(OOT_AREAS),
+    seed: int = 0,
+) -> list[str]:
+    """Returns the lines of a synthetic spoiler log, without line endings."""
+    rng = random.Random(seed)
+    lines = [
+        "Seed: synthetic",
+        "",
+        "Settings",
+        f"  players: {players}",
+        "  mode: multi",
+        "",
+    ]
+    if entrances:
+        lines += ["Entrances"]
+        for world in range(1, players + 1):
+            lines += _generate_world_entrances(rng, world)
+        lines += [""]
+    lines += [
+        "Hints",
+        "  there would be a hint section here",
+        "",
+        "=" * 75,
+        f"Location List ({players * locations_per_world})",
+    ]
+
+    layout = _generate_layout(rng, locations_per_world, areas_per_world)
+    # Each player's major items go somewhere in the multiworld, the rest is junk
+    item_pool = []
+    for player in range(1, players + 1):
+        for game, items in (("MM", MM_ITEMS), ("OoT", OOT_ITEMS)):
+            item_pool += [(player, f"{item} ({game})") for item in items]
+    total_locations = players * locations_per_world
+    major_count = max(len(item_pool), int(total_locations * (1 - JUNK_FRACTION)))
+    # Big seeds repeat major items, like progressive items and tokens do in real seeds
+    item_pool = [item_pool[i % len(item_pool)] for i in range(major_count)]
+    junk = sorted(IGNORED_ITEMS)
+    while len(item_pool) < total_locations:
+        suffix = rng.choice(["", " (MM)", " (OoT)"])
+        item_pool.append((rng.randint(1, players), rng.choice(junk) + suffix))
+    item_pool = item_pool[:total_locations]
+    rng.shuffle(item_pool)
+
+    items = iter(item_pool)
+    for world in range(1, players + 1):
+        lines.append(f"  World {world} ({locations_per_world})")
+        for area, checks in layout:
+            lines.append(f"    {area} ({len(checks)}):")
+            for check in checks:
+                player, item = next(items)
+                lines.append(f"      {check}: Player {player} {item}")
+        lines.append("")
+    return lines
+
+
+def _generate_layout(
+    rng: random.Random, locations_per_world: int, areas_per_world: int
+) -> list[tuple[str, list[str]]]:
+    """Splits a world's locations into areas of uneven size, returning (area, [check names]) for each area."""
+    base_areas = [("MM", area) for area in MM_AREAS] + [
+        ("OOT", area) for area in OOT_AREAS
+    ]
+    areas = []
+    for i in range(min(areas_per_world, locations_per_world)):
+        game, area = base_areas[i % len(base_areas)]
+        if i >= len(base_areas):
+            area = f"{area} {i // len(base_areas) + 1}"
+        areas.append((game, area))
+    # Random cut points, so some areas have a handful of checks and others have hundreds
+    cuts = sorted(rng.sample(range(1, locations_per_world), len(areas) - 1))
+    sizes = [
+        end - start for start, end in zip([0] + cuts, cuts + [locations_per_world])
+    ]
+    layout = []
+    for (game, area), size in zip(areas, sizes):
+        checks = []
+        kind_counts = {}
+        for _ in range(size):
+            kind = rng.choice(CHECK_KINDS)
+            kind_counts[kind] = kind_counts.get(kind, 0) + 1
+            checks.append(f"{game} {area} {kind} {kind_counts[kind]}")
+        layout.append((area, checks))
+    return layout
+
+
+def _generate_world_entrances(rng: random.Random, world: int) -> list[str]:
+    lines = [f"  World {world}"]
+    for game, pool in (("MM", MM_ENTRANCES), ("OOT", OOT_ENTRANCES)):
+        destinations = list(pool)
+        rng.shuffle(destinations)
+        for (src, dest, dest_id), (new_src, new_dest, new_dest_id) in zip(
+            pool, destinations
+        ):
+            # The entrance into dest leads to new_dest, and the way back out of new_dest leads to src
+            back_id = f"{game}_{_to_id(src)}_FROM_{_to_id(new_dest)}"
+            return_id = f"{game}_{_to_id(new_src)}_FROM_{_to_id(new_dest)}"
+            lines.append(
+                _entrance_line(game, src, dest, dest_id, new_dest, new_src, new_dest_id)
+            )
+            lines.append(
+                _entrance_line(game, new_dest, new_src, return_id, src, dest, back_id)
+            )
+    lines.append(
+        _entrance_line(
+            "MM",
+            "Beneath The Graveyard Night 3 Wallmaster",
+            "VOID",
+            "MM_WALLMASTER_DAMPE",
+            "Romani Ranch",
+            "Milk Road",
+            "MM_ROMANI_RANCH",
+        )
+    )
+    lines.append("")
+    return lines
+
+
+def _entrance_line(
+    game: str,
+    src: str,
+    dest: str,
+    dest_id: str,
+    new_dest: str,
+    new_src: str,
+    new_dest_id: str,
+) -> str:
+    entrance = f"    {game} {src} to {game} {dest} ({dest_id})"
+    return f"{entrance:<103} -> {game} {new_dest} from {game} {new_src} ({new_dest_id})"
+
+
+def _to_id(name: str) -> str:
+    return "".join(c for c in name.upper().replace(" ", "_") if c.isalnum() or c == "_")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("output", help="File to write the spoiler log to")
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--locations", type=int, default=2000, help="Per world")
+    parser.add_argument("--areas", type=int, default=len(MM_AREAS) + len(OOT_AREAS))
+    parser.add_argument("--no-entrances", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    lines = generate_spoiler_log(
+        args.players, args.locations, not args.no_entrances, args.areas, args.seed
+    )
+    with open(args.output, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,61 @@
+import functools
+import io
 import logging
 import os
-from typing import Optional
+import re
+import time
+from typing import Callable, Optional
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
+import metrics
+import seed_data
 from consts import DISCORD_MAX_MSG_LENGTH
-from guild import Guild
+from games import DEFAULT_GAME, GameBindings, game_state_id
+from guild import Guild, get_guild_lock
 from hint_handler import (
+    compose_batch_hint_message,
     get_hint,
     get_hint_without_type,
+    get_hints_without_type,
+    get_show_area_response,
     get_show_checks_response,
     get_show_hints_response,
-    infer_player_num,
+    infer_author_player_num,
 )
+from hint_log import SEC_PER_HOUR
+from memory import format_bytes
 from search_handler import get_search_response
+from seed_stats import get_seed_stats_response
+from snapshots import get_snapshots_response
 from spoiler_log_handler import handle_spoiler_log
-from utils import HintResult, HintType, get_hint_types
+from stall_detector import StallDetector
+from trace_recorder import TraceRecorder
+from utils import HintResult, HintType, curtail_message, get_hint_types
 
 ADMIN_ROLE_NAME = "admin"
+MAX_BATCH_QUERIES = 10
+DEFAULT_HINT_STATS_HOURS = 24
+# Largest loaded guilds listed by !memory
+MAX_MEMORY_GUILDS_SHOWN = 10
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
+# If set, every command is recorded to this file for replaying with bench/replay_trace.py
+TRACE_FILE = os.getenv("TRACE_FILE")
+# If set, metrics are periodically written to this file in the Prometheus text format
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_WRITE_INTERVAL_SEC = 60
 
 intents = discord.Intents.default()
 intents.message_content = True
+# For the member events keeping cached player numbers up to date
+intents.members = True
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 player_param = commands.parameter(
@@ -41,56 +68,242 @@ hint_type_param = commands.parameter(
     displayed_default="all",
 )
 
-# Cache tracking spoiler & hint data for each guild
+# Cache tracking spoiler & hint data for each game, by game state ID (the guild ID for a guild's default game)
 # TODO: Periodically clear old cache items if a lot of guilds start using me :o
 guilds: dict[str, Guild] = {}
+# Which game each channel plays, per guild ID
+game_bindings: dict[str, GameBindings] = {}
 
+trace_recorder = TraceRecorder(TRACE_FILE) if TRACE_FILE else None
 
-def get_guild_data(guild_id):
-    if guild_id not in guilds:
-        guilds[guild_id] = Guild(guild_id)
-    return guilds[guild_id]
+
+@bot.before_invoke
+async def before_command(ctx):
+    # Runs once the command's checks pass and its arguments are parsed
+    metrics.current_command.set(ctx.command.name)
+    ctx.start_time = time.perf_counter()
+    if trace_recorder is not None:
+        await trace_recorder.record(ctx)
+
+
+@bot.after_invoke
+async def after_command(ctx):
+    # Runs after before_command, even if the command raised
+    metrics.observe(
+        "command_seconds",
+        time.perf_counter() - ctx.start_time,
+        {"command": ctx.command.name},
+    )
+
+
+async def setup_hook():
+    metrics.count_discord_requests(bot.http)
+    stall_detector.start()
+    if METRICS_FILE:
+        write_metrics_file.start()
+
+
+bot.setup_hook = setup_hook
+stall_detector = StallDetector()
+
+
+@tasks.loop(seconds=METRICS_WRITE_INTERVAL_SEC)
+async def write_metrics_file():
+    record_guild_memory()
+    metrics.write_prometheus_file(METRICS_FILE)
+
+
+def record_guild_memory() -> dict[int, dict[str, int]]:
+    """Measures each loaded guild's memory footprint by component, and records it in the guild_memory_bytes gauge."""
+    footprints = {guild_id: g.get_memory_footprint() for guild_id, g in guilds.items()}
+    metrics.clear_gauges("guild_memory_bytes")
+    for guild_id, footprint in footprints.items():
+        for component, size in footprint.items():
+            metrics.set_gauge(
+                "guild_memory_bytes",
+                size,
+                {"guild": str(guild_id), "component": component},
+            )
+    metrics.set_gauge("loaded_guilds", len(guilds))
+    metrics.set_gauge("shared_seed_data", seed_data.get_shared_count())
+    return footprints
+
+
+def get_game_bindings(guild_id) -> GameBindings:
+    if guild_id not in game_bindings:
+        game_bindings[guild_id] = GameBindings(guild_id)
+    return game_bindings[guild_id]
+
+
+def get_state_id(ctx):
+    """Returns the state ID of the game played in the command's channel."""
+    game = get_game_bindings(ctx.guild.id).get_game(ctx.channel)
+    return game_state_id(ctx.guild.id, game)
+
+
+def get_guild_data(ctx) -> Guild:
+    """Returns the state of the game played in the command's channel, loading it if needed."""
+    state_id = get_state_id(ctx)
+    if state_id not in guilds:
+        guilds[state_id] = Guild(state_id)
+    return guilds[state_id]
+
+
+def get_loaded_state_ids(guild_id) -> list:
+    """Returns the state ID of each of the guild's games that's loaded, without loading any."""
+    state_ids = [guild_id]
+    bindings = game_bindings.get(guild_id)
+    if bindings is not None:
+        state_ids += [game_state_id(guild_id, game) for game in bindings.get_games()]
+    return [state_id for state_id in state_ids if state_id in guilds]
+
+
+async def update_loaded_games(guild_id, update: Callable[[Guild], None]):
+    """
+    Applies an event's update to each of the guild's loaded games, holding each game's lock like commands do, so
+    it can't interleave with a command or a tracked message update pass.
+    """
+    for state_id in get_loaded_state_ids(guild_id):
+        async with get_guild_lock(state_id):
+            # Looked up under the lock, since a command may have replaced the game's state meanwhile, e.g. !set-log
+            update(guilds[state_id])
+
+
+def serialized_per_guild(command):
+    """
+    Runs the command while holding its game's lock, so commands changing a game's state across awaits can't
+    interleave (e.g. two hints slipping past one cooldown, or a hint landing mid !set-log). Commands for different
+    games or guilds still run concurrently. Guild data must be looked up inside the command, after the lock is
+    acquired.
+    """
+
+    @functools.wraps(command)
+    async def wrapper(ctx, *args, **kwargs):
+        async with get_guild_lock(get_state_id(ctx)):
+            return await command(ctx, *args, **kwargs)
+
+    return wrapper
 
 
 @bot.command(name="set-log")
 @commands.has_role(ADMIN_ROLE_NAME)
-async def set_spoiler_log(ctx):
+@serialized_per_guild
+async def set_spoiler_log(ctx, name: Optional[str] = None):
     """
-    Updates spoiler log from the attached text file. Admin-only.
+    Updates spoiler log from the attached text file, archiving the previous seed so !use-snapshot can switch back to
+    it. Optionally names the new seed (default: seed-N). Admin-only.
     """
     if len(ctx.message.attachments) == 0:
         await ctx.send(
             "Did you forget something? Please attach your spoiler log as a text file :)"
         )
     else:
+        old_guild = get_guild_data(ctx)
+        snapshots = old_guild.snapshots
+        if name is not None:
+            name = name.lower()
+            try:
+                snapshots.validate_new_name(name)
+            except ValueError as err:
+                await ctx.send(err.args[0])
+                return
         data = await ctx.message.attachments[0].read()
-        spoiler_lines = data.decode("utf-8").split("\n")
-        guild_id = ctx.guild.id
-        result_msg, item_locs, checks, entrances = handle_spoiler_log(
-            spoiler_lines, guild_id
+        try:
+            spoiler_lines = data.decode("utf-8").split("\n")
+        except UnicodeDecodeError:
+            await ctx.send("Your spoiler log isn't a UTF-8 text file.")
+            return
+        state_id = get_state_id(ctx)
+        report, item_locs, checks, entrances, seed_stats, areas = handle_spoiler_log(
+            spoiler_lines, state_id
         )
-        g = Guild(guild_id, item_locs, checks, entrances)
-        guilds[guild_id] = g
+        if not report.accepted:
+            # Keep playing the current seed
+            await ctx.send(report.summary())
+            return
+        if name is None or name != snapshots.active:
+            # Keep the current seed, unless the new log replaces it under the same name
+            snapshots.archive(old_guild, reserved_name=name)
+        if name is None:
+            name = snapshots.get_new_name()
+        # Updates for the old log's tracked messages are moot
+        old_guild.update_scheduler.cancel()
+        # Repeat hints' times are only in memory, and the new Guild loads hint times from file
+        old_guild.hint_times.save()
+        g = Guild(state_id, item_locs, checks, entrances, seed_stats, areas)
+        guilds[state_id] = g
         g.hint_times.clear_past_hints()
         g.message_tracker.clear_tracked_messages()
-        await ctx.send(result_msg)
+        g.snapshots.add(name, seed_stats.player_count)
+        await ctx.send(report.summary())
+
+
+@bot.command(name="snapshots")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def show_snapshots(ctx):
+    """Lists the seeds this game has played, which !use-snapshot can switch back to. Admin-only."""
+    await ctx.send(get_snapshots_response(get_guild_data(ctx).snapshots))
+
+
+@bot.command(name="use-snapshot")
+@commands.has_role(ADMIN_ROLE_NAME)
+@serialized_per_guild
+async def use_snapshot(
+    ctx, name: str = commands.parameter(description="Snapshot name, from !snapshots")
+):
+    """
+    Switches to an earlier seed with its past hints, without re-uploading its spoiler log. The current seed is
+    archived so it can be switched back to. Admin-only.
+    """
+    old_guild = get_guild_data(ctx)
+    name = name.lower()
+    if name == old_guild.snapshots.active:
+        await ctx.send(f"Snapshot {name} is already in play.")
+        return
+    if name not in old_guild.snapshots.snapshots:
+        await ctx.send(f"No snapshot named {name}. Use !snapshots to list them.")
+        return
+    archived_name = old_guild.snapshots.archive(old_guild)
+    try:
+        item_locs, checks, entrances, seed_stats, areas, past_hints = (
+            old_guild.snapshots.restore(name)
+        )
+    except FileNotFoundError:
+        await ctx.send(
+            f"Snapshot {name}'s file is missing. Please upload its spoiler log again."
+        )
+        return
+    except ValueError as err:
+        await ctx.send(err.args[0])
+        return
+    # Updates for the old seed's tracked messages are moot
+    old_guild.update_scheduler.cancel()
+    # Repeat hints' times are only in memory, and the new Guild loads hint times from file
+    old_guild.hint_times.save()
+    state_id = get_state_id(ctx)
+    g = Guild(state_id, item_locs, checks, entrances, seed_stats, areas)
+    guilds[state_id] = g
+    g.hint_times.restore_past_hints(past_hints)
+    g.message_tracker.clear_tracked_messages()
+    g.snapshots.set_active(name)
+    response = f"Now playing snapshot {name}."
+    if archived_name is not None:
+        response += f" The previous seed was archived as {archived_name}."
+    await ctx.send(response)
 
 
 async def report_hint_result(hint_result: HintResult, ctx, guild):
     if hint_result.success:
         await ctx.send("\n".join(hint_result.results))
         if hint_result.is_new_hint:
-            player_past_hints = guild.hint_times.past_hints.get(
-                hint_result.player_num, {}
-            )
-            await guild.message_tracker.edit_messages(
-                bot, hint_result, player_past_hints
-            )
+            # Tracked messages are updated shortly, together with any other hints redeemed meanwhile
+            guild.update_scheduler.schedule(bot, hint_result)
     else:
         await ctx.send(hint_result.error)
 
 
 @bot.command(name="hint")
+@serialized_per_guild
 async def hint(
     ctx,
     player: Optional[int] = player_param,
@@ -98,12 +311,37 @@ async def hint(
     query: str = commands.parameter(description="Item, check, or location to look up"),
 ):
     """Reveals location(s) of a given item, result of a given check, or entrance to a given location."""
-    g = get_guild_data(ctx.guild.id)
+    g = get_guild_data(ctx)
     hint_result = get_hint_without_type(g, query, ctx.author, player)
     await report_hint_result(hint_result, ctx, g)
 
 
+@bot.command(name="hints")
+@serialized_per_guild
+async def hints(
+    ctx,
+    player: Optional[int] = player_param,
+    *,
+    queries: str = commands.parameter(
+        description="Items, checks, or locations to look up, separated by semicolons"
+    ),
+):
+    """Reveals several hints at once, e.g. !hints bow; kafei mask. Cooldowns apply per hint type."""
+    query_list = [q.strip() for q in re.split(r"[;\n]", queries) if q.strip()]
+    if len(query_list) > MAX_BATCH_QUERIES:
+        await ctx.send(f"Please ask for at most {MAX_BATCH_QUERIES} hints at a time.")
+        return
+    g = get_guild_data(ctx)
+    hint_results = get_hints_without_type(g, query_list, ctx.author, player)
+    await ctx.send(compose_batch_hint_message(query_list, hint_results))
+    for hint_result in hint_results:
+        if hint_result.success and hint_result.is_new_hint:
+            # All of these land in the same coalesced update of tracked messages
+            g.update_scheduler.schedule(bot, hint_result)
+
+
 @bot.command(name="hint-item")
+@serialized_per_guild
 async def hint_item(
     ctx,
     player: Optional[int] = player_param,
@@ -111,15 +349,23 @@ async def hint_item(
     item: str = commands.parameter(description="Item to look up"),
 ):
     """Reveals location(s) of the given item for the given player."""
-    g = get_guild_data(ctx.guild.id)
+    g = get_guild_data(ctx)
     disabled = g.metadata.disabled_hint_types
     result = get_hint(
-        g.item_locations, g.hint_times, disabled, ctx.author, player, item
+        g.item_locations,
+        g.hint_times,
+        disabled,
+        ctx.author,
+        player,
+        item,
+        player_roles=g.player_roles,
+        hint_log=g.hint_log,
     )
     await report_hint_result(result, ctx, g)
 
 
 @bot.command(name="hint-check")
+@serialized_per_guild
 async def hint_check(
     ctx,
     player: Optional[int] = player_param,
@@ -127,13 +373,23 @@ async def hint_check(
     check: str = commands.parameter(description="Check to look up"),
 ):
     """Reveals item at the given check for the given player."""
-    g = get_guild_data(ctx.guild.id)
+    g = get_guild_data(ctx)
     disabled = g.metadata.disabled_hint_types
-    result = get_hint(g.checks, g.hint_times, disabled, ctx.author, player, check)
+    result = get_hint(
+        g.checks,
+        g.hint_times,
+        disabled,
+        ctx.author,
+        player,
+        check,
+        player_roles=g.player_roles,
+        hint_log=g.hint_log,
+    )
     await report_hint_result(result, ctx, g)
 
 
 @bot.command(name="hint-entrance")
+@serialized_per_guild
 async def hint_entrance(
     ctx,
     player: Optional[int] = player_param,
@@ -141,13 +397,23 @@ async def hint_entrance(
     location: str = commands.parameter(description="Location to look up"),
 ):
     """Reveals entrance to the given location for the given player."""
-    g = get_guild_data(ctx.guild.id)
+    g = get_guild_data(ctx)
     disabled = g.metadata.disabled_hint_types
-    result = get_hint(g.entrances, g.hint_times, disabled, ctx.author, player, location)
+    result = get_hint(
+        g.entrances,
+        g.hint_times,
+        disabled,
+        ctx.author,
+        player,
+        location,
+        player_roles=g.player_roles,
+        hint_log=g.hint_log,
+    )
     await report_hint_result(result, ctx, g)
 
 
 @bot.command(name="show-hints")
+@serialized_per_guild
 async def show_hints(
     ctx, player: Optional[int] = player_param, hint_type: str = hint_type_param
 ):
@@ -156,30 +422,58 @@ async def show_hints(
     if not len(hint_types):
         await ctx.send(f"Unrecognized hint type '{hint_type}'.")
     else:
-        g = get_guild_data(ctx.guild.id)
+        g = get_guild_data(ctx)
         try:
-            player_num = infer_player_num(player, ctx.author.roles)
+            player_num = infer_author_player_num(player, ctx.author, g.player_roles)
             response = get_show_hints_response(player_num, hint_types, g.hint_times)
             message = await ctx.send(response)
             g.message_tracker.track_show_hints_message(
-                player_num, hint_type, ctx.channel.id, message.id
+                player_num, hint_type, ctx.channel.id, message.id, response
+            )
+            await g.message_tracker.refresh_stale_messages(
+                bot, player_num, g.hint_times.get_show_hints
             )
         except ValueError as err:
             await ctx.send(err.args[0])
 
 
 @bot.command(name="show-checks")
+@serialized_per_guild
 async def show_checks(ctx, player: Optional[int] = player_param):
     """
     Shows redeemed hints that point to checks in the given player's world. Infers player number from author's roles if not specified.
     """
-    g = get_guild_data(ctx.guild.id)
+    g = get_guild_data(ctx)
     try:
-        player_num = infer_player_num(player, ctx.author.roles)
+        player_num = infer_author_player_num(player, ctx.author, g.player_roles)
         response = get_show_checks_response(player_num, g.hint_times)
         message = await ctx.send(response)
         g.message_tracker.track_show_checks_message(
-            player_num, ctx.channel.id, message.id
+            player_num, ctx.channel.id, message.id, response
+        )
+        await g.message_tracker.refresh_stale_messages(
+            bot, player_num, g.hint_times.get_show_hints
+        )
+    except ValueError as err:
+        await ctx.send(err.args[0])
+
+
+@bot.command(name="show-area")
+async def show_area(
+    ctx,
+    player: Optional[int] = player_param,
+    *,
+    area: str = commands.parameter(description="Area to list checks in"),
+):
+    """
+    Lists checks in an area of the given player's world, with redeemed hints that point to them. Infers player number
+    from author's roles if not specified.
+    """
+    g = get_guild_data(ctx)
+    try:
+        player_num = infer_author_player_num(player, ctx.author, g.player_roles)
+        await ctx.send(
+            get_show_area_response(player_num, area, g.areas, g.checks, g.hint_times)
         )
     except ValueError as err:
         await ctx.send(err.args[0])
@@ -190,13 +484,14 @@ async def search(ctx, *, query=commands.parameter(description="Search query")):
     """
     Lists items, checks, and entrances matching search query.
     """
-    g = get_guild_data(ctx.guild.id)
+    g = get_guild_data(ctx)
     response = get_search_response(
         query,
         # TODO Limit to enabled hint types?
         g.item_locations,
         g.checks,
         g.entrances,
+        g.areas,
     )
     if len(response) > DISCORD_MAX_MSG_LENGTH:
         await ctx.send(
@@ -208,6 +503,7 @@ async def search(ctx, *, query=commands.parameter(description="Search query")):
 
 @bot.command(name="set-cooldown")
 @commands.has_role(ADMIN_ROLE_NAME)
+@serialized_per_guild
 async def set_hint_cooldown(
     ctx,
     cooldown: int = commands.parameter(description="Cooldown time in minutes"),
@@ -224,7 +520,7 @@ async def set_hint_cooldown(
         #  What about set-cooldown specifically for a disabled type?
         cooldown = max(cooldown, 0)
         cooldown_str = f"{cooldown} minute{'s' if cooldown != 1 else ''}"
-        hint_times = get_guild_data(ctx.guild.id).hint_times
+        hint_times = get_guild_data(ctx).hint_times
         if len(hint_types_to_change) == 1:
             hint_times.set_cooldown(cooldown, hint_types_to_change[0])
             await ctx.send(f"Set {hint_types_to_change[0]} cooldown to {cooldown_str}.")
@@ -242,7 +538,7 @@ async def show_cooldown(ctx, hint_type: str = hint_type_param):
     if not len(specified_hint_types):
         await ctx.send(f"Unrecognized hint type '{hint_type}'.")
     else:
-        g = get_guild_data(ctx.guild.id)
+        g = get_guild_data(ctx)
         response_lines = []
         for ht in specified_hint_types:
             # TODO Avoid showing entrance cooldown if entrance rando is off?
@@ -256,9 +552,10 @@ async def show_cooldown(ctx, hint_type: str = hint_type_param):
 
 @bot.command(name="enable")
 @commands.has_role(ADMIN_ROLE_NAME)
+@serialized_per_guild
 async def enable_hints(ctx, hint_type: str = hint_type_param):
     """Enables the given hint type, or all by default. Admin-only."""
-    g = get_guild_data(ctx.guild.id)
+    g = get_guild_data(ctx)
     specified_hint_types: list[HintType] = get_hint_types(hint_type)
     if not len(specified_hint_types):
         await ctx.send(f"Unrecognized hint type '{hint_type}'.")
@@ -273,9 +570,10 @@ async def enable_hints(ctx, hint_type: str = hint_type_param):
 
 @bot.command(name="disable")
 @commands.has_role(ADMIN_ROLE_NAME)
+@serialized_per_guild
 async def disable_hints(ctx, hint_type: str = hint_type_param):
     """Disables the given hint type, or all by default. Admin-only."""
-    g = get_guild_data(ctx.guild.id)
+    g = get_guild_data(ctx)
     specified_hint_types: list[HintType] = get_hint_types(hint_type)
     if not len(specified_hint_types):
         await ctx.send(f"Unrecognized hint type '{hint_type}'.")
@@ -289,10 +587,218 @@ async def disable_hints(ctx, hint_type: str = hint_type_param):
             await ctx.send(f"{hint_type.capitalize()} hints are already disabled.")
 
 
+@bot.command(name="game")
+async def show_game(ctx):
+    """Shows which game this channel plays, and which channels and categories play other games."""
+    bindings = get_game_bindings(ctx.guild.id)
+    game = bindings.get_game(ctx.channel)
+    lines = [
+        f"This channel plays the {'default game' if game is None else f'game {game}'}."
+    ]
+    for channel_id, bound_game in sorted(bindings.bindings.items(), key=lambda b: b[1]):
+        lines.append(f"- <#{channel_id}>: {bound_game}")
+    await ctx.send(curtail_message("\n".join(lines)))
+
+
+@bot.command(name="set-game")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def set_game(
+    ctx,
+    game: str = commands.parameter(
+        description=f'Game name, or "{DEFAULT_GAME}" for the server\'s default game'
+    ),
+    scope: str = commands.parameter(
+        description="channel | category", default="channel"
+    ),
+):
+    """
+    Makes this channel, or its whole category, play the given game, with its own spoiler log, hints and cooldowns.
+    Admin-only.
+    """
+    match scope:
+        case "channel":
+            channel_id, target = ctx.channel.id, "This channel"
+        case "category":
+            channel_id = getattr(ctx.channel, "category_id", None)
+            if channel_id is None:
+                await ctx.send("This channel isn't in a category.")
+                return
+            target = "This category"
+        case _:
+            await ctx.send(f"Unrecognized scope '{scope}'.")
+            return
+    bindings = get_game_bindings(ctx.guild.id)
+    game = game.lower()
+    if game == DEFAULT_GAME:
+        bindings.unbind(channel_id)
+        await ctx.send(f"{target} now plays the default game.")
+        return
+    try:
+        bindings.bind(channel_id, game)
+    except ValueError as err:
+        await ctx.send(err.args[0])
+        return
+    await ctx.send(
+        f"{target} now plays game {game}. Use !set-log here to upload its spoiler log."
+    )
+
+
+@bot.command(name="seed-stats")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def show_seed_stats(
+    ctx,
+    player: Optional[int] = commands.parameter(
+        description="Optional player number whose items to count", default=None
+    ),
+    world: Optional[int] = commands.parameter(
+        description="Optional world number to count items in", default=None
+    ),
+):
+    """
+    Shows how many hintable items each world holds, for a player or a world if given. Item names are only shown for
+    redeemed hints. Admin-only.
+    """
+    g = get_guild_data(ctx)
+    await ctx.send(get_seed_stats_response(player, world, g.seed_stats, g.hint_times))
+
+
+@bot.command(name="hint-stats")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def hint_stats(
+    ctx,
+    hours: int = commands.parameter(
+        description="Hours to look back over", default=DEFAULT_HINT_STATS_HOURS
+    ),
+    export: str = commands.parameter(
+        description='"csv" to also attach hourly hint counts', default=""
+    ),
+):
+    """Summarizes hint throughput, time between hints and cooldown denials over the last hours. Admin-only."""
+    if hours < 1:
+        await ctx.send(f"Invalid number of hours {hours}.")
+        return
+    g = get_guild_data(ctx)
+    since = int(time.time()) - hours * SEC_PER_HOUR
+    summary = f"__Last {hours}h__\n{g.hint_log.summarize(since)}"
+    if export == "csv":
+        csv_file = discord.File(
+            io.BytesIO(g.hint_log.to_hourly_csv(since).encode()),
+            filename=f"hint-stats-{get_state_id(ctx)}.csv",
+        )
+        await ctx.send(summary, file=csv_file)
+    else:
+        await ctx.send(summary)
+
+
+@bot.command(name="bot-stats")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def bot_stats(ctx):
+    """Shows command latency, Discord request, disk write and cache stats since the bot started. Admin-only."""
+    await ctx.send(curtail_message(metrics.compose_stats_message()))
+
+
+@bot.command(name="memory")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def memory_stats(ctx):
+    """Shows the approximate memory used by this server's data, and by the largest loaded servers. Admin-only."""
+    state_id = get_state_id(ctx)
+    get_guild_data(ctx)
+    footprints = record_guild_memory()
+    totals = {
+        guild_id: sum(footprint.values()) for guild_id, footprint in footprints.items()
+    }
+    lines = [f"**This game:** {format_bytes(totals[state_id])}"]
+    for component, size in sorted(
+        footprints[state_id].items(), key=lambda item: item[1], reverse=True
+    ):
+        lines.append(f"- {component.replace('_', ' ')}: {format_bytes(size)}")
+    lines.append(
+        f"**Loaded servers:** {len(totals)}, {format_bytes(sum(totals.values()))} total. Largest:"
+    )
+    for guild_id in sorted(totals, key=totals.get, reverse=True)[
+        :MAX_MEMORY_GUILDS_SHOWN
+    ]:
+        lines.append(f"- {guild_id}: {format_bytes(totals[guild_id])}")
+    await ctx.send(curtail_message("\n".join(lines)))
+
+
+# Prune tracked messages as they're deleted, so updates after a hint never spend API calls on dead messages.
+# Guilds that aren't loaded find out about deleted messages from the 404 on their next edit instead.
+@bot.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    await update_loaded_games(
+        payload.guild_id,
+        lambda g: g.message_tracker.forget_messages(
+            payload.channel_id, [payload.message_id]
+        ),
+    )
+
+
+@bot.event
+async def on_raw_bulk_message_delete(payload: discord.RawBulkMessageDeleteEvent):
+    await update_loaded_games(
+        payload.guild_id,
+        lambda g: g.message_tracker.forget_messages(
+            payload.channel_id, payload.message_ids
+        ),
+    )
+
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    await update_loaded_games(
+        channel.guild.id, lambda g: g.message_tracker.forget_channel(channel.id)
+    )
+    # Bindings that aren't loaded are left alone, since channel IDs are never reused
+    bindings = game_bindings.get(channel.guild.id)
+    if bindings is not None:
+        bindings.unbind(channel.id)
+
+
+@bot.event
+async def on_raw_thread_delete(payload: discord.RawThreadDeleteEvent):
+    await update_loaded_games(
+        payload.guild_id,
+        lambda g: g.message_tracker.forget_channel(payload.thread_id),
+    )
+
+
+# Keep cached player numbers up to date as roles change, since they're keyed on member ID alone
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if before.roles != after.roles:
+        await update_loaded_games(
+            after.guild.id, lambda g: g.player_roles.update_member(after)
+        )
+
+
+@bot.event
+async def on_member_remove(member: discord.Member):
+    await update_loaded_games(
+        member.guild.id, lambda g: g.player_roles.forget_member(member.id)
+    )
+
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    if before.name != after.name:
+        await update_loaded_games(
+            after.guild.id, lambda g: g.player_roles.update_role(after)
+        )
+
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    await update_loaded_games(
+        role.guild.id, lambda g: g.player_roles.forget_role(role.id)
+    )
+
+
 @bot.event
 async def on_command_error(ctx, error):
     if isinstance(error, commands.errors.MissingRole):
         await ctx.send(str(error))
 
 
-bot.run(TOKEN)
+if __name__ == "__main__":
+    bot.run(TOKEN)
@@ -9,8 +9,8 @@ log = logging.getLogger(__name__)
 
 
 class Checks(HintData):
-    def __init__(self, guild_id, items=None):
-        super().__init__(guild_id, HintType.CHECK, items)
+    def __init__(self, guild_id, items=None, save: bool = True):
+        super().__init__(guild_id, HintType.CHECK, items, save)
 
     def generate_aliases(self):
         aliases = {}
@@ -8,8 +8,8 @@ log = logging.getLogger(__name__)
 
 
 class Entrances(HintData):
-    def __init__(self, guild_id, items=None):
-        super().__init__(guild_id, HintType.ENTRANCE, items)
+    def __init__(self, guild_id, items=None, save: bool = True):
+        super().__init__(guild_id, HintType.ENTRANCE, items, save)
 
     def generate_aliases(self):
         aliases = {}
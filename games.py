@@ -0,0 +1,102 @@
+import logging
+import re
+from typing import Optional
+
+from consts import BOT_VERSION, VERSION_KEY
+from utils import load, store
+
+log = logging.getLogger(__name__)
+
+game_name_re = re.compile(r"^[a-z0-9][a-z0-9-]{0,31}$")  # e.g. weekly-mw-3
+DEFAULT_GAME = "default"
+
+
+def game_bindings_filename(guild_id) -> str:
+    return f"{guild_id}-games.json"
+
+
+def game_state_id(guild_id, game: Optional[str]):
+    """
+    Returns the ID a game's state is stored under. The default game's is the guild ID, as before guilds could run
+    several games; other games' have the game name appended, so each game gets its own files and lock.
+    """
+    return guild_id if game is None else f"{guild_id}-game-{game}"
+
+
+class GameBindings:
+    """
+    Which game each channel or category of a guild plays, for guilds running several games at once. Channels and
+    categories without a binding play the default game.
+    """
+
+    BINDINGS_KEY = "bindings"
+    """
+    Serialized structure:
+    {
+        VERSION_KEY: BOT_VERSION,
+        BINDINGS_KEY: {
+            "channel or category ID": "game name",
+            ...
+        }
+    }
+    """
+
+    def __init__(self, guild_id):
+        self.filename = game_bindings_filename(guild_id)
+        try:
+            self.bindings = self._get_bindings_from_file()
+        except FileNotFoundError:
+            self.bindings: dict[int, str] = {}
+
+    def get_game(self, channel) -> Optional[str]:
+        """
+        Returns the game bound to the channel, else to its parent channel if it's a thread, else to its category.
+        Returns None for the default game.
+        """
+        for channel_id in (
+            channel.id,
+            getattr(channel, "parent_id", None),
+            getattr(channel, "category_id", None),
+        ):
+            game = self.bindings.get(channel_id)
+            if game is not None:
+                return game
+        return None
+
+    def get_games(self) -> set[str]:
+        return set(self.bindings.values())
+
+    def bind(self, channel_id: int, game: str):
+        """Binds the channel or category to the game. Raises ValueError for invalid game names."""
+        if not game_name_re.match(game) or game == DEFAULT_GAME:
+            raise ValueError(
+                f"Invalid game name {game}. Use up to 32 lowercase letters, numbers and dashes."
+            )
+        self.bindings[channel_id] = game
+        self.save()
+
+    def unbind(self, channel_id: int) -> bool:
+        """Returns the channel or category to the default game. Returns False if it wasn't bound."""
+        if self.bindings.pop(channel_id, None) is None:
+            return False
+        self.save()
+        return True
+
+    def _get_bindings_from_file(self) -> dict[int, str]:
+        data = load(self.filename)
+        data_version = data.get(VERSION_KEY)
+        if data_version == BOT_VERSION:
+            return {
+                int(channel_id): game
+                for channel_id, game in data[GameBindings.BINDINGS_KEY].items()
+            }
+
+        # Data in file is outdated or corrupt. If it's a known old version, use it; otherwise ignore it.
+        log.info(f"No protocol for game bindings with version {data_version}")
+        raise FileNotFoundError
+
+    def _get_filedata(self):
+        return {VERSION_KEY: BOT_VERSION, GameBindings.BINDINGS_KEY: self.bindings}
+
+    def save(self):
+        store(self._get_filedata(), self.filename)
@@ -1,18 +1,36 @@
+import asyncio
 import logging
 from dataclasses import dataclass
 from typing import Optional
 
+from area_index import AreaIndex
 from checks import Checks
 from consts import BOT_VERSION, VERSION_KEY
 from entrances import Entrances
 from hint_data import HintData
+from hint_log import HintLog
 from hint_times import HintTimes
 from item_locations import ItemLocations
+from memory import get_deep_size
 from message_tracker import MessageTracker
+from player_roles import PlayerRoleCache
+from seed_stats import SeedStats
+from snapshots import SnapshotArchive
+from update_scheduler import UpdateScheduler
 from utils import HintType, load, store
 
 log = logging.getLogger(__name__)
 
+# One lock per guild ID, shared by every Guild object loaded for that guild (e.g. before and after !set-log)
+_guild_locks: dict[int, asyncio.Lock] = {}
+
+
+def get_guild_lock(guild_id) -> asyncio.Lock:
+    """Returns the lock serializing changes to the given guild's state."""
+    if guild_id not in _guild_locks:
+        _guild_locks[guild_id] = asyncio.Lock()
+    return _guild_locks[guild_id]
+
 
 @dataclass
 class Guild:
@@ -24,13 +42,24 @@ class Guild:
         item_locations: Optional[ItemLocations] = None,
         checks: Optional[Checks] = None,
         entrances: Optional[Entrances] = None,
+        seed_stats: Optional[SeedStats] = None,
+        areas: Optional[AreaIndex] = None,
     ):
         self.metadata = GuildMetadata(guild_id)
         self.item_locations = item_locations or ItemLocations(guild_id)
         self.checks = checks or Checks(guild_id)
         self.entrances = entrances or Entrances(guild_id)
+        self.seed_stats = seed_stats or SeedStats(guild_id)
+        self.areas = areas or AreaIndex(guild_id)
         self.hint_times = HintTimes(guild_id)
+        self.hint_log = HintLog(guild_id)
         self.message_tracker = MessageTracker(guild_id)
+        self.player_roles = PlayerRoleCache()
+        self.snapshots = SnapshotArchive(guild_id)
+        self.lock = get_guild_lock(guild_id)
+        self.update_scheduler = UpdateScheduler(
+            self.message_tracker, self.hint_times, self.lock
+        )
 
     def get_hint_data(self, hint_type: HintType) -> HintData:
         match hint_type:
@@ -43,6 +72,28 @@ class Guild:
             case _:
                 raise ValueError(hint_type)
 
+    def get_memory_footprint(self) -> dict[str, int]:
+        """
+        Returns the approximate bytes retained by each part of the guild's state, by component name. Seed data and
+        interned names shared with other guilds are counted too, so this overstates what unloading the guild would
+        free.
+        """
+        hint_data_sizes = {
+            "item_locations": self.item_locations.get_memory_size(),
+            "checks": self.checks.get_memory_size(),
+            "entrances": self.entrances.get_memory_size(),
+        }
+        footprint = {name: size[0] for name, size in hint_data_sizes.items()}
+        footprint["aliases"] = sum(size[1] for size in hint_data_sizes.values())
+        footprint["seed_stats"] = get_deep_size(self.seed_stats)
+        footprint["areas"] = get_deep_size(self.areas)
+        footprint["hint_times"] = get_deep_size(self.hint_times)
+        footprint["hint_log"] = get_deep_size(self.hint_log)
+        footprint["message_tracker"] = get_deep_size(self.message_tracker)
+        footprint["player_roles"] = get_deep_size(self.player_roles)
+        footprint["snapshots"] = get_deep_size(self.snapshots)
+        return footprint
+
 
 def guild_metadata_filename(guild_id) -> str:
     return f"{guild_id}-metadata.json"
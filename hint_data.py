@@ -1,8 +1,10 @@
+import json
 import logging
 from typing import Optional
 
 from consts import BOT_VERSION, VERSION_KEY
-from utils import HintType, canonicalize, load, store
+from seed_data import SeedData, get_content_key, get_shared, share
+from utils import HintType, canonicalize, get_interner, intern_strings, read, store
 
 log = logging.getLogger(__name__)
 
@@ -36,32 +38,66 @@ class HintData:
     }
     """
 
-    def __init__(self, guild_id, hint_type: HintType, items: dict[str, dict] = None):
+    def __init__(
+        self,
+        guild_id,
+        hint_type: HintType,
+        items: dict[str, dict] = None,
+        save: bool = True,
+    ):
         """
-        Creates hint data with the given hint type. If item data is given, a hint data file is saved. Otherwise,
-        data is populated from existing file (or empty if no file exists).
+        Creates hint data with the given hint type. If item data is given, a hint data file is saved unless save is
+        False. Otherwise, data is populated from existing file (or empty if no file exists).
+        Items and aliases are shared with other guilds whose saved hint data is identical, so they must not be modified.
         """
         self.hint_type: HintType = hint_type
         self.filename: str = hint_data_filename(guild_id, hint_type)
 
         if items is not None:
-            self.items = items
-            self.save()
+            self._use_seed_data(self._make_seed_data(items))
+            if save:
+                self.save()
         else:
             try:
-                self.items = self._get_items_from_file()
+                self._use_seed_data(self._get_seed_data_from_file())
             except FileNotFoundError:
-                self.items = {}
-
-        self.aliases: dict[str, str] = (
-            self.generate_aliases() if len(self.items) else {}
+                self._use_seed_data(SeedData({}, {}))
+
+    def _make_seed_data(self, items: dict[str, dict]) -> SeedData:
+        self.items = items
+        intern = get_interner()
+        aliases = (
+            {
+                intern(alias): item_key
+                for alias, item_key in self.generate_aliases().items()
+            }
+            if len(items)
+            else {}
         )
-
-    def _get_items_from_file(self) -> dict[str, dict]:
-        data = load(self.filename)
+        return SeedData(items, aliases)
+
+    def _use_seed_data(self, seed_data: SeedData):
+        self.seed_data = seed_data
+        self.items: dict[str, dict] = seed_data.items
+        self.aliases: dict[str, str] = seed_data.aliases
+
+    def get_memory_size(self) -> tuple[int, int]:
+        """Returns the approximate bytes retained by items and by the aliases not shared with items."""
+        return self.seed_data.get_memory_size()
+
+    def _get_seed_data_from_file(self) -> SeedData:
+        content = read(self.filename)
+        key = get_content_key(self.hint_type, content)
+        # Another guild may have loaded the same seed already, in which case there's no need to parse the file
+        seed_data = get_shared(key)
+        if seed_data is not None:
+            return seed_data
+
+        data = json.loads(content)
         data_version = data.get(VERSION_KEY)
         if data_version == BOT_VERSION:
-            return data[HintData.DATA_KEY]
+            items = intern_strings(data[HintData.DATA_KEY])
+            return share(key, self._make_seed_data(items))
 
         # Data in file is outdated or corrupt. If it's a known old version, use it; otherwise ignore it.
         log.info(
@@ -122,7 +158,10 @@ class HintData:
         }
 
     def save(self):
-        store(self._get_filedata(), self.filename)
+        content = store(self._get_filedata(), self.filename)
+        self._use_seed_data(
+            share(get_content_key(self.hint_type, content), self.seed_data)
+        )
 
     def generate_aliases(self):
         # Should be implemented by child classes
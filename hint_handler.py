@@ -2,22 +2,23 @@ import logging
 import re
 from typing import Optional
 
+from area_index import AreaIndex
+from checks import Checks
 from guild import Guild
 from hint_data import HintData
+from hint_log import HintEvent, HintLog
 from hint_times import HintTimes
+from player_roles import PlayerRoleCache, get_player_num_from_roles
 from utils import (
     FailedHintResult,
     HintResult,
     HintType,
     SuccessfulHintResult,
-    compose_show_hints_message,
     curtail_message,
 )
 
 log = logging.getLogger(__name__)
 
-player_re = re.compile(r"^@?player ?([1-9]\d*)$")  # player14, @Player14
-
 
 def infer_player_num(player: Optional[int], author_roles):
     """Get player num(s) from author's roles"""
@@ -25,21 +26,16 @@ def infer_player_num(player: Optional[int], author_roles):
         if player >= 1:
             return player
         raise ValueError(f"Invalid player number {player}.")
+    return get_player_num_from_roles(author_roles)
 
-    player_num = None
-    for role in author_roles:
-        match = player_re.search(role.name.lower())
-        if match:
-            if player_num is not None:
-                raise ValueError(
-                    f"You have multiple player roles. Please specify player number."
-                )
-            player_num = int(match.group(1))
-    if player_num is None:
-        raise ValueError(
-            "Unable to infer player number from your roles. Please specify your player number."
-        )
-    return player_num
+
+def infer_author_player_num(
+    player: Optional[int], author, player_roles: Optional[PlayerRoleCache] = None
+):
+    """Like infer_player_num, but looks up the author's player number in player_roles if given"""
+    if player is not None or player_roles is None:
+        return infer_player_num(player, author.roles)
+    return player_roles.get_player_num(author)
 
 
 def get_show_hints_response(
@@ -47,8 +43,7 @@ def get_show_hints_response(
     hint_types: list[HintType],
     hint_times: HintTimes,
 ) -> str:
-    past_hints_for_player = hint_times.past_hints.get(player, {})
-    results = compose_show_hints_message(hint_types, past_hints_for_player)
+    results = hint_times.get_show_hints(player).compose(hint_types)
     if not len(results):
         hints_qualifier = "" if len(hint_types) > 1 else f"{hint_types[0].value} "
         return f"Player {player} has not even redeemed any {hints_qualifier}hints yet! :horse: :zzz:"
@@ -73,8 +68,66 @@ def get_show_checks_response(player: int, hint_times: HintTimes) -> str:
     return "No redeemed hints have pointed to checks in your world yet."
 
 
+def get_show_area_response(
+    player: int,
+    area_query: str,
+    areas: AreaIndex,
+    checks: Checks,
+    hint_times: HintTimes,
+) -> str:
+    """Lists the checks in an area of the given player's world, along with redeemed hints that point to them."""
+    try:
+        area_name, check_keys = areas.get_checks(player, area_query)
+    except FileNotFoundError:
+        return (
+            "No area data is currently stored. (Use !set-log to upload a spoiler log.)"
+        )
+    # World location -> redeemed hint pointing to it
+    hinted_locations = {}
+    for other_player, other_player_hints in hint_times.past_hints.items():
+        for hinted_item, results in other_player_hints.get(HintType.ITEM, {}).items():
+            for result in results:
+                hinted_locations[result] = f"Player {other_player} {hinted_item}"
+    lines = [f"**World {player} {area_name}:**"]
+    for check_key in check_keys:
+        check_name = checks.items[check_key][HintData.NAME_KEY]
+        hint = hinted_locations.get(f"World {player} {check_name}")
+        lines.append(f"- {check_name}: {hint}" if hint else f"- {check_name}")
+    return curtail_message("\n".join(lines))
+
+
+def get_hints_without_type(
+    g: Guild, queries: list[str], author, player: Optional[int]
+) -> list[HintResult]:
+    """
+    Resolves several hint queries in one pass. Cooldowns apply per query type as if the queries were asked one by
+    one, e.g. with a nonzero item cooldown only the first item query succeeds. Hint times are saved once, if any
+    hint is new.
+    """
+    results = [
+        get_hint_without_type(g, query, author, player, save=False) for query in queries
+    ]
+    if any(result.success and result.is_new_hint for result in results):
+        g.hint_times.save()
+    return results
+
+
+def compose_batch_hint_message(
+    queries: list[str], hint_results: list[HintResult]
+) -> str:
+    lines = []
+    for query, hint_result in zip(queries, hint_results):
+        if hint_result.success:
+            lines.append(
+                f"**{hint_result.item_name}:** {", ".join(hint_result.results)}"
+            )
+        else:
+            lines.append(f"**{query}:** {hint_result.error}")
+    return curtail_message("\n".join(lines))
+
+
 def get_hint_without_type(
-    g: Guild, query: str, author, player: Optional[int]
+    g: Guild, query: str, author, player: Optional[int], save: bool = True
 ) -> HintResult:
     item_key, hint_data = None, None
     for ht in HintType:
@@ -99,6 +152,9 @@ def get_hint_without_type(
         author,
         player,
         item_key,
+        save,
+        g.player_roles,
+        g.hint_log,
     )
 
 
@@ -109,6 +165,9 @@ def get_hint(
     author,
     player_num: Optional[int],
     query: str,
+    save: bool = True,
+    player_roles: Optional[PlayerRoleCache] = None,
+    hint_log: Optional[HintLog] = None,
 ) -> HintResult:
     if hint_data.hint_type in disabled_hint_types:
         return FailedHintResult(
@@ -116,11 +175,13 @@ def get_hint(
         )
 
     try:
-        player_num = infer_player_num(player_num, author.roles)
+        player_num = infer_author_player_num(player_num, author, player_roles)
     except ValueError as e:
         return FailedHintResult(e.args[0])
 
-    return get_hint_response(player_num, query, author.id, hint_data, hint_times)
+    return get_hint_response(
+        player_num, query, author.id, hint_data, hint_times, save, hint_log
+    )
 
 
 def get_hint_response(
@@ -129,7 +190,13 @@ def get_hint_response(
     author_id: int,
     hint_data: HintData,
     hint_times: HintTimes,
+    save: bool = True,
+    hint_log: Optional[HintLog] = None,
 ) -> HintResult:
+    """
+    Looks up and records a hint, and the request in hint_log if given. If save is False, the caller is responsible for
+    saving hint times.
+    """
     try:
         item_name, player_locs_for_item = hint_data.get_results(player_number, item)
     except FileNotFoundError:
@@ -147,6 +214,10 @@ def get_hint_response(
     # TODO add flavors
     if hint_wait_time:
         log.debug(f"Hint denied due to cooldown until {hint_wait_time}")
+        if hint_log is not None:
+            hint_log.record(
+                author_id, player_number, hint_data.hint_type, HintEvent.COOLDOWN
+            )
         return FailedHintResult(
             f"Whoa nelly! You can't get another {hint_data.hint_type} hint until <t:{hint_wait_time}:T> -- hold your horses!!"
         )
@@ -158,7 +229,15 @@ def get_hint_response(
         hint_data.hint_type,
         item_name,
         player_locs_for_item,
+        save,
     )
+    if hint_log is not None:
+        hint_log.record(
+            author_id,
+            player_number,
+            hint_data.hint_type,
+            HintEvent.NEW if is_new_hint else HintEvent.REPEAT,
+        )
     return SuccessfulHintResult(
         item_name, player_locs_for_item, hint_data.hint_type, player_number, is_new_hint
     )
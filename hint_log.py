@@ -0,0 +1,189 @@
+import bisect
+import logging
+import math
+import operator
+import os
+import statistics
+import struct
+import time
+from array import array
+from enum import Enum
+from itertools import compress, repeat
+from typing import BinaryIO, Optional
+
+import metrics
+from utils import HintType
+
+log = logging.getLogger(__name__)
+
+# Hint types are stored by their index in this list
+HINT_TYPES = list(HintType)
+SEC_PER_HOUR = 60 * 60
+
+
+class HintEvent(Enum):
+    NEW = 0
+    REPEAT = 1
+    COOLDOWN = 2  # denied because the asker's cooldown hadn't passed
+
+
+def hint_log_filename(guild_id) -> str:
+    return f"{guild_id}-hint-log.bin"
+
+
+class HintLog:
+    """
+    Append-only series of every hint request in a guild, for analytics. Stored apart from hint times, since it only
+    grows: each request appends one fixed-width record to the file, and the series is kept in memory as one array
+    per column so windows of it can be aggregated with slices.
+    The file is opened on the first request and kept open, unbuffered, so each request costs one write and other
+    HintLogs loaded for the guild (e.g. after !set-log) see every record.
+    """
+
+    # timestamp, asker ID, player number, hint type index, HintEvent value
+    RECORD = struct.Struct("<qQHBB")
+
+    def __init__(self, guild_id):
+        self.filename = hint_log_filename(guild_id)
+        self.timestamps = array("q")
+        self.askers = array("Q")
+        self.players = array("H")
+        self.hint_types = array("B")
+        self.events = array("B")
+        self.file: Optional[BinaryIO] = None
+        try:
+            self._load_from_file()
+        except FileNotFoundError:
+            pass
+
+    def record(
+        self,
+        asker_id: int,
+        player_num: int,
+        hint_type: HintType,
+        event: HintEvent,
+        timestamp: Optional[int] = None,
+    ):
+        if timestamp is None:
+            timestamp = int(time.time())
+        record = (
+            timestamp,
+            asker_id,
+            player_num,
+            HINT_TYPES.index(hint_type),
+            event.value,
+        )
+        for column, value in zip(self._get_columns(), record):
+            column.append(value)
+        if self.file is None:
+            self.file = open(self.filename, "ab", buffering=0)
+        self.file.write(HintLog.RECORD.pack(*record))
+        metrics.increment_for_command("disk_bytes_written_total", HintLog.RECORD.size)
+
+    def get_window_start(self, since: int) -> int:
+        """Returns the index of the first record at or after the since timestamp."""
+        return bisect.bisect_left(self.timestamps, since)
+
+    def summarize(self, since: int, until: Optional[int] = None) -> str:
+        """Summarizes hint throughput, time between hints and cooldown denials between the given timestamps."""
+        until = int(time.time()) if until is None else until
+        start, end = self.get_window_start(since), self.get_window_start(until + 1)
+        events = self.events[start:end]
+        new_count = events.count(HintEvent.NEW.value)
+        repeat_count = events.count(HintEvent.REPEAT.value)
+        denied_count = events.count(HintEvent.COOLDOWN.value)
+        hint_count = new_count + repeat_count
+        hours = max(until - since, 1) / SEC_PER_HOUR
+        lines = [
+            f"**Hints:** {hint_count} ({hint_count / hours:.1f}/h), {repeat_count} of them repeats"
+        ]
+        if not len(events):
+            return lines[0]
+
+        denial_rate = denied_count / len(events)
+        lines.append(
+            f"**Cooldown denials:** {denied_count} ({denial_rate:.0%} of requests)"
+        )
+        hint_types = self.hint_types[start:end]
+        lines.append(
+            "**By type:** "
+            + ", ".join(
+                f"{hint_type}: {hint_types.count(i)}"
+                for i, hint_type in enumerate(HINT_TYPES)
+            )
+        )
+        hint_mask = _get_hint_mask(events)
+        hint_timestamps = array("q", compress(self.timestamps[start:end], hint_mask))
+        if len(hint_timestamps) > 1:
+            gaps = sorted(map(operator.sub, hint_timestamps[1:], hint_timestamps[:-1]))
+            lines.append(
+                f"**Time between hints:** median {_format_sec(statistics.median(gaps))}, "
+                + f"90th percentile {_format_sec(gaps[math.ceil(0.9 * len(gaps)) - 1])}"
+            )
+        askers = self.askers[start:end]
+        denied_askers = set(compress(askers, map(operator.not_, hint_mask)))
+        lines.append(
+            f"**Askers:** {len(set(askers))}, {len(denied_askers)} of them hit cooldowns"
+        )
+        return "\n".join(lines)
+
+    def to_hourly_csv(self, since: int, until: Optional[int] = None) -> str:
+        """Returns hint counts per hour between the given timestamps as CSV, by event and by hint type."""
+        until = int(time.time()) if until is None else until
+        start, end = self.get_window_start(since), self.get_window_start(until + 1)
+        first_hour = since - since % SEC_PER_HOUR
+        hour_count = (until - first_hour) // SEC_PER_HOUR + 1
+        columns = [e.name.lower() for e in HintEvent] + [str(ht) for ht in HINT_TYPES]
+        hint_mask = _get_hint_mask(self.events[start:end])
+        lines = [",".join(["hour_start"] + columns)]
+        hour_end_index = start
+        for i in range(hour_count):
+            hour_start = first_hour + i * SEC_PER_HOUR
+            # Each hour's records are one slice of the window
+            hour_start_index = hour_end_index
+            hour_end_index = bisect.bisect_left(
+                self.timestamps, hour_start + SEC_PER_HOUR, hour_start_index, end
+            )
+            events = self.events[hour_start_index:hour_end_index]
+            hint_types = array(
+                "B",
+                compress(
+                    self.hint_types[hour_start_index:hour_end_index],
+                    hint_mask[hour_start_index - start : hour_end_index - start],
+                ),
+            )
+            hour_counts = [events.count(e.value) for e in HintEvent] + [
+                hint_types.count(type_index) for type_index in range(len(HINT_TYPES))
+            ]
+            lines.append(",".join(str(value) for value in [hour_start] + hour_counts))
+        return "\n".join(lines) + "\n"
+
+    def _get_columns(self) -> tuple[array, ...]:
+        return self.timestamps, self.askers, self.players, self.hint_types, self.events
+
+    def _load_from_file(self):
+        with open(self.filename, "rb") as f:
+            data = f.read()
+        partial_size = len(data) % HintLog.RECORD.size
+        if partial_size:
+            # Drop a partial record left by an interrupted write, so new records line up
+            log.info(f"Truncating partial record in {self.filename}")
+            data = data[: len(data) - partial_size]
+            os.truncate(self.filename, len(data))
+        for column, values in zip(
+            self._get_columns(), zip(*HintLog.RECORD.iter_unpack(data))
+        ):
+            column.extend(values)
+
+
+def _get_hint_mask(events: array) -> array:
+    """Returns 1 for each request that was answered and 0 for each cooldown denial, for itertools.compress."""
+    return array("B", map(operator.ne, events, repeat(HintEvent.COOLDOWN.value)))
+
+
+def _format_sec(sec: float) -> str:
+    if sec < 60:
+        return f"{sec:.0f}s"
+    if sec < SEC_PER_HOUR:
+        return f"{sec / 60:.1f}m"
+    return f"{sec / SEC_PER_HOUR:.1f}h"
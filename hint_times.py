@@ -1,12 +1,23 @@
+import heapq
 import logging
 import time
 
 from consts import BOT_VERSION, VERSION_KEY
-from utils import HintType, load, store
+from utils import (
+    HintType,
+    PlayerShowHints,
+    ShowHintsCache,
+    intern_strings,
+    load,
+    store,
+)
 
 log = logging.getLogger(__name__)
 
 DEFAULT_HINT_COOLDOWN_SEC = 30 * 60
+# Keep askers' hint times at least this long, even if every cooldown is shorter, so raising a cooldown still applies
+# to recent hints
+MIN_HINT_TIME_RETENTION_SEC = DEFAULT_HINT_COOLDOWN_SEC
 
 
 def hint_times_filename(guild_id) -> str:
@@ -47,12 +58,18 @@ class HintTimes:
 
     def __init__(self, guild_id):
         self.filename = hint_times_filename(guild_id)
+        self.show_hints_cache = ShowHintsCache()
+        # (timestamp, asker, hint type value) for each recorded hint time, oldest first, so hint times that can no longer
+        # affect a cooldown are swept without scanning every asker. Entries superseded by a newer hint time are
+        # skipped when they reach the front.
+        self.hint_time_heap: list[tuple[int, int, str]] = []
         try:
             self._init_from_file()
         except FileNotFoundError:
             self.cooldowns = {}
             self.hint_times = {}
             self.past_hints = {}
+        self.sweep_hint_times()
 
     def _init_from_file(self):
         data = load(self.filename)
@@ -63,15 +80,16 @@ class HintTimes:
                 for ht, cooldown in data[HintTimes.COOLDOWNS_KEY].items()
             }
             self.hint_times = {}
-            self.past_hints = {}
             for asker, hint_timestamps in data[HintTimes.HINT_TIMES_KEY].items():
                 self.hint_times[int(asker)] = {
                     HintType(ht): timestamp for ht, timestamp in hint_timestamps.items()
                 }
-            for player, past_hints in data[HintTimes.PAST_HINTS_KEY].items():
-                self.past_hints[int(player)] = {
-                    HintType(ht): hint_dict for ht, hint_dict in past_hints.items()
-                }
+                self.hint_time_heap.extend(
+                    (timestamp, int(asker), ht.value)
+                    for ht, timestamp in self.hint_times[int(asker)].items()
+                )
+            heapq.heapify(self.hint_time_heap)
+            self.past_hints = _deserialize_past_hints(data[HintTimes.PAST_HINTS_KEY])
         else:
             # Data in file is outdated or corrupt. If it's a known old version, use it; otherwise ignore it.
             log.info(
@@ -80,23 +98,19 @@ class HintTimes:
             raise FileNotFoundError  # will result in default cooldowns and no saved askers
 
     def save(self):
+        self.sweep_hint_times()
         serialized_hint_times = {}
-        serialized_past_hints = {}
         for asker, hint_timestamps in self.hint_times.items():
             serialized_hint_times[asker] = {
                 str(ht): timestamp for ht, timestamp in hint_timestamps.items()
             }
-        for player, past_hints in self.past_hints.items():
-            serialized_past_hints[player] = {
-                str(ht): hint_dict for ht, hint_dict in past_hints.items()
-            }
         filedata = {
             VERSION_KEY: BOT_VERSION,
             HintTimes.COOLDOWNS_KEY: {
                 str(ht): cooldown for ht, cooldown in self.cooldowns.items()
             },
             HintTimes.HINT_TIMES_KEY: serialized_hint_times,
-            HintTimes.PAST_HINTS_KEY: serialized_past_hints,
+            HintTimes.PAST_HINTS_KEY: self.get_serialized_past_hints(),
         }
         store(filedata, self.filename)
 
@@ -120,19 +134,49 @@ class HintTimes:
         hint_type: HintType,
         query: str,
         results: list[str],
+        save: bool = True,
     ):
-        """Records a successful hint and asker hint time. Returns True if it's a new hint."""
+        """
+        Records a successful hint and asker hint time. Returns True if it's a new hint.
+        Hint times are only saved for a new hint, so a repeat's cooldown doesn't survive a restart. If save is False,
+        the caller is responsible for saving new hints.
+        """
         # Record current time as the asker's latest hint time
-        self.hint_times.setdefault(asker_id, {})[hint_type] = int(time.time())
+        current_time = int(time.time())
+        self.hint_times.setdefault(asker_id, {})[hint_type] = current_time
+        heapq.heappush(self.hint_time_heap, (current_time, asker_id, hint_type.value))
         # Add hint to past hints if it's not a repeat
         past_hints = self.past_hints.setdefault(player_num, {}).setdefault(
             hint_type, {}
         )
-        if query not in past_hints:
+        is_new_hint = query not in past_hints
+        if is_new_hint:
             past_hints[query] = results
+            self.show_hints_cache.add_hint(player_num, hint_type, query, results)
+        if is_new_hint and save:
             self.save()
-            return True
-        return False
+        return is_new_hint
+
+    def sweep_hint_times(self):
+        """Drops hint times older than the longest cooldown, since they can't make attempt_hint deny a hint."""
+        retention = max(
+            MIN_HINT_TIME_RETENTION_SEC, *(self.get_cooldown(ht) for ht in HintType)
+        )
+        expiry_time = int(time.time()) - retention
+        heap = self.hint_time_heap
+        while len(heap) and heap[0][0] <= expiry_time:
+            timestamp, asker, hint_type_value = heapq.heappop(heap)
+            hint_type = HintType(hint_type_value)
+            asker_hint_times = self.hint_times.get(asker)
+            if asker_hint_times is None or asker_hint_times.get(hint_type) != timestamp:
+                continue  # superseded by a later hint
+            del asker_hint_times[hint_type]
+            if not len(asker_hint_times):
+                del self.hint_times[asker]
+
+    def get_show_hints(self, player_num: int) -> PlayerShowHints:
+        """Returns the player's cached !show-hints content."""
+        return self.show_hints_cache.get(player_num, self.past_hints)
 
     def get_cooldown(self, hint_type: HintType):
         return self.cooldowns.get(hint_type, DEFAULT_HINT_COOLDOWN_SEC)
@@ -155,6 +199,31 @@ class HintTimes:
         return old_cooldown != new_cooldown
 
     def clear_past_hints(self):
+        self.show_hints_cache.clear()
         if len(self.past_hints):
             self.past_hints = {}
             self.save()
+
+    def get_serialized_past_hints(self) -> dict[int, dict[str, dict[str, list[str]]]]:
+        return {
+            player: {str(ht): hint_dict for ht, hint_dict in past_hints.items()}
+            for player, past_hints in self.past_hints.items()
+        }
+
+    def restore_past_hints(self, serialized_past_hints: dict):
+        """Replaces past hints with ones from get_serialized_past_hints, e.g. when switching back to an earlier seed."""
+        self.show_hints_cache.clear()
+        self.past_hints = _deserialize_past_hints(serialized_past_hints)
+        self.save()
+
+
+def _deserialize_past_hints(
+    serialized_past_hints: dict,
+) -> dict[int, dict[HintType, dict[str, list[str]]]]:
+    return {
+        int(player): {
+            HintType(ht): intern_strings(hint_dict)
+            for ht, hint_dict in past_hints.items()
+        }
+        for player, past_hints in serialized_past_hints.items()
+    }
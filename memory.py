@@ -0,0 +1,59 @@
+"""Approximate retained memory of the bot's in-memory state, for deciding which guilds are expensive to keep loaded."""
+
+import sys
+import types
+from enum import Enum
+from typing import Optional
+
+# Shared by everything that references them, so never counted as retained by any one object
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    Enum,
+)
+
+
+def get_deep_size(obj, seen: Optional[set[int]] = None) -> int:
+    """
+    Returns the approximate number of bytes retained by obj: its own size plus the size of every container element
+    and instance attribute reachable from it. Objects already in seen (by id) aren't counted, and everything counted
+    is added to seen, so sizes measured with the same seen set don't double count shared objects.
+    """
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while len(stack):
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, (str, bytes, int, float)):
+            continue
+        else:
+            attrs = getattr(obj, "__dict__", None)
+            if attrs is not None:
+                stack.append(attrs)
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return size
+
+
+def format_bytes(num_bytes: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if num_bytes < 1024:
+            return (
+                f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+            )
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GiB"
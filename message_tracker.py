@@ -1,13 +1,17 @@
+import asyncio
+import hashlib
 import logging
 import re
+from typing import Callable, Optional
 
 from discord.errors import NotFound
 
+import metrics
 from consts import BOT_VERSION, VERSION_KEY
 from utils import (
     HintType,
+    PlayerShowHints,
     SuccessfulHintResult,
-    compose_show_hints_message,
     curtail_message,
     get_hint_types,
     load,
@@ -18,6 +22,16 @@ log = logging.getLogger(__name__)
 
 DEFAULT_HINT_COOLDOWN_SEC = 30 * 60
 
+# Max number of Discord requests (fetches or edits) in flight at once for a single update pass. Rate limits (HTTP
+# 429) are waited out and retried by discord.py's HTTP client.
+MAX_CONCURRENT_REQUESTS = 5
+
+# Max number of messages tracked per player, view and channel. Tracking another evicts the oldest.
+DEFAULT_MAX_MESSAGES_PER_CHANNEL = 3
+# Max number of edits in a single update pass. Any other affected messages are marked stale and refreshed the next
+# time their view is requested.
+DEFAULT_EDIT_BUDGET = 10
+
 
 def message_tracker_filename(guild_id) -> str:
     return f"{guild_id}-message_tracker.json"
@@ -47,13 +61,50 @@ class MessageTracker:
     SHOW_HINTS_KEY = "show-hints"
     SHOW_CHECKS_KEY = "show-checks"
 
-    def __init__(self, guild_id):
+    def __init__(
+        self,
+        guild_id,
+        max_messages_per_channel: int = DEFAULT_MAX_MESSAGES_PER_CHANNEL,
+        edit_budget: int = DEFAULT_EDIT_BUDGET,
+    ):
         self.filename = message_tracker_filename(guild_id)
+        self.max_messages_per_channel = max_messages_per_channel
+        self.edit_budget = edit_budget
+        # Local mirror of the last content posted to each tracked !show-checks message, by message ID, since edits
+        # append to it. Not persisted; contents of messages tracked before a restart are fetched when first needed.
+        self.message_contents: dict[int, str] = {}
+        # Hash of the last content posted to each tracked message, by message ID, to skip edits that change nothing
+        self.content_hashes: dict[int, bytes] = {}
+        # Messages left out of an update pass by the edit budget, as message ID -> channel ID
+        self.stale_messages: dict[int, int] = {}
         try:
             self._init_from_file()
         except FileNotFoundError:
             self.show_hints_messages = {}
             self.show_checks_msgs = {}
+        # Where each tracked message is recorded, as channel ID -> message ID -> (SHOW_HINTS_KEY, player number,
+        # hint type query) or (SHOW_CHECKS_KEY, player number). Lets deletion events prune records directly.
+        self.channel_index: dict[int, dict[int, tuple]] = {}
+        self._build_channel_index()
+
+    def _build_channel_index(self):
+        self.channel_index = {}
+        for player_num, player_data in self.show_hints_messages.items():
+            for hint_type_query, hint_type_data in player_data.items():
+                for channel_id, message_ids in hint_type_data.items():
+                    for message_id in message_ids:
+                        self.channel_index.setdefault(channel_id, {})[message_id] = (
+                            MessageTracker.SHOW_HINTS_KEY,
+                            player_num,
+                            hint_type_query,
+                        )
+        for player_num, player_data in self.show_checks_msgs.items():
+            for channel_id, message_ids in player_data.items():
+                for message_id in message_ids:
+                    self.channel_index.setdefault(channel_id, {})[message_id] = (
+                        MessageTracker.SHOW_CHECKS_KEY,
+                        player_num,
+                    )
 
     def _init_from_file(self):
         data = load(self.filename)
@@ -111,123 +162,308 @@ class MessageTracker:
         store(filedata, self.filename)
 
     def track_show_hints_message(
-        self, player_num: int, hint_type_query: str, channel_id: int, message_id: int
+        self,
+        player_num: int,
+        hint_type_query: str,
+        channel_id: int,
+        message_id: int,
+        content: Optional[str] = None,
     ):
-        self.show_hints_messages.setdefault(player_num, {}).setdefault(
-            hint_type_query, {}
-        ).setdefault(channel_id, []).append(message_id)
+        message_ids = (
+            self.show_hints_messages.setdefault(player_num, {})
+            .setdefault(hint_type_query, {})
+            .setdefault(channel_id, [])
+        )
+        message_ids.append(message_id)
+        self._evict_excess_messages(channel_id, message_ids)
+        self.channel_index.setdefault(channel_id, {})[message_id] = (
+            MessageTracker.SHOW_HINTS_KEY,
+            player_num,
+            hint_type_query,
+        )
+        if content is not None:
+            self.content_hashes[message_id] = _hash_content(content)
         self.save()
 
     def track_show_checks_message(
-        self, player_num: int, channel_id: int, message_id: int
+        self,
+        player_num: int,
+        channel_id: int,
+        message_id: int,
+        content: Optional[str] = None,
     ):
-        self.show_checks_msgs.setdefault(player_num, {}).setdefault(
+        message_ids = self.show_checks_msgs.setdefault(player_num, {}).setdefault(
             channel_id, []
-        ).append(message_id)
+        )
+        message_ids.append(message_id)
+        self._evict_excess_messages(channel_id, message_ids)
+        self.channel_index.setdefault(channel_id, {})[message_id] = (
+            MessageTracker.SHOW_CHECKS_KEY,
+            player_num,
+        )
+        if content is not None:
+            self.message_contents[message_id] = content
+            self.content_hashes[message_id] = _hash_content(content)
         self.save()
 
     def clear_tracked_messages(self):
         self.show_hints_messages = {}
         self.show_checks_msgs = {}
+        self.message_contents = {}
+        self.content_hashes = {}
+        self.stale_messages = {}
+        self.channel_index = {}
         self.save()
 
+    def _evict_excess_messages(self, channel_id: int, message_ids: list[int]):
+        """Stops tracking the oldest of the given messages beyond the per-channel limit."""
+        while len(message_ids) > self.max_messages_per_channel:
+            evicted_id = message_ids.pop(0)
+            self.channel_index.get(channel_id, {}).pop(evicted_id, None)
+            self._forget_message_state(evicted_id)
+
+    def _forget_message_state(self, message_id: int):
+        self.message_contents.pop(message_id, None)
+        self.content_hashes.pop(message_id, None)
+        self.stale_messages.pop(message_id, None)
+
+    def forget_messages(self, channel_id: int, message_ids) -> bool:
+        """
+        Stops tracking the given messages in the channel, e.g. because they were deleted.
+        Returns True if any of them were tracked.
+        """
+        channel_messages = self.channel_index.get(channel_id)
+        if channel_messages is None:
+            return False
+        forgotten = False
+        for message_id in message_ids:
+            location = channel_messages.pop(message_id, None)
+            if location is None:
+                continue
+            forgotten = True
+            self._remove_record(location, channel_id, message_id)
+        if not len(channel_messages):
+            del self.channel_index[channel_id]
+        if forgotten:
+            self.save()
+        return forgotten
+
+    def forget_channel(self, channel_id: int) -> bool:
+        """Stops tracking all messages in the channel, e.g. because it was deleted. Returns True if any were tracked."""
+        return self.forget_messages(
+            channel_id, list(self.channel_index.get(channel_id, {}))
+        )
+
+    def _remove_record(self, location: tuple, channel_id: int, message_id: int):
+        # Find the channel ID -> message IDs map holding the message, and where that map is kept
+        if location[0] == MessageTracker.SHOW_HINTS_KEY:
+            _, player_num, hint_type_query = location
+            parent, key = self.show_hints_messages[player_num], hint_type_query
+        else:
+            _, player_num = location
+            parent, key = self.show_checks_msgs, player_num
+        channel_msgs = parent[key]
+        channel_msgs[channel_id].remove(message_id)
+        if not len(channel_msgs[channel_id]):
+            del channel_msgs[channel_id]
+        if not len(channel_msgs):
+            del parent[key]
+        self._forget_message_state(message_id)
+
     async def edit_messages(
-        self, bot, hint_result: SuccessfulHintResult, player_hint_data: dict
+        self,
+        bot,
+        hint_result: SuccessfulHintResult,
+        player_show_hints: PlayerShowHints,
     ):
         """Updates !show-hint and !show-check responses as needed, given a hint that was just redeemed."""
-        show_hints_messages = self.show_hints_messages.get(hint_result.player_num, {})
-        all_hint_type_msgs = show_hints_messages.get("all", {})
-        single_hint_type_msgs = show_hints_messages.get(str(hint_result.hint_type), {})
-        show_checks_updates_per_player = _get_updates_for_show_checks(
-            hint_result, self.show_checks_msgs.keys()
-        )
+        await self.update_messages(bot, [hint_result], lambda _: player_show_hints)
+
+    @metrics.timed("message_tracker_update_seconds")
+    async def update_messages(
+        self,
+        bot,
+        hint_results: list[SuccessfulHintResult],
+        get_show_hints: Callable[[int], PlayerShowHints],
+    ):
+        """
+        Updates !show-hint and !show-check responses as needed, given hints that were just redeemed, with at most
+        one edit per message. get_show_hints maps a player number to the player's current !show-hints content.
+        """
+        # Each !show-hints view affected by the hints, as (player number, hint type query) -> hint types
+        show_hints_views: dict[tuple[int, str], list[HintType]] = {}
+        show_checks_updates_per_player: dict[int, list[str]] = {}
+        for hint_result in hint_results:
+            show_hints_views[(hint_result.player_num, "all")] = get_hint_types("all")
+            show_hints_views[(hint_result.player_num, str(hint_result.hint_type))] = [
+                hint_result.hint_type
+            ]
+            for player_num, lines in _get_updates_for_show_checks(
+                hint_result, self.show_checks_msgs.keys()
+            ).items():
+                show_checks_updates_per_player.setdefault(player_num, []).extend(lines)
 
-        all_relevant_channel_id_dicts = [all_hint_type_msgs, single_hint_type_msgs]
-        for player_num in show_checks_updates_per_player:
-            all_relevant_channel_id_dicts.append(self.show_checks_msgs[player_num])
-        if all(len(msgs) == 0 for msgs in all_relevant_channel_id_dicts):
-            # This hint doesn't affect any !show-hints or !show-checks messages.
+        # Each affected group of tracked messages, as (dict containing the group, key of the group in that dict,
+        # function mapping a message ID in the group to its new content)
+        updates = []
+        for (player_num, hint_type_query), hint_types in show_hints_views.items():
+            show_hints_messages = self.show_hints_messages.get(player_num, {})
+            if len(show_hints_messages.get(hint_type_query, {})):
+                content = get_show_hints(player_num).compose(hint_types)
+                updates.append(
+                    (show_hints_messages, hint_type_query, lambda _, c=content: c)
+                )
+        for player_num, lines in show_checks_updates_per_player.items():
+            updates.append(
+                (
+                    self.show_checks_msgs,
+                    player_num,
+                    lambda message_id, lines=lines: self._append_to_show_checks(
+                        message_id, lines
+                    ),
+                )
+            )
+        if not len(updates):
+            # These hints don't affect any !show-hints or !show-checks messages.
             return
 
-        # Fetch all messages that need to be updated.
-        fetched_messages = await _get_messages(bot, all_relevant_channel_id_dicts)
-        records_changed = False
+        # !show-checks edits append to the message's existing content. That comes from the local mirror of what
+        # was last posted, so only messages tracked before the mirror knew their content need to be fetched.
+        unknown_show_checks_msgs = [
+            {
+                channel_id: [
+                    message_id
+                    for message_id in message_ids
+                    if message_id not in self.message_contents
+                ]
+                for channel_id, message_ids in self.show_checks_msgs[player_num].items()
+            }
+            for player_num in show_checks_updates_per_player
+        ]
+        if any(any(ids for ids in msgs.values()) for msgs in unknown_show_checks_msgs):
+            fetched_messages = await _get_messages(bot, unknown_show_checks_msgs)
+            for channel_messages in fetched_messages.values():
+                for message_id, message in channel_messages.items():
+                    self.message_contents[message_id] = message.content
+                    self.content_hashes[message_id] = _hash_content(message.content)
 
-        # Update responses to !show-hints all
-        updated_all_hint_type_content = None
-        updated_all_hint_type_msgs = {}
-        for channel_id in all_hint_type_msgs:
-            for message_id in all_hint_type_msgs[channel_id]:
-                message = fetched_messages.get(channel_id, {}).get(message_id)
-                if message is None:
-                    records_changed = True
-                    continue
-                if updated_all_hint_type_content is None:
-                    updated_all_hint_type_content = compose_show_hints_message(
-                        get_hint_types("all"), player_hint_data
-                    )
-                await message.edit(content=updated_all_hint_type_content)
-                updated_all_hint_type_msgs.setdefault(channel_id, []).append(message_id)
-        if len(updated_all_hint_type_msgs):
-            show_hints_messages["all"] = updated_all_hint_type_msgs
-        elif len(all_hint_type_msgs):
-            del show_hints_messages["all"]
-
-        # Update responses to !show-hints [this hint type]
-        updated_single_hint_type_content = None
-        updated_single_hint_type_msgs = {}
-        for channel_id in single_hint_type_msgs:
-            for message_id in single_hint_type_msgs[channel_id]:
-                message = fetched_messages.get(channel_id, {}).get(message_id)
-                if message is None:
-                    records_changed = True
+        edits = []
+        edited = set()
+        skipped_count = 0
+        for records, key, get_content in updates:
+            for channel_id, message_ids in records[key].items():
+                channel = bot.get_channel(channel_id)
+                if channel is None:
+                    # channel deleted
                     continue
-                if updated_single_hint_type_content is None:
-                    updated_single_hint_type_content = compose_show_hints_message(
-                        [hint_result.hint_type], player_hint_data
-                    )
-                await message.edit(content=updated_single_hint_type_content)
-                updated_single_hint_type_msgs.setdefault(channel_id, []).append(
-                    message_id
-                )
-        if len(updated_single_hint_type_msgs):
-            show_hints_messages[str(hint_result.hint_type)] = (
-                updated_single_hint_type_msgs
-            )
-        elif len(single_hint_type_msgs):
-            del show_hints_messages[str(hint_result.hint_type)]
-
-        # Update affected responses to !show-checks
-        for player_num, updates in show_checks_updates_per_player.items():
-            show_checks_msgs = self.show_checks_msgs[player_num]
-            updated_show_checks_msgs = {}
-            for channel_id in show_checks_msgs:
-                for message_id in show_checks_msgs[channel_id]:
-                    message = fetched_messages.get(channel_id, {}).get(message_id)
-                    if message is None:
-                        records_changed = True
+                for message_id in message_ids:
+                    if records is self.show_checks_msgs and (
+                        message_id not in self.message_contents
+                    ):
+                        # message was deleted before it could be fetched
                         continue
-                    existing_content = message.content
-                    if existing_content.startswith("-"):
-                        await message.edit(
-                            content=curtail_message(
-                                existing_content + "\n" + "\n".join(updates)
-                            )
-                        )
+                    content = get_content(message_id)
+                    if self.content_hashes.get(message_id) == _hash_content(content):
+                        # Message already shows this content, e.g. a curtailed message that stays the same
+                        skipped_count += 1
+                        edited.add((channel_id, message_id))
+                        self.stale_messages.pop(message_id, None)
+                        continue
+                    edits.append((channel_id, channel, message_id, content))
+        metrics.increment("message_edits_skipped", skipped_count)
+
+        # Newest messages first (Discord IDs increase over time). The rest are left for a lazy refresh.
+        edits.sort(key=lambda edit: edit[2], reverse=True)
+        for channel_id, _, message_id, content in edits[self.edit_budget :]:
+            self.stale_messages[message_id] = channel_id
+            if message_id in self.message_contents:
+                self.message_contents[message_id] = content
+            edited.add((channel_id, message_id))
+        metrics.increment("message_edits_deferred", len(edits[self.edit_budget :]))
+        edited |= await self._send_edits(edits[: self.edit_budget])
+
+        # Drop records of any messages or channels that were deleted
+        records_changed = False
+        for records, key, _ in updates:
+            updated_msgs = {}
+            for channel_id, message_ids in records[key].items():
+                for message_id in message_ids:
+                    if (channel_id, message_id) in edited:
+                        updated_msgs.setdefault(channel_id, []).append(message_id)
                     else:
-                        await message.edit(content="\n".join(updates))
-                    updated_show_checks_msgs.setdefault(channel_id, []).append(
-                        message_id
-                    )
-            if len(updated_show_checks_msgs):
-                self.show_checks_msgs[player_num] = updated_show_checks_msgs
+                        records_changed = True
+                        self._forget_message_state(message_id)
+            if len(updated_msgs):
+                records[key] = updated_msgs
             else:
-                del self.show_checks_msgs[player_num]
+                del records[key]
 
         # Save if any recorded messages or channels were deleted
         if records_changed:
+            self._build_channel_index()
             self.save()
 
+    async def refresh_stale_messages(
+        self,
+        bot,
+        player_num: int,
+        get_show_hints: Callable[[int], PlayerShowHints],
+    ):
+        """Brings the player's !show-hints and !show-checks messages that were left stale by the edit budget up to date."""
+        edits = []
+        for message_id, channel_id in list(self.stale_messages.items()):
+            location = self.channel_index.get(channel_id, {}).get(message_id)
+            if location is None or location[1] != player_num:
+                continue
+            channel = bot.get_channel(channel_id)
+            if channel is None:
+                self.forget_channel(channel_id)
+                continue
+            if location[0] == MessageTracker.SHOW_HINTS_KEY:
+                content = get_show_hints(player_num).compose(
+                    get_hint_types(location[2])
+                )
+            else:
+                content = self.message_contents[message_id]
+            edits.append((channel_id, channel, message_id, content))
+        edited = await self._send_edits(edits)
+        for channel_id, _, message_id, _ in edits:
+            if (channel_id, message_id) not in edited:
+                self.forget_messages(channel_id, [message_id])
+
+    async def _send_edits(self, edits: list[tuple]) -> set[tuple[int, int]]:
+        """
+        Sends (channel ID, channel, message ID, content) edits concurrently, through partial messages, which needs
+        no fetch. Returns (channel ID, message ID) of the edited messages; the others were deleted.
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        edit_results = await asyncio.gather(
+            *(
+                _edit_message(semaphore, channel, message_id, content)
+                for _, channel, message_id, content in edits
+            )
+        )
+        edited = set()
+        for (channel_id, _, message_id, _), content in zip(edits, edit_results):
+            if content is not None:
+                edited.add((channel_id, message_id))
+                self.content_hashes[message_id] = _hash_content(content)
+                self.stale_messages.pop(message_id, None)
+                if message_id in self.message_contents:
+                    self.message_contents[message_id] = content
+        metrics.increment("message_edits", len(edits))
+        return edited
+
+    def _append_to_show_checks(self, message_id: int, lines: list[str]) -> str:
+        existing_content = self.message_contents[message_id]
+        if existing_content.startswith("-"):
+            return curtail_message(existing_content + "\n" + "\n".join(lines))
+        return "\n".join(lines)
+
+
+def _hash_content(content: str) -> bytes:
+    return hashlib.blake2b(content.encode(), digest_size=16).digest()
+
 
 async def _get_messages(bot, channel_id_maps: list[dict[int, list[int]]]):
     """
@@ -235,7 +471,7 @@ async def _get_messages(bot, channel_id_maps: list[dict[int, list[int]]]):
     Returns dict of channel ID -> message ID -> message, including only and all valid messages in the given dicts.
     """
     channels = {}
-    messages = {}
+    to_fetch = []
     for channels_to_message_ids in channel_id_maps:
         for channel_id in channels_to_message_ids:
             # Find channel
@@ -247,19 +483,42 @@ async def _get_messages(bot, channel_id_maps: list[dict[int, list[int]]]):
                     # channel deleted
                     continue
                 channels[channel_id] = channel
+            to_fetch += [
+                (channel_id, channel, message_id)
+                for message_id in channels_to_message_ids[channel_id]
+            ]
 
-            # Find messages in this channel
-            for message_id in channels_to_message_ids[channel_id]:
-                try:
-                    message = await channel.fetch_message(message_id)
-                except NotFound:
-                    # message was deleted
-                    continue
-                messages.setdefault(channel_id, {})[message_id] = message
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def fetch(channel, message_id):
+        try:
+            async with semaphore:
+                return await channel.fetch_message(message_id)
+        except NotFound:
+            # message was deleted
+            return None
 
+    fetched = await asyncio.gather(*(fetch(c, m_id) for _, c, m_id in to_fetch))
+    messages = {}
+    for (channel_id, _, message_id), message in zip(to_fetch, fetched):
+        if message is not None:
+            messages.setdefault(channel_id, {})[message_id] = message
     return messages
 
 
+async def _edit_message(
+    semaphore: asyncio.Semaphore, channel, message_id: int, content: str
+) -> Optional[str]:
+    """Edits the message via a partial message handle. Returns the new content, or None if the message is gone."""
+    message = channel.get_partial_message(message_id)
+    try:
+        async with semaphore:
+            await message.edit(content=content)
+    except NotFound:
+        return None
+    return content
+
+
 def _get_updates_for_show_checks(
     hint_result: SuccessfulHintResult, relevant_players
 ) -> dict[int, list[str]]:
@@ -0,0 +1,264 @@
+"""Process-wide counters and latency histograms for instrumenting the bot."""
+
+import contextvars
+import functools
+import inspect
+import os
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Optional
+
+# Event loop stalls listed by !bot-stats
+MAX_RECENT_STALLS = 5
+# Upper bounds in seconds of the latency histogram buckets, besides +Inf
+LATENCY_BUCKETS_SEC = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Name of the command being run in the current task, for attributing Discord requests and disk writes to it.
+# Tasks started by a command (e.g. tracked message updates) inherit it.
+current_command: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_command", default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_SEC):
+        self.buckets = buckets
+        # Observations per bucket (not cumulative), with one more bucket for anything above the last bound
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.bucket_counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimates the q quantile as the upper bound of the bucket it falls in. Returns inf if it's above them all."""
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def metric_key(name: str, labels: Optional[dict[str, str]] = None) -> str:
+    """Key for a metric with labels, in Prometheus format, e.g. command_seconds{command="hint"}"""
+    if not labels:
+        return name
+    label_str = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f"{name}{{{label_str}}}"
+
+
+def split_metric_key(key: str) -> tuple[str, str]:
+    """Splits a metric key into its name and label string, including braces (or empty if unlabeled)."""
+    name, brace, label_str = key.partition("{")
+    return name, brace + label_str
+
+
+counters: Counter[str] = Counter()
+gauges: dict[str, float] = {}
+histograms: dict[str, Histogram] = {}
+# (duration in seconds, blocking code location) of the latest event loop stalls
+recent_stalls: deque[tuple[float, str]] = deque(maxlen=MAX_RECENT_STALLS)
+
+
+def increment(name: str, amount: int = 1, labels: Optional[dict[str, str]] = None):
+    counters[metric_key(name, labels)] += amount
+
+
+def increment_for_command(name: str, amount: int = 1):
+    """Increments the counter, labeled with the current command if there is one."""
+    command = current_command.get()
+    increment(name, amount, {"command": command} if command else None)
+
+
+def set_gauge(name: str, value: float, labels: Optional[dict[str, str]] = None):
+    gauges[metric_key(name, labels)] = value
+
+
+def clear_gauges(name: str):
+    """Removes every labeled value of the gauge, e.g. for guilds no longer loaded."""
+    for key in [key for key in gauges if split_metric_key(key)[0] == name]:
+        del gauges[key]
+
+
+def observe(name: str, value: float, labels: Optional[dict[str, str]] = None):
+    key = metric_key(name, labels)
+    if key not in histograms:
+        histograms[key] = Histogram()
+    histograms[key].observe(value)
+
+
+@contextmanager
+def timer(name: str, labels: Optional[dict[str, str]] = None):
+    """Observes how long the with block takes in the given histogram, in seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, labels)
+
+
+def timed(name: str):
+    """Decorator observing how long each call to a function or coroutine function takes."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timer(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_stall(duration_sec: float, location: str):
+    observe("event_loop_stall_seconds", duration_sec)
+    recent_stalls.append((duration_sec, location))
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    increment(
+        "cache_hits_total" if hit else "cache_misses_total", labels={"cache": cache}
+    )
+
+
+def get_cache_hit_rates() -> dict[str, tuple[float, int]]:
+    """Returns cache name -> (hit rate, lookups) for every cache with lookups."""
+    lookups = {}
+    for key, count in counters.items():
+        name, label_str = split_metric_key(key)
+        if name in ("cache_hits_total", "cache_misses_total"):
+            cache = label_str.split('"')[1]
+            hits, total = lookups.get(cache, (0, 0))
+            lookups[cache] = (
+                hits + (count if name == "cache_hits_total" else 0),
+                total + count,
+            )
+    return {cache: (hits / total, total) for cache, (hits, total) in lookups.items()}
+
+
+def to_prometheus_text() -> str:
+    """Returns every metric in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+    for key, value in sorted(counters.items()):
+        name, _ = split_metric_key(key)
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{key} {value}")
+    for key, value in sorted(gauges.items()):
+        name, _ = split_metric_key(key)
+        if name not in typed:
+            lines.append(f"# TYPE {name} gauge")
+            typed.add(name)
+        lines.append(f"{key} {value}")
+    for key, histogram in sorted(histograms.items()):
+        name, label_str = split_metric_key(key)
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        labels = label_str[1:-1]
+        cumulative = 0
+        for bound, bucket_count in zip(
+            histogram.buckets + (float("inf"),), histogram.bucket_counts
+        ):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            bucket_labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+            lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+        lines.append(f"{name}_sum{label_str} {histogram.sum}")
+        lines.append(f"{name}_count{label_str} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_file(filename: str):
+    """Writes metrics to the file atomically, so a scraper never reads a partial file."""
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "w") as f:
+        f.write(to_prometheus_text())
+    os.replace(tmp_filename, filename)
+
+
+def count_discord_requests(http):
+    """Wraps a discord.py HTTPClient so every REST request it makes is counted, per command."""
+    request = http.request
+
+    @functools.wraps(request)
+    async def counted_request(*args, **kwargs):
+        increment_for_command("discord_requests_total")
+        return await request(*args, **kwargs)
+
+    http.request = counted_request
+
+
+def compose_stats_message() -> str:
+    """Summarizes command latency, Discord requests, disk writes and cache hit rates for !bot-stats."""
+    lines = ["**Commands:** count, p50/p99 latency (bucket bounds), Discord requests"]
+    for key, histogram in sorted(histograms.items()):
+        name, label_str = split_metric_key(key)
+        if name != "command_seconds":
+            continue
+        requests = counters.get(metric_key("discord_requests_total") + label_str, 0)
+        lines.append(
+            f"- {label_str.split('"')[1]}: {histogram.count}, "
+            + f"{_format_sec(histogram.quantile(0.5))}/{_format_sec(histogram.quantile(0.99))}, "
+            + f"{requests}"
+        )
+    for name in ("handle_spoiler_log_seconds", "message_tracker_update_seconds"):
+        histogram = histograms.get(name)
+        if histogram is not None:
+            lines.append(
+                f"**{name.removesuffix('_seconds')}:** {histogram.count} calls, "
+                + f"{_format_sec(histogram.sum / histogram.count)} mean"
+            )
+    total_requests = sum(
+        count
+        for key, count in counters.items()
+        if split_metric_key(key)[0] == "discord_requests_total"
+    )
+    bytes_written = sum(
+        count
+        for key, count in counters.items()
+        if split_metric_key(key)[0] == "disk_bytes_written_total"
+    )
+    lines.append(f"**Discord requests:** {total_requests}")
+    lines.append(f"**Disk written:** {bytes_written / 1024:.1f} KiB")
+    stall_histogram = histograms.get("event_loop_stall_seconds")
+    if stall_histogram is not None:
+        lines.append(
+            f"**Event loop stalls:** {stall_histogram.count}, "
+            + f"{stall_histogram.sum:.2f}s total. Latest:"
+        )
+        for duration_sec, location in recent_stalls:
+            lines.append(f"- {duration_sec:.2f}s in {location or 'unknown'}")
+    cache_hit_rates = get_cache_hit_rates()
+    if len(cache_hit_rates):
+        lines.append("**Cache hit rates:**")
+        for cache, (hit_rate, lookups) in sorted(cache_hit_rates.items()):
+            lines.append(f"- {cache}: {hit_rate:.0%} of {lookups}")
+    return "\n".join(lines)
+
+
+def _format_sec(sec: float) -> str:
+    if sec == float("inf"):
+        return f">{LATENCY_BUCKETS_SEC[-1]}s"
+    return f"{sec * 1000:g}ms" if sec < 1 else f"{sec:g}s"
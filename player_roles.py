@@ -0,0 +1,85 @@
+import logging
+import re
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+player_re = re.compile(r"^@?player ?([1-9]\d*)$")  # player14, @Player14
+
+
+def get_player_num_from_roles(roles) -> int:
+    """Infers player number from @playerN roles. Raises ValueError if there isn't exactly one such role."""
+    player_num = None
+    for role in roles:
+        match = player_re.search(role.name.lower())
+        if match:
+            if player_num is not None:
+                raise ValueError(
+                    f"You have multiple player roles. Please specify player number."
+                )
+            player_num = int(match.group(1))
+    if player_num is None:
+        raise ValueError(
+            "Unable to infer player number from your roles. Please specify your player number."
+        )
+    return player_num
+
+
+class PlayerRoleCache:
+    """
+    Caches the player number inferred from each member's @playerN role, so the roles only need to be parsed when
+    they change. Entries are keyed on the member's ID and kept up to date by member and role events, which
+    update_member and update_role handle. Also indexes members by player number.
+    """
+
+    def __init__(self):
+        # member ID -> (role IDs, inferred player number or error message)
+        self.members: dict[int, tuple[frozenset[int], int | str]] = {}
+        # player number -> IDs of members whose roles say they're that player
+        self.players: dict[int, set[int]] = {}
+
+    def get_player_num(self, member) -> int:
+        """Returns the member's player number from their roles. Raises ValueError if it can't be inferred."""
+        cached = self.members.get(member.id)
+        metrics.record_cache_lookup("player_roles", cached is not None)
+        result = cached[1] if cached is not None else self.update_member(member)
+        if isinstance(result, str):
+            raise ValueError(result)
+        return result
+
+    def get_members(self, player_num: int) -> set[int]:
+        """Returns IDs of cached members with the given player number."""
+        return self.players.get(player_num, set())
+
+    def update_member(self, member) -> int | str:
+        """Infers the member's player number from their roles. Returns it, or why it couldn't be inferred."""
+        try:
+            result = get_player_num_from_roles(member.roles)
+        except ValueError as e:
+            result = e.args[0]
+        self.forget_member(member.id)
+        self.members[member.id] = (frozenset(role.id for role in member.roles), result)
+        if not isinstance(result, str):
+            self.players.setdefault(result, set()).add(member.id)
+        return result
+
+    def update_role(self, role):
+        """Infers the player numbers of the role's members again, e.g. because it was renamed."""
+        self.forget_role(role.id)
+        for member in role.members:
+            self.update_member(member)
+
+    def forget_member(self, member_id: int):
+        cached = self.members.pop(member_id, None)
+        if cached is not None and not isinstance(cached[1], str):
+            members = self.players[cached[1]]
+            members.discard(member_id)
+            if not len(members):
+                del self.players[cached[1]]
+
+    def forget_role(self, role_id: int):
+        """Drops cached entries for members with the role, e.g. because it was deleted."""
+        for member_id, (role_ids, _) in list(self.members.items()):
+            if role_id in role_ids:
+                self.forget_member(member_id)
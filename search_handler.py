@@ -1,10 +1,17 @@
+from typing import Optional
+
+from area_index import AreaIndex
 from checks import Checks
 from entrances import Entrances
 from item_locations import ItemLocations
 
 
 def get_search_response(
-    query: str, item_locations: ItemLocations, checks: Checks, entrances: Entrances
+    query: str,
+    item_locations: ItemLocations,
+    checks: Checks,
+    entrances: Entrances,
+    areas: Optional[AreaIndex] = None,
 ):
     try:
         matching_items = item_locations.find_matches(query)
@@ -22,7 +29,14 @@ def get_search_response(
         # Entrances may be empty if not randomized
         matching_locs = []
 
-    if not len(matching_items) and not len(matching_checks) and not len(matching_locs):
+    matching_areas = areas.find_matches(query) if areas is not None else []
+
+    if (
+        not len(matching_items)
+        and not len(matching_checks)
+        and not len(matching_locs)
+        and not len(matching_areas)
+    ):
         return "No matching items, checks, or entrances."
     response = ""
     if len(matching_items):
@@ -31,4 +45,6 @@ def get_search_response(
         response += f"**Checks:** {', '.join(matching_checks)}\n"
     if len(matching_locs):
         response += f"**Locations:** {', '.join(matching_locs)}\n"
+    if len(matching_areas):
+        response += f"**Areas:** {', '.join(matching_areas)}\n"
     return response
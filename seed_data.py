@@ -0,0 +1,76 @@
+"""Hint data shared by every guild running the same seed, e.g. one multiworld hosted across several servers."""
+
+import hashlib
+import weakref
+from typing import Optional
+
+import metrics
+from memory import get_deep_size
+from utils import HintType
+
+
+class SeedData:
+    """
+    One hint type's items and aliases for one seed. Never modified once created, so every guild whose hint data file
+    has the same content shares one instance. It's freed once no loaded guild references it.
+    """
+
+    def __init__(self, items: dict[str, dict], aliases: dict[str, str]):
+        self.items = items
+        self.aliases = aliases
+        # (items bytes, aliases bytes), measured on first use
+        self._memory_size: Optional[tuple[int, int]] = None
+
+    def get_memory_size(self) -> tuple[int, int]:
+        """Returns the approximate bytes retained by items and by the aliases not shared with items."""
+        if self._memory_size is None:
+            seen = set()
+            self._memory_size = (
+                get_deep_size(self.items, seen),
+                get_deep_size(self.aliases, seen),
+            )
+        return self._memory_size
+
+
+# Content key -> seed data, for seed data still referenced by a loaded guild
+_shared_seed_data: weakref.WeakValueDictionary[str, SeedData] = (
+    weakref.WeakValueDictionary()
+)
+
+
+# Only turned off to measure what sharing saves, e.g. by bench/memory_bench.py --no-sharing
+_sharing_enabled = True
+
+
+def set_sharing_enabled(enabled: bool):
+    global _sharing_enabled
+    _sharing_enabled = enabled
+
+
+def get_content_key(hint_type: HintType, content: str) -> str:
+    """Returns the key identifying seed data by its hint type and serialized content."""
+    return f"{hint_type}-{hashlib.sha256(content.encode()).hexdigest()}"
+
+
+def get_shared(key: str) -> Optional[SeedData]:
+    if not _sharing_enabled:
+        return None
+    seed_data = _shared_seed_data.get(key)
+    metrics.record_cache_lookup("seed_data", seed_data is not None)
+    return seed_data
+
+
+def share(key: str, seed_data: SeedData) -> SeedData:
+    """Returns the seed data already shared under the key, or shares the given seed data under it if there's none."""
+    if not _sharing_enabled:
+        return seed_data
+    return _shared_seed_data.setdefault(key, seed_data)
+
+
+def get_shared_count() -> int:
+    return len(_shared_seed_data)
+
+
+def clear_shared():
+    """Stops sharing all seed data, so the next guild to load each seed parses its file, e.g. for benchmarks."""
+    _shared_seed_data.clear()
@@ -0,0 +1,215 @@
+import itertools
+import logging
+from array import array
+from typing import Optional
+
+from consts import BOT_VERSION, VERSION_KEY
+from hint_times import HintTimes
+from utils import HintType, curtail_message, load, store
+
+log = logging.getLogger(__name__)
+
+
+# Unsigned 32-bit counts. 16 bits ("H") would wrap past 65535 copies of an item in one world for one player.
+COUNT_TYPECODE = "I"
+
+
+def seed_stats_filename(guild_id) -> str:
+    return f"{guild_id}-seed-stats.json"
+
+
+class SeedStats:
+    """
+    Counts of hintable items by item, world holding them and player receiving them, built at ingest so !seed-stats
+    answers aggregate questions without scanning item locations. Item names are only kept as keys for decoding.
+    """
+
+    PLAYER_COUNT_KEY = "players"
+    ITEM_KEYS_KEY = "items"
+    COUNTS_KEY = "counts"
+    """
+    Serialized structure:
+    {
+        VERSION_KEY: BOT_VERSION,
+        PLAYER_COUNT_KEY: 2,
+        ITEM_KEYS_KEY: ["item key", ...],
+        COUNTS_KEY: [
+            # Nonzero counts only
+            [index, count],
+            ...
+        ]
+    }
+    """
+
+    def __init__(
+        self,
+        guild_id,
+        player_count: int = 0,
+        item_keys: Optional[list[str]] = None,
+        counts: Optional[array] = None,
+        save: bool = True,
+    ):
+        """
+        Creates seed stats from item counts if given, saving them unless save is False. counts is indexed by
+        get_index. Otherwise, stats are populated from existing file (or empty if no file exists).
+        """
+        self.filename = seed_stats_filename(guild_id)
+        if item_keys is not None:
+            self.player_count = player_count
+            self.item_keys = item_keys
+            self.counts = counts
+            if save:
+                self.save()
+        else:
+            try:
+                self._load_from_file()
+            except FileNotFoundError:
+                self.player_count, self.item_keys = 0, []
+                self.counts = array(COUNT_TYPECODE)
+
+        # Reductions over items, indexed by world * player_count + receiver. Each is one strided slice of the counts,
+        # reduced by sum() or count() in C, so building them takes player_count**2 reductions rather than a Python
+        # step per count.
+        cell_count = self.player_count**2
+        cells = [self.counts[cell::cell_count] for cell in range(cell_count)]
+        self.world_receiver_counts = array(COUNT_TYPECODE, map(sum, cells))
+        self.world_receiver_distinct = array(
+            COUNT_TYPECODE, (len(self.item_keys) - cell.count(0) for cell in cells)
+        )
+        # Reductions over the other player dimension, indexed by world and by receiver
+        player_count = self.player_count
+        self.world_counts = array(
+            COUNT_TYPECODE,
+            (
+                sum(self.get_receiver_counts(world))
+                for world in range(1, player_count + 1)
+            ),
+        )
+        self.receiver_counts = array(
+            COUNT_TYPECODE,
+            (
+                sum(self.get_world_counts(receiver))
+                for receiver in range(1, player_count + 1)
+            ),
+        )
+
+    @staticmethod
+    def get_empty_counts(item_count: int, player_count: int) -> array:
+        """Returns zeroed counts for the given number of items, indexed by get_index."""
+        return array(COUNT_TYPECODE, [0]) * (item_count * player_count**2)
+
+    @staticmethod
+    def get_index(player_count: int, item: int, world: int, receiver: int) -> int:
+        """Index of an item count given the item's index in item_keys and 0-based world and receiver numbers."""
+        return (item * player_count + world) * player_count + receiver
+
+    def get_count(self, world: int, receiver: int) -> tuple[int, int]:
+        """Returns (items, distinct items) in the world for the receiving player, both 1-based."""
+        cell = (world - 1) * self.player_count + receiver - 1
+        return self.world_receiver_counts[cell], self.world_receiver_distinct[cell]
+
+    def get_world_counts(self, receiver: int) -> list[int]:
+        """Returns the number of the player's items in each world."""
+        return self.world_receiver_counts[receiver - 1 :: self.player_count].tolist()
+
+    def get_receiver_counts(self, world: int) -> list[int]:
+        """Returns the number of items in the world for each player."""
+        start = (world - 1) * self.player_count
+        return self.world_receiver_counts[start : start + self.player_count].tolist()
+
+    def _load_from_file(self):
+        data = load(self.filename)
+        data_version = data.get(VERSION_KEY)
+        if data_version != BOT_VERSION:
+            # Data in file is outdated or corrupt. If it's a known old version, use it; otherwise ignore it.
+            log.info(f"No protocol for updating seed stats with version {data_version}")
+            raise FileNotFoundError
+        self.player_count = data[SeedStats.PLAYER_COUNT_KEY]
+        self.item_keys = data[SeedStats.ITEM_KEYS_KEY]
+        self.counts = SeedStats.get_counts_from_filedata(data)
+
+    @staticmethod
+    def get_counts_from_filedata(data: dict) -> array:
+        """Returns the counts array from serialized seed stats."""
+        player_count = data[SeedStats.PLAYER_COUNT_KEY]
+        counts = SeedStats.get_empty_counts(
+            len(data[SeedStats.ITEM_KEYS_KEY]), player_count
+        )
+        for index, item_count in data[SeedStats.COUNTS_KEY]:
+            counts[index] = item_count
+        return counts
+
+    def _get_filedata(self):
+        return {
+            VERSION_KEY: BOT_VERSION,
+            SeedStats.PLAYER_COUNT_KEY: self.player_count,
+            SeedStats.ITEM_KEYS_KEY: self.item_keys,
+            # Indices and values of nonzero counts, picked out in C by compress() and filter()
+            SeedStats.COUNTS_KEY: list(
+                map(
+                    list,
+                    zip(
+                        itertools.compress(itertools.count(), self.counts),
+                        filter(None, self.counts),
+                    ),
+                )
+            ),
+        }
+
+    def save(self):
+        store(self._get_filedata(), self.filename)
+
+
+def get_seed_stats_response(
+    player: Optional[int],
+    world: Optional[int],
+    seed_stats: SeedStats,
+    hint_times: HintTimes,
+) -> str:
+    """
+    Summarizes where hintable items are: by world overall, by world for a player, by player for a world, or for one
+    player in one world. Item names are only shown for redeemed hints.
+    """
+    if not seed_stats.player_count:
+        return "No seed stats are currently stored. (Use !set-log to upload a spoiler log.)"
+    for number in (player, world):
+        if number is not None and not 1 <= number <= seed_stats.player_count:
+            return f"Invalid player number {number}."
+
+    if player is not None and world is not None:
+        count, distinct = seed_stats.get_count(world, player)
+        response = f"World {world} holds {count} of player {player}'s hintable items ({distinct} different)."
+        world_prefix = f"World {world} "
+        hinted_items = [
+            item
+            for item, results in hint_times.past_hints.get(player, {})
+            .get(HintType.ITEM, {})
+            .items()
+            if any(result.startswith(world_prefix) for result in results)
+        ]
+        if len(hinted_items):
+            response += f"\nRedeemed hints there: {", ".join(hinted_items)}"
+        return curtail_message(response)
+
+    if player is not None:
+        counts = seed_stats.get_world_counts(player)
+        total = seed_stats.receiver_counts[player - 1]
+        lines = [f"**Player {player}'s {total} hintable items by world:**"]
+        label = "World"
+    elif world is not None:
+        counts = seed_stats.get_receiver_counts(world)
+        total = seed_stats.world_counts[world - 1]
+        lines = [f"**World {world}'s {total} hintable items by player:**"]
+        label = "Player"
+    else:
+        lines = ["**Hintable items by world:** total, for the world's own player"]
+        for world in range(1, seed_stats.player_count + 1):
+            own, _ = seed_stats.get_count(world, world)
+            lines.append(
+                f"- World {world}: {seed_stats.world_counts[world - 1]}, {own}"
+            )
+        return curtail_message("\n".join(lines))
+
+    ranked = sorted(enumerate(counts, 1), key=lambda item: item[1], reverse=True)
+    lines += [f"- {label} {number}: {count}" for number, count in ranked if count]
+    return curtail_message("\n".join(lines))
@@ -0,0 +1,210 @@
+import logging
+import re
+import time
+from typing import Optional
+
+from area_index import AreaIndex
+from checks import Checks
+from consts import BOT_VERSION, VERSION_KEY
+from entrances import Entrances
+from item_locations import ItemLocations
+from seed_stats import SeedStats
+from utils import HintType, curtail_message, intern_strings, load, store
+
+log = logging.getLogger(__name__)
+
+snapshot_name_re = re.compile(r"^[a-z0-9][a-z0-9-]{0,31}$")  # e.g. weekly-mw-3
+
+
+def snapshot_archive_filename(guild_id) -> str:
+    return f"{guild_id}-snapshots.json"
+
+
+def snapshot_filename(guild_id, name: str) -> str:
+    return f"{guild_id}-snapshot-{name}.json"
+
+
+class SnapshotArchive:
+    """
+    Index of the seeds a guild has played. Each seed switched away from is kept in one snapshot file holding its
+    parsed hint data, seed stats, areas and past hints, so switching back is a single file load instead of
+    re-uploading and re-parsing its spoiler log.
+    """
+
+    ACTIVE_KEY = "active"
+    SNAPSHOTS_KEY = "snapshots"
+    CREATED_KEY = "created"
+    PLAYER_COUNT_KEY = "players"
+    HINT_COUNT_KEY = "hints"
+    """
+    Serialized structure:
+    {
+        VERSION_KEY: BOT_VERSION,
+        ACTIVE_KEY: "name of the seed in play, or null if it was uploaded before snapshots existed",
+        SNAPSHOTS_KEY: {
+            "name": {
+                CREATED_KEY: timestamp the seed's log was uploaded,
+                PLAYER_COUNT_KEY: 2,
+                HINT_COUNT_KEY: past hints when it was last archived,
+            },
+            ...
+        }
+    }
+    """
+
+    SEED_STATS_KEY = "seed stats"
+    AREAS_KEY = "areas"
+    PAST_HINTS_KEY = "past hints"
+    """
+    Serialized structure of each snapshot file:
+    {
+        VERSION_KEY: BOT_VERSION,
+        str(HintType.ITEM): HintData.DATA_KEY contents of item locations,
+        str(HintType.CHECK): HintData.DATA_KEY contents of checks,
+        str(HintType.ENTRANCE): HintData.DATA_KEY contents of entrances,
+        SEED_STATS_KEY: SeedStats file data,
+        AREAS_KEY: AreaIndex.DATA_KEY contents,
+        PAST_HINTS_KEY: HintTimes.PAST_HINTS_KEY contents
+    }
+    """
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.filename = snapshot_archive_filename(guild_id)
+        try:
+            self._load_from_file()
+        except FileNotFoundError:
+            self.active: Optional[str] = None
+            self.snapshots: dict[str, dict] = {}
+
+    def get_new_name(self, reserved_name: Optional[str] = None) -> str:
+        """Returns the first unused name of the form seed-N, other than reserved_name."""
+        n = len(self.snapshots) + 1
+        while f"seed-{n}" in self.snapshots or f"seed-{n}" == reserved_name:
+            n += 1
+        return f"seed-{n}"
+
+    def validate_new_name(self, name: str):
+        """Raises ValueError if the name is invalid or taken by an archived seed."""
+        if not snapshot_name_re.match(name):
+            raise ValueError(
+                f"Invalid snapshot name {name}. Use up to 32 lowercase letters, numbers and dashes."
+            )
+        if name in self.snapshots and name != self.active:
+            raise ValueError(
+                f"Snapshot {name} already exists. Use !use-snapshot {name} to switch to it."
+            )
+
+    def add(self, name: str, player_count: int):
+        """Records a newly uploaded seed under the name, as the one in play."""
+        self.snapshots[name] = {
+            SnapshotArchive.CREATED_KEY: int(time.time()),
+            SnapshotArchive.PLAYER_COUNT_KEY: player_count,
+            SnapshotArchive.HINT_COUNT_KEY: 0,
+        }
+        self.set_active(name)
+
+    def set_active(self, name: str):
+        self.active = name
+        self.save()
+
+    def archive(self, g, reserved_name: Optional[str] = None) -> Optional[str]:
+        """
+        Stores the guild's current seed and past hints as a snapshot, under the active seed's name (or a new one
+        other than reserved_name if it has none). Returns the snapshot's name, or None if the guild has no seed to
+        archive.
+        """
+        if not any(len(g.get_hint_data(ht).items) for ht in HintType):
+            return None
+        if self.active is None:
+            self.add(self.get_new_name(reserved_name), g.seed_stats.player_count)
+
+        past_hints = g.hint_times.get_serialized_past_hints()
+        data = {
+            VERSION_KEY: BOT_VERSION,
+            SnapshotArchive.SEED_STATS_KEY: g.seed_stats._get_filedata(),
+            SnapshotArchive.AREAS_KEY: g.areas.areas,
+            SnapshotArchive.PAST_HINTS_KEY: past_hints,
+        }
+        for ht in HintType:
+            data[str(ht)] = g.get_hint_data(ht).items
+        store(data, snapshot_filename(self.guild_id, self.active))
+        self.snapshots[self.active][SnapshotArchive.HINT_COUNT_KEY] = sum(
+            len(hints)
+            for player_hints in past_hints.values()
+            for hints in player_hints.values()
+        )
+        self.save()
+        return self.active
+
+    def restore(
+        self, name: str
+    ) -> tuple[ItemLocations, Checks, Entrances, SeedStats, AreaIndex, dict]:
+        """
+        Loads the named snapshot into the guild's files. Returns its hint data, seed stats and areas, along with its
+        past hints serialized for HintTimes.restore_past_hints.
+        Raises FileNotFoundError if there's no such snapshot, and ValueError if it was stored by another bot version.
+        """
+        if name not in self.snapshots:
+            raise FileNotFoundError
+        data = load(snapshot_filename(self.guild_id, name))
+        data_version = data.get(VERSION_KEY)
+        if data_version != BOT_VERSION:
+            # If it's a known old version, use it; otherwise the log must be uploaded again.
+            log.info(f"No protocol for restoring snapshot with version {data_version}")
+            raise ValueError(
+                f"Snapshot {name} is from an older version of the bot. Please upload its spoiler log again."
+            )
+
+        seed_stats_data = data[SnapshotArchive.SEED_STATS_KEY]
+        return (
+            ItemLocations(self.guild_id, intern_strings(data[str(HintType.ITEM)])),
+            Checks(self.guild_id, intern_strings(data[str(HintType.CHECK)])),
+            Entrances(self.guild_id, intern_strings(data[str(HintType.ENTRANCE)])),
+            SeedStats(
+                self.guild_id,
+                seed_stats_data[SeedStats.PLAYER_COUNT_KEY],
+                seed_stats_data[SeedStats.ITEM_KEYS_KEY],
+                SeedStats.get_counts_from_filedata(seed_stats_data),
+            ),
+            AreaIndex(self.guild_id, intern_strings(data[SnapshotArchive.AREAS_KEY])),
+            data[SnapshotArchive.PAST_HINTS_KEY],
+        )
+
+    def _load_from_file(self):
+        data = load(self.filename)
+        data_version = data.get(VERSION_KEY)
+        if data_version != BOT_VERSION:
+            # Data in file is outdated or corrupt. If it's a known old version, use it; otherwise ignore it.
+            log.info(f"No protocol for snapshot archive with version {data_version}")
+            raise FileNotFoundError
+        self.active = data[SnapshotArchive.ACTIVE_KEY]
+        self.snapshots = data[SnapshotArchive.SNAPSHOTS_KEY]
+
+    def _get_filedata(self):
+        return {
+            VERSION_KEY: BOT_VERSION,
+            SnapshotArchive.ACTIVE_KEY: self.active,
+            SnapshotArchive.SNAPSHOTS_KEY: self.snapshots,
+        }
+
+    def save(self):
+        store(self._get_filedata(), self.filename)
+
+
+def get_snapshots_response(archive: SnapshotArchive) -> str:
+    if not len(archive.snapshots):
+        return "No seeds are archived yet. (Each log uploaded with !set-log is kept as a snapshot.)"
+    lines = ["**Seed snapshots:**"]
+    for name, snapshot in sorted(
+        archive.snapshots.items(),
+        key=lambda item: item[1][SnapshotArchive.CREATED_KEY],
+    ):
+        uploaded = f"<t:{snapshot[SnapshotArchive.CREATED_KEY]}:d>"
+        line = f"- {name}: {snapshot[SnapshotArchive.PLAYER_COUNT_KEY]} players, uploaded {uploaded}"
+        if name == archive.active:
+            line += " **(active)**"
+        else:
+            line += f", {snapshot[SnapshotArchive.HINT_COUNT_KEY]} hints"
+        lines.append(line)
+    return curtail_message("\n".join(lines))
@@ -1,14 +1,19 @@
 import logging
 import re
+import time
+from collections import Counter
 from enum import Enum
 from typing import List
 
+import metrics
+from area_index import AreaIndex
 from checks import Checks
 from consts import IGNORED_ITEMS, LOCATION_NAME_REFORMATS
 from entrances import Entrances
 from hint_data import HintData
 from item_locations import ItemLocations
-from utils import canonicalize
+from seed_stats import SeedStats
+from utils import canonicalize, curtail_message, get_interner
 
 log = logging.getLogger(__name__)
 
@@ -28,6 +33,9 @@ area_re = re.compile(r"^ +([^ ].+) \(\d+\):$")  # Tingle (6):
 # MM Woodfall Entrance Chest: Player 7 Postman's Hat
 loc_re = re.compile(r"^ {6}(MM|OOT) (.+): Player (\d+) ([^\n]+)$")
 
+# Distinct unrecognized lines shown to admins; the rest are only counted
+MAX_UNPARSED_LINES_SHOWN = 10
+
 
 class SpoilerStep(Enum):
     FIND_PLAYER_COUNT = 1
@@ -40,17 +48,101 @@ class SpoilerStep(Enum):
         return self.value
 
 
+# Name of the ingest phase each step's lines are timed under
+STEP_PHASES = {
+    SpoilerStep.FIND_PLAYER_COUNT: "player count",
+    SpoilerStep.FIND_ENTRANCES_OR_LOCATIONS: "other sections",
+    SpoilerStep.PROCESS_ENTRANCES: "entrances",
+    SpoilerStep.FIND_LOCATIONS: "other sections",
+    SpoilerStep.PROCESS_LOCATIONS: "locations",
+}
+
+
+class IngestReport:
+    """Outcome, per-phase timings and section statistics for one spoiler log ingest."""
+
+    def __init__(self, line_count: int):
+        self.line_count = line_count
+        # Status shown to admins, e.g. "Spoiler log processed successfully!"
+        self.message = ""
+        # Whether the log had a location list, so its data replaced the guild's files
+        self.accepted = False
+        self.player_count = 0
+        # phase name -> seconds
+        self.phase_times: dict[str, float] = {}
+        # world number -> parsed entrance/location lines
+        self.world_entrance_counts: Counter[int] = Counter()
+        self.world_location_counts: Counter[int] = Counter()
+        self.area_count = 0
+        self.item_count = 0
+        self.check_count = 0
+        self.entrance_count = 0
+        # Unrecognized line -> times seen, in order of first appearance
+        self.unparsed_lines: Counter[str] = Counter()
+
+    def add_unparsed_line(self, line: str):
+        if line not in self.unparsed_lines:
+            log.info(f"Could not parse line: {line}")
+        self.unparsed_lines[line] += 1
+
+    def add_phase_time(self, phase: str, sec: float):
+        self.phase_times[phase] = self.phase_times.get(phase, 0) + sec
+
+    def get_total_time(self) -> float:
+        return sum(self.phase_times.values())
+
+    def get_unparsed_lines_message(self) -> str:
+        """Lists distinct unrecognized lines, up to MAX_UNPARSED_LINES_SHOWN, in spoiler tags."""
+        lines = []
+        for line, count in list(self.unparsed_lines.items())[:MAX_UNPARSED_LINES_SHOWN]:
+            lines.append(line if count == 1 else f"{line} (x{count})")
+        hidden_count = len(self.unparsed_lines) - len(lines)
+        if hidden_count > 0:
+            lines.append(f"...and {hidden_count} more")
+        # you can't put \ in an f-strings curly brace expr
+        lines_str = "\n".join(lines)
+        return f"||{lines_str}||"
+
+    def summary(self) -> str:
+        """Returns the status message with a compact summary of the ingest, for admins."""
+        total_time = self.get_total_time()
+        lines_per_sec = self.line_count / total_time if total_time else 0
+        phases = ", ".join(
+            f"{phase} {sec * 1000:.0f}ms" for phase, sec in self.phase_times.items()
+        )
+        summary = (
+            f"{self.message}\n"
+            + f"-# {self.line_count} lines in {total_time:.2f}s ({lines_per_sec:,.0f} lines/s): {phases}\n"
+            + f"-# {self.player_count} worlds: {sum(self.world_location_counts.values())} locations in "
+            + f"{self.area_count} areas, {sum(self.world_entrance_counts.values())} entrances. "
+            + f"Hintable: {self.item_count} items, {self.check_count} checks, {self.entrance_count} entrances"
+        )
+        return curtail_message(summary)
+
+
+@metrics.timed("handle_spoiler_log_seconds")
 def handle_spoiler_log(
     spoiler_log_lines: List[str], guild_id
-) -> tuple[str, ItemLocations, Checks, Entrances]:
+) -> tuple[IngestReport, ItemLocations, Checks, Entrances, SeedStats, AreaIndex]:
     current_step = SpoilerStep.FIND_PLAYER_COUNT
     player_count = 0
-    item_locations, check_data, entrance_data = {}, {}, {}
+    intern = get_interner()
+    item_locations, check_data, entrance_data, area_data = {}, {}, {}, {}
+    # Check keys in the current world's current area
+    current_area_checks = None
+    # Index in item_counts of each hintable item's counts, and counts indexed by SeedStats.get_index
+    item_indices: dict[str, int] = {}
+    item_counts = SeedStats.get_empty_counts(0, 0)
 
     current_world, current_world_player = None, None
-    unparsed_lines = []
+    report = IngestReport(len(spoiler_log_lines))
+    timed_step, phase_start = current_step, time.perf_counter()
 
     for line in spoiler_log_lines:
+        if current_step is not timed_step:
+            now = time.perf_counter()
+            report.add_phase_time(STEP_PHASES[timed_step], now - phase_start)
+            timed_step, phase_start = current_step, now
         if not line.strip():
             continue
         match current_step:
@@ -79,7 +171,8 @@ def handle_spoiler_log(
 
                 entrance_match = entrance_re.search(line)
                 if entrance_match:
-                    entrance_name = (
+                    report.world_entrance_counts[current_world + 1] += 1
+                    entrance_name = intern(
                         entrance_match.group(2).replace("MM ", "").replace("OOT ", "")
                     )
                     loc = entrance_match.group(6)
@@ -93,7 +186,8 @@ def handle_spoiler_log(
                             loc.replace("MM_", "").replace("OOT_", "").split("_")
                         )
                         loc_name = " ".join(w.capitalize() for w in loc_words)
-                    loc_key = canonicalize(loc_name)
+                    loc_name = intern(loc_name)
+                    loc_key = intern(canonicalize(loc_name))
                     # Locations are 1:1 with entrances, but put each entrance in a list to conform with HintData format
                     if loc_key not in entrance_data:
                         entrance_data[loc_key] = {
@@ -106,8 +200,7 @@ def handle_spoiler_log(
                     continue
 
                 if line[0] == " ":
-                    unparsed_lines.append(line)
-                    log.info(f"Could not parse line: {line}")
+                    report.add_unparsed_line(line)
                     continue
 
                 # New section
@@ -126,22 +219,25 @@ def handle_spoiler_log(
                 if world_match:
                     current_world = world_match.group(1)
                     current_world_player = int(current_world) - 1
+                    current_area_checks = None
                     log.debug(f"Parsing world {current_world} locations")
                     continue
 
                 loc_match = loc_re.search(line)
                 if loc_match:
-                    check_name = loc_match.group(2)
+                    report.world_location_counts[current_world_player + 1] += 1
+                    check_name = intern(loc_match.group(2))
                     player = loc_match.group(3)  # player who will receive the item
                     item_name = loc_match.group(4)
                     if item_name.endswith(" (MM)"):
                         item_name = item_name[:-5]
                     elif item_name.endswith(" (OoT)") or item_name.endswith(" (Oot)"):
                         item_name = item_name[:-6]
+                    item_name = intern(item_name)
 
                     # Add check to { check -> item } mapping
                     # Checks are 1:1 with items, but put each item in a list to conform with HintData format
-                    check_key = canonicalize(check_name)
+                    check_key = intern(canonicalize(check_name))
                     if check_key not in check_data:
                         check_data[check_key] = {
                             HintData.NAME_KEY: check_name,
@@ -149,13 +245,15 @@ def handle_spoiler_log(
                         }
                     check_data[check_key][HintData.RESULTS_KEY][
                         current_world_player
-                    ].append(f"Player {player} {item_name}")
+                    ].append(intern(f"Player {player} {item_name}"))
+                    if current_area_checks is not None:
+                        current_area_checks.append(check_key)
 
                     if item_name not in IGNORED_ITEMS:
                         # Add item to { item -> locations } mapping
                         player = int(player) - 1
-                        loc = f"World {current_world} {check_name}"
-                        item_key = canonicalize(item_name)
+                        loc = intern(f"World {current_world} {check_name}")
+                        item_key = intern(canonicalize(item_name))
                         if item_key not in item_locations:
                             item_locations[item_key] = {
                                 HintData.NAME_KEY: item_name,
@@ -164,37 +262,83 @@ def handle_spoiler_log(
                         item_locations[item_key][HintData.RESULTS_KEY][player].append(
                             loc
                         )
+                        item_index = item_indices.setdefault(
+                            item_key, len(item_indices)
+                        )
+                        if item_index * player_count**2 == len(item_counts):
+                            item_counts += SeedStats.get_empty_counts(1, player_count)
+                        item_counts[
+                            SeedStats.get_index(
+                                player_count, item_index, current_world_player, player
+                            )
+                        ] += 1
                     continue
 
-                if not area_re.search(line):
-                    unparsed_lines.append(line)
-                    log.info(f"Could not parse line: {line}")
+                area_match = area_re.search(line)
+                if area_match:
+                    area_name = intern(area_match.group(1))
+                    area_key = intern(canonicalize(area_name))
+                    if area_key not in area_data:
+                        area_data[area_key] = {
+                            AreaIndex.NAME_KEY: area_name,
+                            AreaIndex.CHECKS_KEY: [[] for _ in range(player_count)],
+                        }
+                    current_area_checks = area_data[area_key][AreaIndex.CHECKS_KEY][
+                        current_world_player
+                    ]
+                else:
+                    report.add_unparsed_line(line)
                 continue
             case _:
                 log.info(f"Unrecognized step {current_step}")
                 item_locations = {}
                 entrance_data = {}
+                item_indices, item_counts = {}, SeedStats.get_empty_counts(0, 0)
+                area_data = {}
                 break
 
-    checks = Checks(guild_id, check_data)
-    entrances = Entrances(guild_id, entrance_data)
+    now = time.perf_counter()
+    report.add_phase_time(STEP_PHASES[timed_step], now - phase_start)
+    report.player_count = player_count
 
-    if not len(item_locations):
+    checks = Checks(guild_id, check_data, save=False)
+    entrances = Entrances(guild_id, entrance_data, save=False)
+    item_locs = ItemLocations(guild_id, item_locations, save=False)
+    seed_stats = SeedStats(
+        guild_id, player_count, list(item_indices), item_counts, save=False
+    )
+    areas = AreaIndex(guild_id, area_data, save=False)
+    phase_start, now = now, time.perf_counter()
+    report.add_phase_time("hint data", now - phase_start)
+    report.item_count = len(item_locs.items)
+    report.check_count = len(checks.items)
+    report.entrance_count = len(entrances.items)
+    report.area_count = len(areas.areas)
+
+    report.accepted = bool(len(item_locations))
+    if not report.accepted:
         if current_step == SpoilerStep.FIND_PLAYER_COUNT:
-            err = "Failed to find player count. Could not extract data."
+            report.message = "Failed to find player count. Could not extract data."
         else:
-            err = "Location list is missing or empty. Could not extract data."
-        return err, ItemLocations(guild_id, {}), checks, entrances
-
-    item_locs = ItemLocations(guild_id, item_locations)
-    if len(unparsed_lines):
-        # you can't put \ in an f-strings curly brace expr
-        unparsed_lines_str = "\n".join(unparsed_lines)
-        return (
+            report.message = (
+                "Location list is missing or empty. Could not extract data."
+            )
+    elif len(report.unparsed_lines):
+        report.message = (
             "Some lines in the spoiler log were unrecognized, which may result in missing item locations:\n"
-            + f"||{unparsed_lines_str}||",
-            item_locs,
-            checks,
-            entrances,
+            + report.get_unparsed_lines_message()
         )
-    return "Spoiler log processed successfully!", item_locs, checks, entrances
+    else:
+        report.message = "Spoiler log processed successfully!"
+
+    if report.accepted:
+        # A log that couldn't be parsed leaves the guild's current seed in its files
+        now = time.perf_counter()
+        for data in (item_locs, checks, entrances, seed_stats, areas):
+            data.save()
+        report.add_phase_time("file writes", time.perf_counter() - now)
+
+    for phase, sec in report.phase_times.items():
+        metrics.observe("spoiler_ingest_phase_seconds", sec, {"phase": phase})
+    log.info(f"Ingested spoiler log for guild {guild_id}: {report.summary()}")
+    return report, item_locs, checks, entrances, seed_stats, areas
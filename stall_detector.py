@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+# Event loop lag past this counts as a stall
+DEFAULT_STALL_THRESHOLD_SEC = 0.25
+# How often the loop checks in, and how often the watchdog thread checks on it
+DEFAULT_CHECK_INTERVAL_SEC = 0.05
+# Stack frames kept per stall, innermost last
+MAX_STACK_FRAMES = 20
+
+# Frames in the bot's own modules, as opposed to the standard library or discord.py, say what was blocking
+_bot_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+class Stall:
+    def __init__(self, duration_sec: float, stack: traceback.StackSummary):
+        self.duration_sec = duration_sec
+        self.stack = stack
+
+    def get_location(self) -> str:
+        """Returns the innermost frame in the bot's code, e.g. 'utils.py:203 in store', or '' if there wasn't one."""
+        for frame in reversed(self.stack):
+            if frame.filename.startswith(_bot_dir):
+                return f"{os.path.relpath(frame.filename, _bot_dir)}:{frame.lineno} in {frame.name}"
+        return ""
+
+
+class StallDetector:
+    """
+    Watchdog for the event loop. A task on the loop checks in every interval, and a thread watches for check-ins
+    running late. Once the loop has been blocked past the threshold, the thread samples the loop thread's stack, so
+    the stall can be reported along with what was blocking once the loop frees up.
+    """
+
+    def __init__(
+        self,
+        threshold_sec: Optional[float] = None,
+        interval_sec: Optional[float] = None,
+    ):
+        self.threshold_sec = (
+            DEFAULT_STALL_THRESHOLD_SEC if threshold_sec is None else threshold_sec
+        )
+        self.interval_sec = (
+            DEFAULT_CHECK_INTERVAL_SEC if interval_sec is None else interval_sec
+        )
+        self._last_check_in = 0.0
+        self._loop_thread_id: Optional[int] = None
+        # Stack sampled by the watchdog thread during the current stall
+        self._stack: Optional[traceback.StackSummary] = None
+        self._stack_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Starts watching the running event loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_check_in = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._check_in())
+        threading.Thread(target=self._watch, name="stall-detector", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _check_in(self):
+        while True:
+            await asyncio.sleep(self.interval_sec)
+            now = time.monotonic()
+            lag = now - self._last_check_in - self.interval_sec
+            self._last_check_in = now
+            if lag > self.threshold_sec:
+                with self._stack_lock:
+                    stack, self._stack = self._stack, None
+                self._report(Stall(lag, stack or traceback.StackSummary()))
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval_sec):
+            lag = time.monotonic() - self._last_check_in - self.interval_sec
+            if lag <= self.threshold_sec:
+                continue
+            with self._stack_lock:
+                if self._stack is not None:
+                    continue  # already sampled this stall
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._stack = traceback.extract_stack(frame, MAX_STACK_FRAMES)
+
+    def _report(self, stall: Stall):
+        metrics.record_stall(stall.duration_sec, stall.get_location())
+        log.warning(
+            f"Event loop blocked for {stall.duration_sec:.3f}s. Stack when sampled:\n"
+            + "".join(stall.stack.format())
+        )
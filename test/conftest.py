@@ -10,5 +10,5 @@ def cleanup():
     yield
 
     for file in os.listdir():
-        if file.startswith(TEST_GUILD_ID) and file.endswith(".json"):
+        if file.startswith(TEST_GUILD_ID) and file.endswith((".json", ".bin")):
             os.remove(file)
@@ -0,0 +1,63 @@
+from test.conftest import TEST_GUILD_ID
+
+import pytest
+
+from area_index import AreaIndex
+from hint_handler import get_show_area_response
+from hint_times import HintTimes
+from search_handler import get_search_response
+from spoiler_log_handler import handle_spoiler_log
+from utils import HintType
+
+sample_spoiler_file = "sample_spoiler.txt"
+
+
+def ingest_sample_spoiler():
+    with open(sample_spoiler_file, "r") as f:
+        spoiler_lines = f.read().split("\n")
+    return handle_spoiler_log(spoiler_lines, TEST_GUILD_ID)
+
+
+def test_area_index():
+    _, _, _, _, _, areas = ingest_sample_spoiler()
+    tingle_checks = [
+        "tingle map clock town",
+        "tingle map woodfall",
+        "tingle map snowhead",
+        "tingle map ranch",
+    ]
+    assert areas.areas == {
+        "tingle": {
+            AreaIndex.NAME_KEY: "Tingle",
+            AreaIndex.CHECKS_KEY: [tingle_checks, tingle_checks],
+        }
+    }
+    assert AreaIndex(TEST_GUILD_ID).areas == areas.areas
+    assert areas.find_matches("ting") == ["Tingle"]
+    assert areas.get_checks(2, "Tingle") == ("Tingle", tingle_checks)
+    # Unambiguous partial names work too
+    assert areas.get_checks(1, "tin")[0] == "Tingle"
+    with pytest.raises(ValueError):
+        areas.get_checks(1, "clock town")
+    with pytest.raises(ValueError):
+        areas.get_checks(3, "tingle")
+    with pytest.raises(FileNotFoundError):
+        AreaIndex(f"{TEST_GUILD_ID}-2").get_checks(1, "tingle")
+
+
+def test_show_area_response():
+    _, item_locs, checks, entrances, _, areas = ingest_sample_spoiler()
+    hint_times = HintTimes(TEST_GUILD_ID)
+    hint_times.record_hint(
+        1, 1, HintType.ITEM, "Light Arrows", ["World 1 Tingle Map Woodfall"]
+    )
+    assert get_show_area_response(1, "tingle", areas, checks, hint_times) == (
+        "**World 1 Tingle:**\n"
+        + "- Tingle Map Clock Town\n"
+        + "- Tingle Map Woodfall: Player 1 Light Arrows\n"
+        + "- Tingle Map Snowhead\n"
+        + "- Tingle Map Ranch"
+    )
+    assert "**Areas:** Tingle\n" in get_search_response(
+        "tingle", item_locs, checks, entrances, areas
+    )
@@ -0,0 +1,513 @@
+import asyncio
+import logging
+import os
+import random
+from test.conftest import TEST_GUILD_ID
+from test.utils import (
+    MockAttachment,
+    MockAuthor,
+    MockBot,
+    MockChannel,
+    MockContext,
+    MockRole,
+    MockUser,
+)
+from types import SimpleNamespace
+
+import pytest
+
+import bot as bot_module
+from hint_times import HintTimes
+from message_tracker import MessageTracker
+from player_roles import get_player_num_from_roles
+from snapshots import snapshot_archive_filename, snapshot_filename
+from trace_recorder import TraceRecorder, read_trace
+from utils import HintType, compose_show_hints_message
+
+sample_spoiler_file = "sample_spoiler.txt"
+
+GUILD_COUNT = 3
+AUTHORS_PER_GUILD = 12
+COMMAND_COUNT = 400
+
+
+@pytest.fixture
+def mock_bot(monkeypatch):
+    monkeypatch.setattr(bot_module, "guilds", {})
+    monkeypatch.setattr(bot_module, "game_bindings", {})
+    monkeypatch.setattr(
+        "update_scheduler.DEFAULT_UPDATE_WINDOW_SEC", 0.01, raising=True
+    )
+    mock_bot = MockBot()
+    monkeypatch.setattr(bot_module.bot, "get_channel", mock_bot.get_channel)
+    return mock_bot
+
+
+def test_concurrent_commands(mock_bot, caplog):
+    async def test():
+        rng = random.Random(0)
+        with open(sample_spoiler_file, "rb") as f:
+            spoiler = f.read()
+        guild_ids = [f"{TEST_GUILD_ID}-{i}" for i in range(GUILD_COUNT)]
+        channels = {
+            guild_id: MockChannel(i, latency=0.002)
+            for i, guild_id in enumerate(guild_ids)
+        }
+        mock_bot.channels = {channel.id: channel for channel in channels.values()}
+        # Each guild's @player1 and @player2 roles, shared by its authors
+        roles = {
+            guild_id: [MockRole("player1"), MockRole("player2")]
+            for guild_id in guild_ids
+        }
+        authors = {}
+        for guild_id in guild_ids:
+            authors[guild_id] = []
+            for i in range(AUTHORS_PER_GUILD):
+                author = MockAuthor(i)
+                author.roles = [roles[guild_id][i % 2]]
+                authors[guild_id].append(author)
+        # Successful hints per (guild, author, hint type)
+        successes = {}
+
+        def make_ctx(guild_id, author, attachments=None):
+            # Random latency on every send, so commands interleave at their awaits
+            return MockContext(
+                guild_id,
+                author,
+                channels[guild_id],
+                attachments,
+                latency=rng.random() * 0.005,
+            )
+
+        async def set_log(guild_id):
+            ctx = make_ctx(guild_id, authors[guild_id][0], [MockAttachment(spoiler)])
+            await bot_module.set_spoiler_log.callback(ctx)
+
+        async def hint_item(guild_id, author):
+            ctx = make_ctx(guild_id, author)
+            item = rng.choice(["progressive sword", "light arrows"])
+            await bot_module.hint_item.callback(ctx, None, item=item)
+            if ctx.sent[0].startswith("World "):
+                key = (guild_id, author.id, HintType.ITEM)
+                successes[key] = successes.get(key, 0) + 1
+
+        async def hint_check(guild_id, author):
+            ctx = make_ctx(guild_id, author)
+            check = rng.choice(["ranch", "snowhead", "woodfall", "clock town"])
+            await bot_module.hint_check.callback(ctx, None, check=f"tingle map {check}")
+            if ctx.sent[0].startswith("Player "):
+                key = (guild_id, author.id, HintType.CHECK)
+                successes[key] = successes.get(key, 0) + 1
+
+        async def show_hints(guild_id, author):
+            ctx = make_ctx(guild_id, author)
+            hint_type = rng.choice(["all", "item", "check"])
+            await bot_module.show_hints.callback(ctx, None, hint_type)
+
+        async def show_checks(guild_id, author):
+            ctx = make_ctx(guild_id, author)
+            await bot_module.show_checks.callback(ctx, None)
+
+        async def set_cooldown(guild_id, author):
+            # Entrance hints aren't requested, so this doesn't affect the cooldown invariant
+            ctx = make_ctx(guild_id, author)
+            await bot_module.set_hint_cooldown.callback(
+                ctx, rng.randint(0, 5), "entrance"
+            )
+
+        async def delete_message(guild_id, author):
+            # A user deletes one of the bot's messages, possibly one being edited by an update pass
+            channel = channels[guild_id]
+            await asyncio.sleep(rng.random() * 0.005)
+            tracked_ids = bot_module.guilds[guild_id].message_tracker.channel_index.get(
+                channel.id, {}
+            )
+            if not len(tracked_ids):
+                return
+            message_id = rng.choice(sorted(tracked_ids))
+            channel.messages.pop(message_id, None)
+            await bot_module.on_raw_message_delete(
+                SimpleNamespace(
+                    guild_id=guild_id, channel_id=channel.id, message_id=message_id
+                )
+            )
+
+        async def change_roles(guild_id, author):
+            guild = SimpleNamespace(id=guild_id)
+            if rng.random() < 0.5:
+                # A member switches player roles
+                before = SimpleNamespace(roles=author.roles)
+                author.roles = [rng.choice(roles[guild_id])]
+                await bot_module.on_member_update(
+                    before,
+                    SimpleNamespace(guild=guild, id=author.id, roles=author.roles),
+                )
+            else:
+                # The member's player role is renamed, for everyone with it
+                role = author.roles[0]
+                role.name = "player2" if role.name == "player1" else "player1"
+                members = [a for a in authors[guild_id] if role in a.roles]
+                await bot_module.on_guild_role_update(
+                    SimpleNamespace(name="before"),
+                    SimpleNamespace(
+                        guild=guild, id=role.id, name=role.name, members=members
+                    ),
+                )
+
+        await asyncio.gather(*(set_log(guild_id) for guild_id in guild_ids))
+        commands = [
+            hint_item,
+            hint_check,
+            show_hints,
+            show_checks,
+            set_cooldown,
+            delete_message,
+            change_roles,
+        ]
+        weights = [4, 4, 3, 2, 1, 2, 1]
+        coros = []
+        for i in range(COMMAND_COUNT):
+            guild_id = rng.choice(guild_ids)
+            if i % 25 == 10:
+                coros.append(set_log(guild_id))
+            else:
+                command = rng.choices(commands, weights)[0]
+                coros.append(command(guild_id, rng.choice(authors[guild_id])))
+        await asyncio.gather(*coros)
+        for g in bot_module.guilds.values():
+            await g.update_scheduler.flush()
+
+        # No update pass failed, e.g. on records dropped by a delete event mid-pass
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+        # Cooldowns held: nobody got two hints of a type within the (default 30 min) cooldown
+        assert len(successes)
+        assert all(count == 1 for count in successes.values())
+
+        for guild_id, g in bot_module.guilds.items():
+            channel = channels[guild_id]
+            tracker = g.message_tracker
+
+            # The player index matches the cached player numbers
+            player_roles = g.player_roles
+            assert sum(len(ids) for ids in player_roles.players.values()) == len(
+                [r for _, r in player_roles.members.values() if isinstance(r, int)]
+            )
+            for member_id, (_, result) in player_roles.members.items():
+                if isinstance(result, int):
+                    assert member_id in player_roles.players[result]
+            # No cached player number outlived a role change
+            authors_by_id = {author.id: author for author in authors[guild_id]}
+            for member_id, (_, result) in player_roles.members.items():
+                assert result == get_player_num_from_roles(
+                    authors_by_id[member_id].roles
+                )
+
+            # The channel index matches the tracked message records
+            index = tracker.channel_index
+            tracker._build_channel_index()
+            assert index == tracker.channel_index
+
+            # In-memory state matches what's on disk
+            assert HintTimes(guild_id).past_hints == g.hint_times.past_hints
+            saved_tracker = MessageTracker(guild_id)
+            assert saved_tracker.show_hints_messages == tracker.show_hints_messages
+            assert saved_tracker.show_checks_msgs == tracker.show_checks_msgs
+
+            # Tracked !show-hints messages that aren't stale show the latest hints
+            for player_num, player_msgs in tracker.show_hints_messages.items():
+                for hint_type_query, channel_msgs in player_msgs.items():
+                    hint_types = [
+                        ht for ht in HintType if hint_type_query in ("all", str(ht))
+                    ]
+                    expected = compose_show_hints_message(
+                        hint_types, g.hint_times.past_hints.get(player_num, {})
+                    )
+                    for message_id in channel_msgs.get(channel.id, []):
+                        if message_id in tracker.stale_messages:
+                            continue
+                        content = channel.messages[message_id].content
+                        if expected:
+                            assert content == expected
+                        else:
+                            assert content.startswith(f"Player {player_num} has not")
+
+    asyncio.run(test())
+
+
+def test_memory_stats(mock_bot):
+    async def test():
+        with open(sample_spoiler_file, "rb") as f:
+            spoiler = f.read()
+        author = MockAuthor(0, "player1")
+        await bot_module.set_spoiler_log.callback(
+            MockContext(
+                TEST_GUILD_ID, author, MockChannel(0), [MockAttachment(spoiler)]
+            )
+        )
+        ctx = MockContext(TEST_GUILD_ID, author, MockChannel(0))
+        await bot_module.memory_stats.callback(ctx)
+        lines = ctx.sent[0].split("\n")
+        assert lines[0].startswith("**This game:** ")
+        components = bot_module.guilds[TEST_GUILD_ID].get_memory_footprint()
+        component_count = len(components)
+        assert {line.split(":")[0] for line in lines[1 : component_count + 1]} == {
+            f"- {component.replace('_', ' ')}" for component in components
+        }
+        assert lines[component_count + 1].startswith("**Loaded servers:** 1, ")
+        assert lines[component_count + 2].startswith(f"- {TEST_GUILD_ID}: ")
+
+    asyncio.run(test())
+
+
+def test_delete_during_update(mock_bot, caplog):
+    async def test():
+        # A tracked message deleted while an update pass is editing it is dropped once the pass is done
+        with open(sample_spoiler_file, "rb") as f:
+            spoiler = f.read()
+        author = MockAuthor(0, "player1")
+        channel = MockChannel(0, latency=0.05)
+        mock_bot.channels = {channel.id: channel}
+
+        async def run(command, *args, attachments=None, **kwargs):
+            ctx = MockContext(TEST_GUILD_ID, author, channel, attachments)
+            await command.callback(ctx, *args, **kwargs)
+
+        await run(bot_module.set_spoiler_log, attachments=[MockAttachment(spoiler)])
+        await run(bot_module.show_hints, None, "all")
+        g = bot_module.guilds[TEST_GUILD_ID]
+        [message_id] = g.message_tracker.channel_index[channel.id]
+        await run(bot_module.hint_item, None, item="light arrows")
+        await asyncio.sleep(0.03)  # the update pass is now editing the message
+
+        del channel.messages[message_id]
+        await bot_module.on_raw_message_delete(
+            SimpleNamespace(
+                guild_id=TEST_GUILD_ID, channel_id=channel.id, message_id=message_id
+            )
+        )
+        await g.update_scheduler.flush()
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+        assert g.message_tracker.show_hints_messages == {1: {}}
+        assert MessageTracker(TEST_GUILD_ID).channel_index == {}
+
+    asyncio.run(test())
+
+
+def test_concurrent_games(mock_bot):
+    async def test():
+        with open(sample_spoiler_file, "rb") as f:
+            spoiler = f.read()
+        author = MockAuthor(0, "player1")
+        default_channel, game_channel = MockChannel(0), MockChannel(1)
+
+        async def run(command, channel, *args, attachments=None, **kwargs):
+            ctx = MockContext(TEST_GUILD_ID, author, channel, attachments)
+            await command.callback(ctx, *args, **kwargs)
+            return ctx.sent
+
+        await run(bot_module.set_game, game_channel, "mw-2", "channel")
+        assert await run(bot_module.show_game, game_channel) == [
+            "This channel plays the game mw-2.\n- <#1>: mw-2"
+        ]
+        for channel in (default_channel, game_channel):
+            await run(
+                bot_module.set_spoiler_log,
+                channel,
+                attachments=[MockAttachment(spoiler)],
+            )
+        default_game = bot_module.guilds[TEST_GUILD_ID]
+        game = bot_module.guilds[f"{TEST_GUILD_ID}-game-mw-2"]
+        assert default_game is not game
+
+        # Hints and cooldowns are separate per game
+        sent = await run(bot_module.hint_item, game_channel, None, item="light arrows")
+        assert sent[0].startswith("World ")
+        sent = await run(
+            bot_module.hint_item, default_channel, None, item="light arrows"
+        )
+        assert sent[0].startswith("World ")
+        assert 1 in default_game.hint_times.past_hints
+        assert 1 in game.hint_times.past_hints
+
+        # A new log for one game leaves the other alone
+        await run(
+            bot_module.set_spoiler_log,
+            game_channel,
+            attachments=[MockAttachment(spoiler)],
+        )
+        assert bot_module.guilds[TEST_GUILD_ID] is default_game
+        assert 1 in default_game.hint_times.past_hints
+        assert (
+            bot_module.guilds[f"{TEST_GUILD_ID}-game-mw-2"].hint_times.past_hints == {}
+        )
+
+        await run(bot_module.set_game, game_channel, "default", "channel")
+        assert (
+            bot_module.get_state_id(MockContext(TEST_GUILD_ID, author, game_channel))
+            == TEST_GUILD_ID
+        )
+
+    asyncio.run(test())
+
+
+def test_snapshots(mock_bot):
+    async def test():
+        author = MockAuthor(0, "player1")
+        channel = MockChannel(0)
+
+        async def run(command, *args, spoiler_file=None, **kwargs):
+            attachments = None
+            if spoiler_file is not None:
+                with open(spoiler_file, "rb") as f:
+                    attachments = [MockAttachment(f.read())]
+            ctx = MockContext(TEST_GUILD_ID, author, channel, attachments)
+            await command.callback(ctx, *args, **kwargs)
+            return ctx.sent
+
+        await run(bot_module.set_spoiler_log, spoiler_file=sample_spoiler_file)
+        await run(bot_module.hint_item, None, item="light arrows")
+        await run(bot_module.set_spoiler_log, "owls", spoiler_file="owl_spoiler.txt")
+        g = bot_module.guilds[TEST_GUILD_ID]
+        assert g.hint_times.past_hints == {}
+        assert g.seed_stats.player_count == 1
+        assert await run(
+            bot_module.set_spoiler_log, "Seed-1", spoiler_file="owl_spoiler.txt"
+        ) == [
+            "Snapshot seed-1 already exists. Use !use-snapshot seed-1 to switch to it."
+        ]
+
+        sent = await run(bot_module.show_snapshots)
+        lines = sent[0].split("\n")
+        assert lines[1].startswith("- seed-1: 2 players, uploaded <t:")
+        assert lines[1].endswith(", 1 hints")
+        assert lines[2].startswith("- owls: 1 players, uploaded <t:")
+        assert sent[0].endswith("**(active)**")
+
+        assert await run(bot_module.use_snapshot, "seed-1") == [
+            "Now playing snapshot seed-1. The previous seed was archived as owls."
+        ]
+        g = bot_module.guilds[TEST_GUILD_ID]
+        assert g.seed_stats.player_count == 2
+        assert "Light Arrows" in g.hint_times.past_hints[1][HintType.ITEM]
+        assert g.snapshots.active == "seed-1"
+        # Switching back restores the same state after a restart
+        reloaded = bot_module.Guild(TEST_GUILD_ID)
+        assert reloaded.item_locations.items == g.item_locations.items
+        assert reloaded.hint_times.past_hints == g.hint_times.past_hints
+
+        assert await run(bot_module.use_snapshot, "owls") == [
+            "Now playing snapshot owls. The previous seed was archived as seed-1."
+        ]
+        assert bot_module.guilds[TEST_GUILD_ID].seed_stats.player_count == 1
+        assert await run(bot_module.use_snapshot, "owls") == [
+            "Snapshot owls is already in play."
+        ]
+        assert await run(bot_module.use_snapshot, "nope") == [
+            "No snapshot named nope. Use !snapshots to list them."
+        ]
+
+    asyncio.run(test())
+
+
+def test_set_log_archives_only_on_success(mock_bot):
+    async def test():
+        author = MockAuthor(0, "player1")
+        channel = MockChannel(0)
+
+        async def set_log(data, *args):
+            ctx = MockContext(TEST_GUILD_ID, author, channel, [MockAttachment(data)])
+            await bot_module.set_spoiler_log.callback(ctx, *args)
+            return ctx.sent
+
+        with open(sample_spoiler_file, "rb") as f:
+            spoiler = f.read()
+        await set_log(spoiler)
+        # As if the log was uploaded before snapshots existed
+        os.remove(snapshot_archive_filename(TEST_GUILD_ID))
+        bot_module.guilds.clear()
+
+        assert await set_log(spoiler, "Not a/valid name") == [
+            "Invalid snapshot name not a/valid name. Use up to 32 lowercase letters, numbers and dashes."
+        ]
+        assert await set_log(b"\xff\xfe") == [
+            "Your spoiler log isn't a UTF-8 text file."
+        ]
+        assert not os.path.exists(snapshot_archive_filename(TEST_GUILD_ID))
+        assert not os.path.exists(snapshot_filename(TEST_GUILD_ID, "seed-1"))
+
+        # The unnamed seed is archived under a name other than the new seed's
+        await set_log(spoiler, "seed-1")
+        snapshots = bot_module.guilds[TEST_GUILD_ID].snapshots
+        assert snapshots.active == "seed-1"
+        assert set(snapshots.snapshots) == {"seed-1", "seed-2"}
+        assert os.path.exists(snapshot_filename(TEST_GUILD_ID, "seed-2"))
+
+    asyncio.run(test())
+
+
+def test_set_log_rejects_unparsable_log(mock_bot):
+    async def test():
+        author = MockAuthor(0, "player1")
+        channel = MockChannel(0)
+
+        async def run(command, *args, data=None, **kwargs):
+            attachments = None if data is None else [MockAttachment(data)]
+            ctx = MockContext(TEST_GUILD_ID, author, channel, attachments)
+            await command.callback(ctx, *args, **kwargs)
+            return ctx.sent
+
+        with open(sample_spoiler_file, "rb") as f:
+            await run(bot_module.set_spoiler_log, "weekly", data=f.read())
+        await run(bot_module.hint_item, None, item="light arrows")
+        g = bot_module.guilds[TEST_GUILD_ID]
+        items = g.item_locations.items
+        past_hints = g.hint_times.get_serialized_past_hints()
+        snapshots_response = await run(bot_module.show_snapshots)
+
+        for data, message in [
+            (b"not a spoiler log", "Failed to find player count."),
+            (b"  players: 2\n", "Location list is missing or empty."),
+        ]:
+            sent = await run(bot_module.set_spoiler_log, data=data)
+            assert sent[0].startswith(message)
+            assert bot_module.guilds[TEST_GUILD_ID] is g
+            assert g.snapshots.active == "weekly"
+            assert g.hint_times.get_serialized_past_hints() == past_hints
+            assert await run(bot_module.show_snapshots) == snapshots_response
+            assert not os.path.exists(snapshot_filename(TEST_GUILD_ID, "weekly"))
+
+        # The seed's files are untouched too
+        reloaded = bot_module.Guild(TEST_GUILD_ID)
+        assert reloaded.item_locations.items == items
+        assert reloaded.hint_times.get_serialized_past_hints() == past_hints
+        assert reloaded.snapshots.snapshots == g.snapshots.snapshots
+
+    asyncio.run(test())
+
+
+def test_tracing_skips_dms(mock_bot, monkeypatch, tmp_path):
+    trace_file = str(tmp_path / "trace.jsonl")
+    monkeypatch.setattr(bot_module, "trace_recorder", TraceRecorder(trace_file))
+
+    async def test():
+        async def invoke(ctx, command_name):
+            ctx.command = bot_module.bot.get_command(command_name)
+            ctx.args = [ctx]
+            ctx.kwargs = {}
+            await bot_module.before_command(ctx)
+            await bot_module.after_command(ctx)
+
+        # A DM has no guild, and its author has no roles
+        await invoke(MockContext(None, MockUser(5), MockChannel(7)), "help")
+        await invoke(
+            MockContext(TEST_GUILD_ID, MockAuthor(5, "player1"), MockChannel(8)),
+            "snapshots",
+        )
+        bot_module.trace_recorder.close()
+        entries = read_trace(trace_file)
+        assert [(entry.guild_id, entry.command) for entry in entries] == [
+            (TEST_GUILD_ID, "snapshots")
+        ]
+
+    asyncio.run(test())
@@ -0,0 +1,37 @@
+from test.conftest import TEST_GUILD_ID
+
+import pytest
+
+from games import GameBindings, game_state_id
+
+
+class MockThread:
+    def __init__(self, id, parent_id, category_id):
+        self.id = id
+        self.parent_id = parent_id
+        self.category_id = category_id
+
+
+def test_game_bindings():
+    bindings = GameBindings(TEST_GUILD_ID)
+    bindings.bind(10, "mw-a")  # category
+    bindings.bind(2, "mw-b")  # channel in the category
+    with pytest.raises(ValueError):
+        bindings.bind(3, "Not a/valid name")
+
+    # Channel bindings take precedence over category bindings
+    assert bindings.get_game(MockThread(1, None, 10)) == "mw-a"
+    assert bindings.get_game(MockThread(2, None, 10)) == "mw-b"
+    assert bindings.get_game(MockThread(5, 2, 10)) == "mw-b"
+    assert bindings.get_game(MockThread(6, None, None)) is None
+
+    loaded = GameBindings(TEST_GUILD_ID)
+    assert loaded.bindings == {10: "mw-a", 2: "mw-b"}
+    assert loaded.unbind(2)
+    assert not loaded.unbind(2)
+    assert GameBindings(TEST_GUILD_ID).get_games() == {"mw-a"}
+
+
+def test_game_state_id():
+    assert game_state_id(TEST_GUILD_ID, None) == TEST_GUILD_ID
+    assert game_state_id(TEST_GUILD_ID, "mw-a") == f"{TEST_GUILD_ID}-game-mw-a"
@@ -92,3 +92,18 @@ def test_unknown_version():
         VERSION_KEY: BOT_VERSION,
         ItemLocations.DATA_KEY: {},
     }
+
+
+def test_shared_seed_data():
+    other_guild_id = f"{TEST_GUILD_ID}-2"
+    item_locs = ItemLocations(TEST_GUILD_ID, serialized_items)
+    # Hint data saved with the same content is shared, whether it was just saved or loaded from file
+    other_item_locs = ItemLocations(other_guild_id, dict(serialized_items))
+    assert other_item_locs.seed_data is item_locs.seed_data
+    assert other_item_locs.items is item_locs.items
+    assert ItemLocations(other_guild_id).seed_data is item_locs.seed_data
+
+    different_items = {"kafeis mask": serialized_items["kafeis mask"]}
+    different_item_locs = ItemLocations(other_guild_id, different_items)
+    assert different_item_locs.seed_data is not item_locs.seed_data
+    assert different_item_locs.items == different_items
@@ -5,12 +5,15 @@ import pytest
 from checks import Checks
 from guild import Guild
 from hint_handler import (
+    compose_batch_hint_message,
     get_hint,
     get_hint_response,
     get_hint_without_type,
+    get_hints_without_type,
     get_show_hints_response,
     infer_player_num,
 )
+from hint_log import HintEvent, HintLog
 from hint_times import HintTimes, hint_times_filename
 from item_locations import ItemLocations
 from utils import HintType, load
@@ -235,6 +238,23 @@ def test_get_hint_response():
     assert response.results == player2_locs  # player2 has two locations
 
 
+def test_get_hint_response_logged():
+    item_locs = ItemLocations(TEST_GUILD_ID, item_locs_dict)
+    hint_times = HintTimes(TEST_GUILD_ID)
+    hint_log = HintLog(TEST_GUILD_ID)
+    get_hint_response(1, item_key, 0, item_locs, hint_times, hint_log=hint_log)
+    get_hint_response(1, item_key, 0, item_locs, hint_times, hint_log=hint_log)
+    get_hint_response(1, item_key, 1, item_locs, hint_times, hint_log=hint_log)
+    # Unrecognized items aren't hint requests
+    get_hint_response(1, "foo", 2, item_locs, hint_times, hint_log=hint_log)
+    assert hint_log.askers.tolist() == [0, 0, 1]
+    assert hint_log.events.tolist() == [
+        HintEvent.NEW.value,
+        HintEvent.COOLDOWN.value,
+        HintEvent.REPEAT.value,
+    ]
+
+
 def test_get_show_hints_response():
     hint_times = HintTimes(TEST_GUILD_ID)
 
@@ -253,3 +273,72 @@ def test_get_show_hints_response():
     assert resp == "Player 2 has not even redeemed any item hints yet! :horse: :zzz:"
     resp = get_show_hints_response(1, [HintType.CHECK], hint_times)
     assert resp == "Player 1 has not even redeemed any check hints yet! :horse: :zzz:"
+
+
+def test_get_hints_without_type(monkeypatch):
+    item_locs = ItemLocations(
+        TEST_GUILD_ID,
+        {
+            "foo": {
+                ItemLocations.NAME_KEY: "Foo",
+                ItemLocations.RESULTS_KEY: [["p1 foo"]],
+            },
+            "bar": {
+                ItemLocations.NAME_KEY: "Bar",
+                ItemLocations.RESULTS_KEY: [["p1 bar"]],
+            },
+        },
+    )
+    checks = Checks(
+        TEST_GUILD_ID,
+        {
+            "baz": {
+                Checks.NAME_KEY: "Baz",
+                Checks.RESULTS_KEY: [["p1 baz"]],
+            },
+        },
+    )
+    g = Guild(TEST_GUILD_ID, item_locs, checks, None)
+    save_count = 0
+    save = g.hint_times.save
+
+    def counting_save():
+        nonlocal save_count
+        save_count += 1
+        save()
+
+    monkeypatch.setattr(g.hint_times, "save", counting_save)
+
+    # With cooldowns, only the first query of each hint type succeeds
+    queries = ["foo", "bar", "baz", "qux"]
+    results = get_hints_without_type(g, queries, MockAuthor(1), 1)
+    assert [result.success for result in results] == [True, False, True, False]
+    assert results[1].error.startswith("Whoa nelly! You can't get another item hint")
+    assert save_count == 1
+    assert compose_batch_hint_message(queries, results).split("\n") == [
+        "**Foo:** p1 foo",
+        f"**bar:** {results[1].error}",
+        "**Baz:** p1 baz",
+        "**qux:** Query qux not recognized. Try !search <keyword> to find it!",
+    ]
+
+    # Without cooldowns, every query succeeds
+    g.hint_times.set_all_cooldowns(0)
+    save_count = 0
+    results = get_hints_without_type(g, queries[:3], MockAuthor(2), 1)
+    assert all(result.success for result in results)
+    assert save_count == 1
+
+    # Repeats aren't saved
+    save_count = 0
+    results = get_hints_without_type(g, queries[:3], MockAuthor(3), 1)
+    assert all(result.success and not result.is_new_hint for result in results)
+    assert save_count == 0
+    assert g.hint_times.past_hints[1] == {
+        HintType.ITEM: {"Foo": ["p1 foo"], "Bar": ["p1 bar"]},
+        HintType.CHECK: {"Baz": ["p1 baz"]},
+    }
+    assert load(hint_times_file)[HintTimes.PAST_HINTS_KEY]["1"] == {
+        "item": {"Foo": ["p1 foo"], "Bar": ["p1 bar"]},
+        "check": {"Baz": ["p1 baz"]},
+    }
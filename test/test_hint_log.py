@@ -0,0 +1,69 @@
+from test.conftest import TEST_GUILD_ID
+
+from hint_log import HintEvent, HintLog, hint_log_filename
+from utils import HintType
+
+START = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+def make_hint_log():
+    hint_log = HintLog(TEST_GUILD_ID)
+    for offset, asker, hint_type, event in [
+        (0, 1, HintType.ITEM, HintEvent.NEW),
+        (60, 1, HintType.ITEM, HintEvent.COOLDOWN),
+        (120, 2, HintType.CHECK, HintEvent.NEW),
+        (300, 2, HintType.ITEM, HintEvent.REPEAT),
+        (3700, 3, HintType.ENTRANCE, HintEvent.NEW),
+        (3800, 3, HintType.ENTRANCE, HintEvent.COOLDOWN),
+    ]:
+        hint_log.record(asker, asker, hint_type, event, START + offset)
+    return hint_log
+
+
+def test_record_and_load():
+    hint_log = make_hint_log()
+    loaded = HintLog(TEST_GUILD_ID)
+    assert loaded.timestamps == hint_log.timestamps
+    assert loaded.askers == hint_log.askers
+    assert loaded.events == hint_log.events
+
+    # A partial record from an interrupted write is dropped, and new records still line up
+    with open(hint_log_filename(TEST_GUILD_ID), "ab") as f:
+        f.write(b"\x01\x02\x03")
+    loaded = HintLog(TEST_GUILD_ID)
+    assert len(loaded.timestamps) == 6
+    loaded.record(4, 4, HintType.ITEM, HintEvent.NEW, START + 4000)
+    assert HintLog(TEST_GUILD_ID).askers.tolist() == [1, 1, 2, 2, 3, 3, 4]
+
+
+def test_summarize():
+    hint_log = make_hint_log()
+    assert hint_log.summarize(START, START + 7199) == (
+        "**Hints:** 4 (2.0/h), 1 of them repeats\n"
+        + "**Cooldown denials:** 2 (33% of requests)\n"
+        + "**By type:** item: 3, entrance: 2, check: 1\n"
+        + "**Time between hints:** median 3.0m, 90th percentile 56.7m\n"
+        + "**Askers:** 3, 2 of them hit cooldowns"
+    )
+    # Only records in the window count
+    assert hint_log.summarize(START + 3600, START + 7199).startswith(
+        "**Hints:** 1 (1.0/h)"
+    )
+    assert hint_log.summarize(START - 3600, START - 1) == (
+        "**Hints:** 0 (0.0/h), 0 of them repeats"
+    )
+
+
+def test_to_hourly_csv():
+    hint_log = make_hint_log()
+    assert hint_log.to_hourly_csv(START, START + 7199) == (
+        "hour_start,new,repeat,cooldown,item,entrance,check\n"
+        + f"{START},2,1,1,2,0,1\n"
+        + f"{START + 3600},1,0,1,0,1,0\n"
+    )
+    # Hours are cut to the window
+    assert hint_log.to_hourly_csv(START + 100, START + 3700) == (
+        "hour_start,new,repeat,cooldown,item,entrance,check\n"
+        + f"{START},1,1,0,1,0,1\n"
+        + f"{START + 3600},1,0,0,0,1,0\n"
+    )
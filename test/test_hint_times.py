@@ -1,10 +1,11 @@
 import time
 from test.conftest import TEST_GUILD_ID
 
+from consts import DISCORD_MAX_MSG_LENGTH
 from hint_data import DEFAULT_HINT_COOLDOWN_SEC
 from hint_times import HintTimes, hint_times_filename
 from item_locations import ItemLocations
-from utils import HintType, load
+from utils import HintType, compose_show_hints_message, load
 
 hint_times_fname = hint_times_filename(TEST_GUILD_ID)
 
@@ -60,3 +61,88 @@ def test_clear_past_hints():
     assert hint_times.past_hints == {}
     saved_data = load(hint_times_fname)
     assert saved_data[HintTimes.PAST_HINTS_KEY] == {}
+
+
+def test_record_hint_saves_new_hints(monkeypatch):
+    hint_times = HintTimes(TEST_GUILD_ID)
+    save_count = 0
+
+    def counting_save():
+        nonlocal save_count
+        save_count += 1
+
+    monkeypatch.setattr(hint_times, "save", counting_save)
+    assert hint_times.record_hint(1, 2, HintType.ITEM, "foo", ["bar"])
+    assert save_count == 1
+    # A repeat only updates the asker's hint time in memory
+    assert not hint_times.record_hint(3, 2, HintType.ITEM, "foo", ["bar"])
+    assert save_count == 1
+    assert hint_times.attempt_hint(3, HintType.ITEM) > 0
+
+
+def test_show_hints_cache():
+    hint_times = HintTimes(TEST_GUILD_ID)
+    all_types = [HintType.ITEM, HintType.CHECK, HintType.ENTRANCE]
+
+    # Render before any hints are recorded, so that later hints patch the cached messages
+    show_hints = hint_times.get_show_hints(1)
+    assert show_hints.compose(all_types) == ""
+    assert show_hints.compose([HintType.CHECK]) == ""
+
+    hint_times.record_hint(5, 1, HintType.CHECK, "foo", ["bar"])
+    hint_times.record_hint(5, 1, HintType.ITEM, "baz", ["qux", "quux"])
+    hint_times.record_hint(5, 1, HintType.CHECK, "corge", ["grault"])
+    assert hint_times.get_show_hints(1) is show_hints
+    for hint_types in [all_types, [HintType.CHECK], [HintType.ENTRANCE]]:
+        assert show_hints.compose(hint_types) == compose_show_hints_message(
+            hint_types, hint_times.past_hints[1]
+        )
+
+    # Fill up past the max message length; cached views should match a full rebuild
+    for i in range(200):
+        hint_times.record_hint(5, 1, HintType.ITEM, f"item {i}", [f"location {i}"])
+        hint_times.record_hint(5, 1, HintType.CHECK, f"check {i}", [f"item {i}"])
+        if i % 50 == 0:
+            show_hints.compose(all_types)
+    message = show_hints.compose(all_types)
+    assert len(message) == DISCORD_MAX_MSG_LENGTH
+    assert message == compose_show_hints_message(all_types, hint_times.past_hints[1])
+    assert show_hints.compose([HintType.CHECK]) == compose_show_hints_message(
+        [HintType.CHECK], hint_times.past_hints[1]
+    )
+
+    # Clearing past hints invalidates the cache
+    hint_times.clear_past_hints()
+    assert hint_times.get_show_hints(1).compose(all_types) == ""
+
+
+def test_sweep_hint_times(monkeypatch):
+    now = 1_000_000
+    monkeypatch.setattr(time, "time", lambda: now)
+    hint_times = HintTimes(TEST_GUILD_ID)
+    hint_times.record_hint(1, 1, HintType.ITEM, "foo", ["bar"])
+    hint_times.record_hint(1, 1, HintType.CHECK, "baz", ["qux"])
+    now += 60
+    hint_times.record_hint(2, 1, HintType.ITEM, "foo", ["bar"])
+    now += DEFAULT_HINT_COOLDOWN_SEC - 60
+    # Asker 1's hint times have expired, so they're not saved
+    hint_times.record_hint(1, 1, HintType.ITEM, "quux", ["bar"])
+    saved = load(hint_times_fname)[HintTimes.HINT_TIMES_KEY]
+    assert saved == {
+        "1": {"item": now},
+        "2": {"item": now - DEFAULT_HINT_COOLDOWN_SEC + 60},
+    }
+    assert HintTimes(TEST_GUILD_ID).hint_times == hint_times.hint_times
+
+    # A longer cooldown keeps hint times around for longer
+    hint_times.set_cooldown(60, HintType.CHECK)
+    hint_times.record_hint(3, 1, HintType.CHECK, "baz", ["qux"])
+    now += 30 * 60
+    assert hint_times.attempt_hint(3, HintType.CHECK) == now + 30 * 60
+    hint_times.sweep_hint_times()
+    # Asker 2's hint time would have expired with the default cooldown
+    assert set(hint_times.hint_times) == {1, 2, 3}
+    now += 30 * 60
+    hint_times.sweep_hint_times()
+    assert hint_times.hint_times == {}
+    assert hint_times.hint_time_heap == []
@@ -11,7 +11,7 @@ owl_spoiler_file = "owl_spoiler.txt"
 def test_generate_item_aliases():
     with open(owl_spoiler_file, "r") as f:
         spoiler_lines = f.read().split("\n")
-    resp, item_locs, checks, entrances = handle_spoiler_log(
+    report, item_locs, checks, entrances, _, _ = handle_spoiler_log(
         spoiler_lines, TEST_GUILD_ID
     )
     item_aliases = item_locs.aliases
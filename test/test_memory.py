@@ -0,0 +1,36 @@
+import sys
+from test.conftest import TEST_GUILD_ID
+
+from guild import Guild
+from hint_log import HintEvent, HintLog
+from memory import format_bytes, get_deep_size
+from utils import HintType
+
+
+def test_deep_size():
+    shared = "x" * 1000
+    data = {"a": [shared, shared], "b": (shared,)}
+    size = get_deep_size(data)
+    assert sys.getsizeof(shared) < size < 2 * sys.getsizeof(shared)
+
+    # Objects already counted with the same seen set aren't counted again
+    seen = set()
+    get_deep_size(shared, seen)
+    assert get_deep_size(data, seen) == size - sys.getsizeof(shared)
+
+
+def test_guild_memory_footprint():
+    g = Guild(TEST_GUILD_ID)
+    footprint = g.get_memory_footprint()
+    assert footprint.keys() >= {"item_locations", "hint_times", "hint_log"}
+    # The hint log only grows, so it's counted with the rest of the guild's state
+    for i in range(1000):
+        g.hint_log.record(i, 1, HintType.ITEM, HintEvent.NEW)
+    hint_log_size = g.get_memory_footprint()["hint_log"]
+    assert hint_log_size - footprint["hint_log"] >= 1000 * HintLog.RECORD.size
+
+
+def test_format_bytes():
+    assert format_bytes(512) == "512 B"
+    assert format_bytes(2048) == "2.0 KiB"
+    assert format_bytes(3 * 1024**3) == "3.0 GiB"
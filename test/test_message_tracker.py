@@ -1,10 +1,17 @@
 import asyncio
 from test.conftest import TEST_GUILD_ID
-from test.utils import MockBot, MockChannel, MockMessage
+from test.utils import MockBot, MockChannel, MockMessage, MockRateLimiter
+from unittest.mock import MagicMock
 
+import pytest
+from discord.errors import HTTPException
+
+import message_tracker as message_tracker_module
+import metrics
 from message_tracker import MessageTracker
 from utils import (
     HintType,
+    PlayerShowHints,
     SuccessfulHintResult,
     compose_show_hints_message,
     get_hint_types,
@@ -21,7 +28,9 @@ def test_edit_messages():
         player_hint_data = {HintType.ITEM: {hint_result.item_name: hint_result.results}}
 
         # No problem if nothing is recorded
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
 
         # Create some messages to track
         show_hints1 = MockMessage(1, "initial content")
@@ -65,7 +74,9 @@ def test_edit_messages():
 
         # Record item hint for player 1 with a result in player's 2 world. Should see updates in player 1's show-hints
         # for types all and item, and player 2's show-checks.
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
         assert show_hints1.content == compose_show_hints_message(
             get_hint_types("all"), player_hint_data
         )
@@ -95,11 +106,105 @@ def test_show_checks_adds_to_existing_message():
         channel = MockChannel(1, [show_checks])
         bot = MockBot([channel])
         message_tracker.track_show_checks_message(2, channel.id, show_checks.id)
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
+        assert (
+            show_checks.content
+            == "- Location 1: Player 1 Fire Arrows\n- bar: Player 1 foo"
+        )
+
+    asyncio.run(test())
+
+
+def test_edit_messages_without_fetching():
+    async def test():
+        # Messages tracked with their content should be edited from the local mirror, without fetching
+        message_tracker = MessageTracker(TEST_GUILD_ID)
+        hint_result = SuccessfulHintResult(
+            "foo", ["World 2 bar"], HintType.ITEM, 1, True
+        )
+        player_hint_data = {HintType.ITEM: {hint_result.item_name: hint_result.results}}
+
+        show_hints = MockMessage(1, "initial content")
+        show_checks = MockMessage(2, "- Location 1: Player 1 Fire Arrows")
+        channel = MockChannel(1, [show_hints, show_checks])
+        bot = MockBot([channel])
+        message_tracker.track_show_hints_message(
+            1, "all", channel.id, show_hints.id, show_hints.content
+        )
+        message_tracker.track_show_checks_message(
+            2, channel.id, show_checks.id, show_checks.content
+        )
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
+        assert show_hints.content == compose_show_hints_message(
+            get_hint_types("all"), player_hint_data
+        )
         assert (
             show_checks.content
             == "- Location 1: Player 1 Fire Arrows\n- bar: Player 1 foo"
         )
+        assert channel.fetch_count == 0
+        assert show_hints.edit_count == 1 and show_checks.edit_count == 1
+
+        # The mirror tracks edits, so later appends build on the edited content
+        hint_result2 = SuccessfulHintResult(
+            "baz", ["World 2 qux"], HintType.ITEM, 1, True
+        )
+        await message_tracker.edit_messages(
+            bot, hint_result2, PlayerShowHints(player_hint_data)
+        )
+        assert (
+            show_checks.content
+            == "- Location 1: Player 1 Fire Arrows\n- bar: Player 1 foo\n- qux: Player 1 baz"
+        )
+        assert channel.fetch_count == 0
+
+    asyncio.run(test())
+
+
+def test_skip_unchanged_edits():
+    async def test():
+        # Edits that wouldn't change a message's content should be skipped
+        message_tracker = MessageTracker(TEST_GUILD_ID)
+        hint_result = SuccessfulHintResult(
+            "foo", ["World 2 bar"], HintType.ITEM, 1, True
+        )
+        player_hint_data = {HintType.ITEM: {hint_result.item_name: hint_result.results}}
+        expected_content = compose_show_hints_message(
+            get_hint_types("all"), player_hint_data
+        )
+
+        already_current = MockMessage(1, expected_content)
+        outdated = MockMessage(2, "initial content")
+        channel = MockChannel(1, [already_current, outdated])
+        bot = MockBot([channel])
+        message_tracker.track_show_hints_message(
+            1, "all", channel.id, already_current.id, already_current.content
+        )
+        message_tracker.track_show_hints_message(
+            1, "all", channel.id, outdated.id, outdated.content
+        )
+
+        skipped_before = metrics.counters["message_edits_skipped"]
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
+        assert already_current.edit_count == 0
+        assert outdated.edit_count == 1 and outdated.content == expected_content
+        # Rendering the same content again skips both
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
+        assert already_current.edit_count == 0 and outdated.edit_count == 1
+        assert metrics.counters["message_edits_skipped"] == skipped_before + 3
+
+        # Skipped messages stay tracked
+        assert message_tracker.show_hints_messages[1] == {
+            "all": {channel.id: [already_current.id, outdated.id]}
+        }
 
     asyncio.run(test())
 
@@ -123,7 +228,9 @@ def test_edit_multiple_messages():
         message_tracker.track_show_hints_message(1, "item", channel1.id, show_hints2.id)
         message_tracker.track_show_hints_message(1, "item", channel2.id, show_hints3.id)
 
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
         expected_content = compose_show_hints_message(
             get_hint_types("all"), player_hint_data
         )
@@ -150,7 +257,9 @@ def test_edit_multiple_player_show_checks():
         message_tracker.track_show_checks_message(2, channel.id, show_checks2.id)
         message_tracker.track_show_checks_message(3, channel.id, show_checks3.id)
 
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
         assert show_checks2.content == "- bar: Player 1 foo"
         assert show_checks3.content == "- baz: Player 1 foo"
 
@@ -185,7 +294,9 @@ def test_edit_messages_deleted():
         )
         message_tracker.track_show_checks_message(2, channel.id, show_checks1.id)
         message_tracker.track_show_checks_message(2, channel.id, show_checks2.id)
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
 
         # Existing messages should be updated
         assert show_hints2.content == compose_show_hints_message(
@@ -205,7 +316,11 @@ def test_edit_messages_deleted():
 
         # Delete the remaining messages. Tracker should no longer include the channel after another edit call
         channel.messages = {}
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        # Another hint, so that the edits aren't skipped as unchanged
+        player_hint_data[HintType.ITEM]["baz"] = ["World 2 qux"]
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
         # don't really care that it keeps 1 as a key in show_hints_messages, as long as it drops the channel ref
         assert message_tracker.show_hints_messages[1] == {}
         assert 2 not in message_tracker.show_checks_msgs
@@ -239,7 +354,9 @@ def test_edit_channels_deleted():
         )
         message_tracker.track_show_checks_message(2, 1, show_checks1.id)
         message_tracker.track_show_checks_message(2, channel2.id, show_checks2.id)
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
 
         # Existing messages should be updated
         assert show_hints2.content == compose_show_hints_message(
@@ -259,9 +376,236 @@ def test_edit_channels_deleted():
 
         # Delete the remaining channel. Tracker should no longer include the channel after another edit call
         bot.channels = {}
-        await message_tracker.edit_messages(bot, hint_result, player_hint_data)
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
         # don't really care that it keeps 1 as a key in show_hints_messages, as long as it drops the channel ref
         assert message_tracker.show_hints_messages[1] == {}
         assert 2 not in message_tracker.show_checks_msgs
 
     asyncio.run(test())
+
+
+def test_edit_messages_concurrently(monkeypatch):
+    async def test():
+        # Fetches and edits should overlap, without exceeding the cap on requests in flight
+        monkeypatch.setattr(message_tracker_module, "MAX_CONCURRENT_REQUESTS", 3)
+        in_flight, max_in_flight = 0, 0
+
+        class CountingMessage(MockMessage):
+            async def edit(self, content):
+                nonlocal in_flight, max_in_flight
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await super().edit(content)
+                in_flight -= 1
+
+        message_tracker = MessageTracker(TEST_GUILD_ID, max_messages_per_channel=10)
+        hint_result = SuccessfulHintResult(
+            "foo", ["World 2 bar"], HintType.ITEM, 1, True
+        )
+        player_hint_data = {HintType.ITEM: {hint_result.item_name: hint_result.results}}
+        messages = [CountingMessage(i, "initial content", 0.01) for i in range(10)]
+        channel = MockChannel(1, messages)
+        bot = MockBot([channel])
+        for message in messages:
+            message_tracker.track_show_hints_message(1, "all", channel.id, message.id)
+
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
+        expected_content = compose_show_hints_message(
+            get_hint_types("all"), player_hint_data
+        )
+        assert all(message.content == expected_content for message in messages)
+        assert max_in_flight == 3
+
+    asyncio.run(test())
+
+
+def test_edit_messages_rate_limited():
+    async def test():
+        # Rate limits are waited out by discord.py's HTTP client, as the mock rate limiter does, so edits still land
+        message_tracker = MessageTracker(TEST_GUILD_ID)
+        hint_result = SuccessfulHintResult(
+            "foo", ["World 2 bar"], HintType.ITEM, 1, True
+        )
+        player_hint_data = {HintType.ITEM: {hint_result.item_name: hint_result.results}}
+        messages = [MockMessage(i, "initial content") for i in range(1, 4)]
+        rate_limiter = MockRateLimiter(2, 0.05)
+        channel = MockChannel(1, messages, rate_limiter=rate_limiter)
+        bot = MockBot([channel])
+        for message in messages:
+            message_tracker.track_show_hints_message(1, "item", channel.id, message.id)
+
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
+        assert rate_limiter.rate_limited_count > 0
+        expected_content = compose_show_hints_message([HintType.ITEM], player_hint_data)
+        assert all(message.content == expected_content for message in messages)
+
+        # A 429 that discord.py gave up on is raised as is, without retrying on top of discord.py's retries
+        class RateLimitedMessage(MockMessage):
+            def __init__(self, id, content):
+                super().__init__(id, content)
+                self.attempts = 0
+
+            async def edit(self, content):
+                self.attempts += 1
+                raise HTTPException(MagicMock(status=429), "rate limited")
+
+        show_hints = RateLimitedMessage(4, "initial content")
+        channel = MockChannel(2, [show_hints])
+        bot = MockBot([channel])
+        message_tracker.track_show_hints_message(1, "all", channel.id, show_hints.id)
+        with pytest.raises(HTTPException):
+            await message_tracker.edit_messages(
+                bot, hint_result, PlayerShowHints(player_hint_data)
+            )
+        assert show_hints.attempts == 1
+
+    asyncio.run(test())
+
+
+def test_forget_messages():
+    message_tracker = MessageTracker(TEST_GUILD_ID)
+    message_tracker.track_show_hints_message(1, "all", 1, 1)
+    message_tracker.track_show_hints_message(1, "all", 1, 2)
+    message_tracker.track_show_hints_message(1, "item", 2, 3)
+    message_tracker.track_show_checks_message(2, 1, 4, "- foo: Player 1 bar")
+    message_tracker.track_show_checks_message(2, 2, 5, "- foo: Player 1 bar")
+
+    # Untracked messages and channels are ignored
+    assert not message_tracker.forget_messages(1, [6])
+    assert not message_tracker.forget_channel(3)
+
+    assert message_tracker.forget_messages(1, [1])
+    assert message_tracker.show_hints_messages[1]["all"] == {1: [2]}
+
+    # Bulk delete
+    assert message_tracker.forget_messages(1, {2, 4, 6})
+    assert message_tracker.show_hints_messages[1] == {"item": {2: [3]}}
+    assert message_tracker.show_checks_msgs == {2: {2: [5]}}
+    assert 4 not in message_tracker.message_contents
+    assert 1 not in message_tracker.channel_index
+
+    # Channel delete
+    assert message_tracker.forget_channel(2)
+    assert message_tracker.show_hints_messages[1] == {}
+    assert message_tracker.show_checks_msgs == {}
+    assert message_tracker.channel_index == {}
+
+    # Forgotten messages stay forgotten after reloading from file
+    assert MessageTracker(TEST_GUILD_ID).channel_index == {}
+
+
+def test_no_edits_for_forgotten_messages():
+    async def test():
+        message_tracker = MessageTracker(TEST_GUILD_ID)
+        hint_result = SuccessfulHintResult(
+            "foo", ["World 2 bar"], HintType.ITEM, 1, True
+        )
+        player_hint_data = {HintType.ITEM: {hint_result.item_name: hint_result.results}}
+
+        show_hints = MockMessage(1, "initial content")
+        channel = MockChannel(1, [show_hints])
+        bot = MockBot([channel])
+        message_tracker.track_show_hints_message(1, "all", channel.id, show_hints.id)
+        message_tracker.track_show_hints_message(1, "all", channel.id, 2)
+        message_tracker.forget_messages(channel.id, [2])
+
+        edited_ids = []
+
+        def get_partial_message(message_id):
+            edited_ids.append(message_id)
+            return MockChannel.get_partial_message(channel, message_id)
+
+        channel.get_partial_message = get_partial_message
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
+        assert edited_ids == [show_hints.id]
+
+    asyncio.run(test())
+
+
+def test_max_messages_per_channel():
+    message_tracker = MessageTracker(TEST_GUILD_ID, max_messages_per_channel=2)
+    for message_id in range(1, 5):
+        message_tracker.track_show_hints_message(1, "all", 1, message_id, "content")
+    message_tracker.track_show_hints_message(1, "item", 1, 5)
+    message_tracker.track_show_hints_message(1, "all", 2, 6)
+    for message_id in range(7, 10):
+        message_tracker.track_show_checks_message(2, 1, message_id, "content")
+
+    # Only the most recent messages are kept per player, view and channel
+    assert message_tracker.show_hints_messages[1] == {
+        "all": {1: [3, 4], 2: [6]},
+        "item": {1: [5]},
+    }
+    assert message_tracker.show_checks_msgs[2] == {1: [8, 9]}
+    assert set(message_tracker.channel_index[1]) == {3, 4, 5, 8, 9}
+    assert set(message_tracker.content_hashes) == {3, 4, 8, 9}
+    assert set(message_tracker.message_contents) == {8, 9}
+
+
+def test_edit_budget():
+    async def test():
+        message_tracker = MessageTracker(TEST_GUILD_ID, edit_budget=2)
+        hint_result = SuccessfulHintResult(
+            "foo", ["World 2 bar"], HintType.ITEM, 1, True
+        )
+        player_hint_data = {HintType.ITEM: {hint_result.item_name: hint_result.results}}
+
+        messages = [MockMessage(i, "initial content") for i in range(1, 4)]
+        show_checks = MockMessage(4, "- Location 1: Player 1 Fire Arrows")
+        channels = [MockChannel(i, [message]) for i, message in enumerate(messages)]
+        channels.append(MockChannel(3, [show_checks]))
+        bot = MockBot(channels)
+        for channel, message in zip(channels, messages):
+            message_tracker.track_show_hints_message(1, "all", channel.id, message.id)
+        message_tracker.track_show_checks_message(
+            2, channels[3].id, show_checks.id, show_checks.content
+        )
+
+        # Only the two newest messages are edited
+        await message_tracker.edit_messages(
+            bot, hint_result, PlayerShowHints(player_hint_data)
+        )
+        expected_content = compose_show_hints_message(
+            get_hint_types("all"), player_hint_data
+        )
+        assert [message.edit_count for message in messages] == [0, 0, 1]
+        assert show_checks.edit_count == 1
+        assert set(message_tracker.stale_messages) == {1, 2}
+
+        # Stale messages are refreshed when the player's view is requested again
+        await message_tracker.refresh_stale_messages(
+            bot, 2, lambda _: PlayerShowHints(player_hint_data)
+        )
+        assert [message.edit_count for message in messages] == [0, 0, 1]
+        await message_tracker.refresh_stale_messages(
+            bot, 1, lambda _: PlayerShowHints(player_hint_data)
+        )
+        assert all(message.content == expected_content for message in messages)
+        assert message_tracker.stale_messages == {}
+
+        # Deferred !show-checks appends aren't lost
+        message_tracker.edit_budget = 0
+        hint_result2 = SuccessfulHintResult(
+            "baz", ["World 2 qux"], HintType.ITEM, 1, True
+        )
+        await message_tracker.edit_messages(
+            bot, hint_result2, PlayerShowHints(player_hint_data)
+        )
+        assert show_checks.edit_count == 1
+        await message_tracker.refresh_stale_messages(
+            bot, 2, lambda _: PlayerShowHints(player_hint_data)
+        )
+        assert (
+            show_checks.content
+            == "- Location 1: Player 1 Fire Arrows\n- bar: Player 1 foo\n- qux: Player 1 baz"
+        )
+
+    asyncio.run(test())
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "counters", metrics.Counter())
+    monkeypatch.setattr(metrics, "gauges", {})
+    monkeypatch.setattr(metrics, "histograms", {})
+
+
+def test_histogram():
+    histogram = metrics.Histogram((0.01, 0.1, 1))
+    for value in [0.005] * 50 + [0.05] * 45 + [0.5] * 4 + [5]:
+        histogram.observe(value)
+    assert histogram.bucket_counts == [50, 45, 4, 1]
+    assert histogram.count == 100
+    assert histogram.sum == pytest.approx(0.25 + 2.25 + 2 + 5)
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.9) == 0.1
+    assert histogram.quantile(0.99) == 1
+    assert histogram.quantile(1) == float("inf")
+
+
+def test_timed():
+    @metrics.timed("sync_seconds")
+    def sync_func(x):
+        return x + 1
+
+    @metrics.timed("async_seconds")
+    async def async_func(x):
+        return x + 2
+
+    assert sync_func(1) == 2
+    assert asyncio.run(async_func(1)) == 3
+    assert metrics.histograms["sync_seconds"].count == 1
+    assert metrics.histograms["async_seconds"].count == 1
+
+
+def test_increment_for_command():
+    async def command(name):
+        metrics.current_command.set(name)
+        metrics.increment_for_command("discord_requests_total")
+        # Tasks started by the command are attributed to it too
+        await asyncio.create_task(request())
+
+    async def request():
+        metrics.increment_for_command("discord_requests_total")
+
+    async def test():
+        await asyncio.gather(command("hint"), command("show-hints"))
+        await request()
+
+    asyncio.run(test())
+    assert metrics.counters == {
+        'discord_requests_total{command="hint"}': 2,
+        'discord_requests_total{command="show-hints"}': 2,
+        "discord_requests_total": 1,
+    }
+
+
+def test_cache_hit_rates():
+    for hit in [True, True, True, False]:
+        metrics.record_cache_lookup("foo", hit)
+    metrics.record_cache_lookup("bar", False)
+    assert metrics.get_cache_hit_rates() == {"foo": (0.75, 4), "bar": (0, 1)}
+
+
+def test_prometheus_text():
+    metrics.increment("message_edits", 3)
+    metrics.observe("command_seconds", 0.002, {"command": "hint"})
+    text = metrics.to_prometheus_text()
+    assert "# TYPE message_edits counter\nmessage_edits 3\n" in text
+    assert "# TYPE command_seconds histogram\n" in text
+    assert 'command_seconds_bucket{command="hint",le="0.001"} 0\n' in text
+    assert 'command_seconds_bucket{command="hint",le="0.005"} 1\n' in text
+    assert 'command_seconds_bucket{command="hint",le="+Inf"} 1\n' in text
+    assert 'command_seconds_count{command="hint"} 1\n' in text
+
+
+def test_gauges():
+    metrics.set_gauge("guild_memory_bytes", 100, {"guild": "1", "component": "checks"})
+    metrics.set_gauge("guild_memory_bytes", 200, {"guild": "2", "component": "checks"})
+    metrics.set_gauge("loaded_guilds", 2)
+    text = metrics.to_prometheus_text()
+    assert "# TYPE guild_memory_bytes gauge\n" in text
+    assert 'guild_memory_bytes{component="checks",guild="2"} 200\n' in text
+    metrics.clear_gauges("guild_memory_bytes")
+    assert metrics.gauges == {"loaded_guilds": 2}
+
+
+def test_compose_stats_message():
+    metrics.observe("command_seconds", 0.002, {"command": "hint"})
+    metrics.increment("discord_requests_total", 2, {"command": "hint"})
+    metrics.increment("disk_bytes_written_total", 2048, {"command": "hint"})
+    metrics.record_cache_lookup("player_roles", True)
+    message = metrics.compose_stats_message()
+    assert "- hint: 1, 5ms/5ms, 2" in message
+    assert "**Discord requests:** 2" in message
+    assert "**Disk written:** 2.0 KiB" in message
+    assert "- player_roles: 100% of 1" in message
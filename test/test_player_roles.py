@@ -0,0 +1,72 @@
+from test.utils import MockAuthor, MockRole
+from types import SimpleNamespace
+
+import pytest
+
+from player_roles import PlayerRoleCache
+
+
+def test_get_player_num():
+    cache = PlayerRoleCache()
+    author = MockAuthor(1)
+    author.roles = [MockRole("foo", 10), MockRole("player5", 11)]
+    assert cache.get_player_num(author) == 5
+    assert cache.get_members(5) == {1}
+
+    # Cached: a role change the cache wasn't told about isn't noticed
+    author.roles = [MockRole("player6", 12)]
+    assert cache.get_player_num(author) == 5
+
+    # Member update event
+    cache.update_member(author)
+    assert cache.get_player_num(author) == 6
+    assert cache.get_members(5) == set()
+    assert cache.get_members(6) == {1}
+
+    # Role delete event
+    cache.forget_role(11)  # a role the member no longer has
+    assert cache.members[1][1] == 6
+    cache.forget_role(12)
+    assert 1 not in cache.members
+    assert cache.get_members(6) == set()
+
+
+def test_update_role():
+    cache = PlayerRoleCache()
+    role = MockRole("player5")
+    author = MockAuthor(1)
+    author.roles = [role]
+    other_author = MockAuthor(2)
+    other_author.roles = [role]
+    assert cache.get_player_num(author) == 5
+    assert cache.get_members(5) == {1}
+
+    # Renaming the role indexes all its members, including those who haven't run a command
+    role.name = "player7"
+    cache.update_role(SimpleNamespace(id=role.id, members=[author, other_author]))
+    assert cache.get_members(5) == set()
+    assert cache.get_members(7) == {1, 2}
+    assert cache.get_player_num(other_author) == 7
+
+
+def test_get_player_num_errors():
+    cache = PlayerRoleCache()
+    author = MockAuthor(1, "player5")
+    other_author = MockAuthor(2, "player5")
+    assert cache.get_player_num(author) == 5
+    assert cache.get_player_num(other_author) == 5
+    assert cache.get_members(5) == {1, 2}
+
+    author.roles.append(MockRole("player8"))
+    cache.update_member(author)
+    with pytest.raises(ValueError, match="multiple player roles"):
+        cache.get_player_num(author)
+    # Errors are cached too
+    assert cache.members[1][1].startswith("You have multiple")
+    with pytest.raises(ValueError, match="multiple player roles"):
+        cache.get_player_num(author)
+    assert cache.get_members(5) == {2}
+
+    cache.forget_member(2)
+    assert cache.get_members(5) == set()
+    assert cache.players == {}
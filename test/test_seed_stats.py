@@ -0,0 +1,87 @@
+from array import array
+from test.conftest import TEST_GUILD_ID
+
+from bench.spoiler_generator import generate_spoiler_log
+from hint_data import HintData
+from hint_times import HintTimes
+from seed_stats import COUNT_TYPECODE, SeedStats, get_seed_stats_response
+from spoiler_log_handler import handle_spoiler_log
+from utils import HintType
+
+
+def test_seed_stats():
+    spoiler = generate_spoiler_log(3, 300, areas_per_world=10)
+    _, item_locs, _, _, seed_stats, _ = handle_spoiler_log(spoiler, TEST_GUILD_ID)
+
+    # Counts agree with item locations
+    for player in range(1, 4):
+        for world in range(1, 4):
+            results = [
+                result
+                for item in item_locs.items.values()
+                for result in item[HintData.RESULTS_KEY][player - 1]
+                if result.startswith(f"World {world} ")
+            ]
+            assert seed_stats.get_count(world, player)[0] == len(results)
+    assert sum(seed_stats.get_world_counts(1)) == sum(
+        len(item[HintData.RESULTS_KEY][0]) for item in item_locs.items.values()
+    )
+
+    # Loaded from file
+    loaded = SeedStats(TEST_GUILD_ID)
+    assert loaded.item_keys == seed_stats.item_keys
+    assert loaded.counts == seed_stats.counts
+    assert loaded.world_receiver_distinct == seed_stats.world_receiver_distinct
+
+    # Totals per world and per receiving player agree with the world x receiver counts
+    assert sum(seed_stats.world_counts) == sum(seed_stats.counts)
+    assert seed_stats.world_counts.tolist() == [
+        sum(seed_stats.get_receiver_counts(world)) for world in range(1, 4)
+    ]
+    assert seed_stats.receiver_counts.tolist() == [
+        sum(seed_stats.get_world_counts(player)) for player in range(1, 4)
+    ]
+
+
+def test_seed_stats_large_counts():
+    # Counts don't wrap at 16 bits
+    counts = SeedStats.get_empty_counts(1, 1)
+    counts[0] = 70000
+    SeedStats(TEST_GUILD_ID, 1, ["rupee"], counts)
+    loaded = SeedStats(TEST_GUILD_ID)
+    assert loaded.get_count(1, 1) == (70000, 1)
+    assert loaded.world_counts.tolist() == [70000]
+
+
+def test_seed_stats_response():
+    # 2 players, 2 worlds, 2 items
+    counts = [0] * 8
+    counts[SeedStats.get_index(2, 0, 0, 1)] = 3  # 3 Hookshots in world 1 for player 2
+    counts[SeedStats.get_index(2, 1, 1, 1)] = 1  # 1 Bow in world 2 for player 2
+    counts[SeedStats.get_index(2, 1, 0, 1)] = 1  # 1 Bow in world 1 for player 2
+    seed_stats = SeedStats(
+        TEST_GUILD_ID, 2, ["hookshot", "bow"], array(COUNT_TYPECODE, counts)
+    )
+    hint_times = HintTimes(TEST_GUILD_ID)
+    hint_times.record_hint(1, 2, HintType.ITEM, "Hookshot", ["World 1 Chest"])
+
+    assert get_seed_stats_response(None, None, seed_stats, hint_times) == (
+        "**Hintable items by world:** total, for the world's own player\n"
+        + "- World 1: 4, 0\n- World 2: 1, 1"
+    )
+    assert get_seed_stats_response(2, None, seed_stats, hint_times) == (
+        "**Player 2's 5 hintable items by world:**\n- World 1: 4\n- World 2: 1"
+    )
+    assert get_seed_stats_response(None, 1, seed_stats, hint_times) == (
+        "**World 1's 4 hintable items by player:**\n- Player 2: 4"
+    )
+    assert get_seed_stats_response(2, 1, seed_stats, hint_times) == (
+        "World 1 holds 4 of player 2's hintable items (2 different).\n"
+        + "Redeemed hints there: Hookshot"
+    )
+    assert get_seed_stats_response(2, 2, seed_stats, hint_times) == (
+        "World 2 holds 1 of player 2's hintable items (1 different)."
+    )
+    assert get_seed_stats_response(3, None, seed_stats, hint_times) == (
+        "Invalid player number 3."
+    )
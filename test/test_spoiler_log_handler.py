@@ -1,23 +1,39 @@
+import os
 from test.conftest import TEST_GUILD_ID
 
+import seed_data
+import utils
+from bench.spoiler_generator import (
+    MM_ENTRANCES,
+    OOT_ENTRANCES,
+    generate_spoiler_log,
+)
 from hint_data import HintData
+from item_locations import ItemLocations
 from spoiler_log_handler import handle_spoiler_log
 
 sample_spoiler_file = "sample_spoiler.txt"
 
 
 def test_empty_spoiler():
-    resp, item_locs, checks, entrances = handle_spoiler_log([], TEST_GUILD_ID)
-    assert resp == "Failed to find player count. Could not extract data."
+    report, item_locs, checks, entrances, _, _ = handle_spoiler_log([], TEST_GUILD_ID)
+    assert report.message == "Failed to find player count. Could not extract data."
     assert item_locs.items == {} and checks.items == {} and entrances.items == {}
+    assert not report.accepted
 
 
 def test_no_entrances_or_locations():
-    resp, item_locs, checks, entrances = handle_spoiler_log(
+    report, item_locs, checks, entrances, _, _ = handle_spoiler_log(
         ["  players: 2"], TEST_GUILD_ID
     )
-    assert resp == "Location list is missing or empty. Could not extract data."
+    assert (
+        report.message == "Location list is missing or empty. Could not extract data."
+    )
     assert item_locs.items == {} and checks.items == {} and entrances.items == {}
+    assert not report.accepted
+    # The guild's files are only replaced by an accepted log
+    assert "file writes" not in report.phase_times
+    assert not os.path.exists(ItemLocations(TEST_GUILD_ID).filename)
 
 
 def test_spoiler_no_entrances():
@@ -32,10 +48,10 @@ Location List (2)
     Tingle (1):
       MM Tingle Map Clock Town: Player 2 Light Arrows (MM)
     """
-    resp, item_locs, checks, entrances = handle_spoiler_log(
+    report, item_locs, checks, entrances, _, _ = handle_spoiler_log(
         spoiler.split("\n"), TEST_GUILD_ID
     )
-    assert resp == "Spoiler log processed successfully!"
+    assert report.message == "Spoiler log processed successfully!"
     assert entrances.items == {}
     assert item_locs.items == {
         "light arrows": {
@@ -67,10 +83,12 @@ Entrances
   World 2
     MM Clock Tower Platform to MM Clock Tower Roof (MM_CLOCK_TOWER_ROOF) -> MM Woodfall Temple from MM Woodfall Front of Temple (MM_TEMPLE_WOODFALL)
     """
-    resp, item_locs, checks, entrances = handle_spoiler_log(
+    report, item_locs, checks, entrances, _, _ = handle_spoiler_log(
         spoiler.split("\n"), TEST_GUILD_ID
     )
-    assert resp == "Location list is missing or empty. Could not extract data."
+    assert (
+        report.message == "Location list is missing or empty. Could not extract data."
+    )
     assert item_locs.items == {} and checks.items == {}
     assert entrances.items == {
         "woodfall temple": {
@@ -86,10 +104,10 @@ Entrances
 def test_complete_spoiler():
     with open(sample_spoiler_file, "r") as f:
         spoiler_lines = f.read().split("\n")
-    resp, item_locs, checks, entrances = handle_spoiler_log(
+    report, item_locs, checks, entrances, _, _ = handle_spoiler_log(
         spoiler_lines, TEST_GUILD_ID
     )
-    assert resp == "Spoiler log processed successfully!"
+    assert report.message == "Spoiler log processed successfully!"
     assert item_locs.items == {
         # The spoiler log also contains a Red Rupee and a 10 Deku Nuts, which should be ignored
         "progressive sword": {
@@ -159,3 +177,107 @@ def test_complete_spoiler():
             ],
         },
     }
+
+
+def test_generated_spoiler():
+    for entrances in (True, False):
+        spoiler = generate_spoiler_log(3, 200, entrances, areas_per_world=10)
+        report, item_locs, checks, entrances_data, _, _ = handle_spoiler_log(
+            spoiler, TEST_GUILD_ID
+        )
+        assert report.message == "Spoiler log processed successfully!"
+        assert len(checks.items) == 200
+        assert all(
+            len(results) == 1
+            for check in checks.items.values()
+            for results in check[HintData.RESULTS_KEY]
+        )
+        assert len(item_locs.items)
+        # Each world's entrances are shuffled, besides return and wallmaster entrances
+        entrance_count = len(MM_ENTRANCES) + len(OOT_ENTRANCES)
+        assert len(entrances_data.items) == (entrance_count if entrances else 0)
+
+
+def test_ingest_report():
+    spoiler = generate_spoiler_log(3, 200, areas_per_world=10)
+    report, item_locs, checks, entrances, _, _ = handle_spoiler_log(
+        spoiler, TEST_GUILD_ID
+    )
+    assert report.player_count == 3
+    assert report.line_count == len(spoiler)
+    assert set(report.world_location_counts) == {1, 2, 3}
+    assert sum(report.world_location_counts.values()) == 3 * 200
+    assert set(report.world_entrance_counts) == {1, 2, 3}
+    assert report.area_count == 10
+    assert report.check_count == len(checks.items)
+    assert {
+        "player count",
+        "entrances",
+        "locations",
+        "hint data",
+        "file writes",
+    } <= set(report.phase_times)
+    summary = report.summary()
+    assert summary.startswith("Spoiler log processed successfully!\n-# ")
+    assert "3 worlds: 600 locations in 10 areas" in summary
+
+
+def test_unparsed_lines_deduplicated():
+    spoiler = ["  players: 1", "Location List (1)", "  World 1 (1)"]
+    spoiler += [f"    Bad Area {i}" for i in range(15)] + ["    Bad Area 0"] * 2
+    spoiler += [
+        "    Tingle (1):",
+        "      MM Tingle Map Clock Town: Player 1 Light Arrows (MM)",
+    ]
+    report, item_locs, checks, entrances, _, _ = handle_spoiler_log(
+        spoiler, TEST_GUILD_ID
+    )
+    assert report.unparsed_lines["    Bad Area 0"] == 3
+    message_lines = report.get_unparsed_lines_message().split("\n")
+    assert message_lines[0] == "||    Bad Area 0 (x3)"
+    assert len(message_lines) == 11
+    assert message_lines[-1] == "...and 5 more||"
+
+
+def test_strings_interned(monkeypatch):
+    # Identical hint data would otherwise be one shared object, whose strings are trivially the same
+    monkeypatch.setattr(seed_data, "_sharing_enabled", False)
+    spoiler = generate_spoiler_log(2, 50, areas_per_world=5)
+    _, item_locs, checks, _, _, _ = handle_spoiler_log(spoiler, TEST_GUILD_ID)
+    # Copies, so nothing is shared with the first ingest's lines
+    _, other_item_locs, other_checks, _, _, _ = handle_spoiler_log(
+        [line.encode().decode() for line in spoiler], f"{TEST_GUILD_ID}-2"
+    )
+    assert checks.items is not other_checks.items
+    check_key = next(iter(checks.items))
+    other_check_key = next(iter(other_checks.items))
+    assert check_key is other_check_key
+    result = checks.items[check_key][HintData.RESULTS_KEY][0][0]
+    assert result is other_checks.items[check_key][HintData.RESULTS_KEY][0][0]
+
+    # Strings loaded from file are interned too
+    loaded_item_locs = ItemLocations(TEST_GUILD_ID)
+    assert loaded_item_locs.items is not item_locs.items
+    item_key = next(iter(item_locs.items))
+    loaded_item_key = next(iter(loaded_item_locs.items))
+    assert loaded_item_key is item_key
+    assert (
+        loaded_item_locs.items[item_key][HintData.NAME_KEY]
+        is item_locs.items[item_key][HintData.NAME_KEY]
+    )
+
+
+def test_interning_disabled(monkeypatch):
+    # As measured by bench/memory_bench.py --no-sharing
+    monkeypatch.setattr(seed_data, "_sharing_enabled", False)
+    monkeypatch.setattr(utils, "_interning_enabled", False)
+    spoiler = generate_spoiler_log(2, 50, areas_per_world=5)
+    _, _, checks, _, _, _ = handle_spoiler_log(spoiler, TEST_GUILD_ID)
+    _, _, other_checks, _, _, _ = handle_spoiler_log(
+        [line.encode().decode() for line in spoiler], f"{TEST_GUILD_ID}-2"
+    )
+    check_key = next(iter(checks.items))
+    result = checks.items[check_key][HintData.RESULTS_KEY][0][0]
+    other_result = other_checks.items[check_key][HintData.RESULTS_KEY][0][0]
+    assert result == other_result and result is not other_result
+    assert ItemLocations(TEST_GUILD_ID).items is not ItemLocations(TEST_GUILD_ID).items
@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+import pytest
+
+import metrics
+from stall_detector import StallDetector
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "histograms", {})
+    monkeypatch.setattr(metrics, "recent_stalls", metrics.deque(maxlen=5))
+
+
+def block_event_loop(sec):
+    time.sleep(sec)
+
+
+def test_stall_detector():
+    async def test():
+        stall_detector = StallDetector(threshold_sec=0.05, interval_sec=0.01)
+        stall_detector.start()
+        await asyncio.sleep(0.1)
+        assert not len(metrics.recent_stalls)
+
+        block_event_loop(0.3)
+        await asyncio.sleep(0.05)
+        stall_detector.stop()
+
+        assert len(metrics.recent_stalls) == 1
+        duration_sec, location = metrics.recent_stalls[0]
+        assert 0.25 < duration_sec < 0.35
+        assert location.startswith("test/test_stall_detector.py:")
+        assert location.endswith(" in block_event_loop")
+        assert metrics.histograms["event_loop_stall_seconds"].count == 1
+
+    asyncio.run(test())
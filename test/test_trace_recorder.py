@@ -0,0 +1,54 @@
+import asyncio
+import os
+from test.conftest import TEST_GUILD_ID
+from test.utils import MockAttachment, MockAuthor, MockChannel, MockContext, MockRole
+
+from trace_recorder import TraceRecorder, read_trace
+
+
+class MockCommand:
+    def __init__(self, name):
+        self.name = name
+
+
+def make_ctx(command, args, kwargs, attachments=None):
+    author = MockAuthor(5)
+    author.roles = [MockRole("player3", 30)]
+    ctx = MockContext(TEST_GUILD_ID, author, MockChannel(7), attachments)
+    ctx.command = MockCommand(command)
+    ctx.args = [ctx] + args
+    ctx.kwargs = kwargs
+    return ctx
+
+
+def test_record_and_read_trace(tmp_path):
+    trace_file = str(tmp_path / "trace.jsonl")
+
+    async def test():
+        recorder = TraceRecorder(trace_file)
+        spoiler = b"  players: 2\n"
+        await recorder.record(make_ctx("set-log", [], {}, [MockAttachment(spoiler)]))
+        await recorder.record(make_ctx("hint", [None], {"query": "light arrows"}))
+        await recorder.record(make_ctx("show-hints", [2, "item"], {}))
+        recorder.close()
+
+        entries = read_trace(trace_file)
+        assert [entry.command for entry in entries] == ["set-log", "hint", "show-hints"]
+        assert all(entry.guild_id == TEST_GUILD_ID for entry in entries)
+        assert all(entry.channel_id == 7 for entry in entries)
+        assert entries[1].author_id == 5
+        assert entries[1].roles == [(30, "player3")]
+        assert entries[1].args == [None]
+        assert entries[1].kwargs == {"query": "light arrows"}
+        assert entries[2].args == [2, "item"]
+        assert entries[0].timestamp <= entries[2].timestamp
+
+        # Attachments are stored once, next to the trace
+        assert len(entries[0].attachments) == 1
+        attachment_file = os.path.join(
+            recorder.attachments_dir, entries[0].attachments[0]
+        )
+        with open(attachment_file, "rb") as f:
+            assert f.read() == spoiler
+
+    asyncio.run(test())
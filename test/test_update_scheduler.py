@@ -0,0 +1,147 @@
+import asyncio
+from test.conftest import TEST_GUILD_ID
+from test.utils import MockBot, MockChannel, MockMessage
+
+from hint_times import HintTimes
+from message_tracker import MessageTracker
+from update_scheduler import UpdateScheduler
+from utils import HintType, SuccessfulHintResult, compose_show_hints_message
+
+
+def record_item_hint(hint_times, item_name, results):
+    hint_times.record_hint(1, 1, HintType.ITEM, item_name, results)
+    return SuccessfulHintResult(item_name, results, HintType.ITEM, 1, True)
+
+
+def test_coalesces_hints():
+    async def test():
+        # Several hints within the window should produce a single edit per tracked message
+        hint_times = HintTimes(TEST_GUILD_ID)
+        message_tracker = MessageTracker(TEST_GUILD_ID)
+        scheduler = UpdateScheduler(
+            message_tracker, hint_times, asyncio.Lock(), 0.05, 1
+        )
+
+        show_hints = MockMessage(1, "initial content")
+        show_item_hints = MockMessage(2, "initial content")
+        show_checks = MockMessage(3, "initial content")
+        channel = MockChannel(1, [show_hints, show_item_hints, show_checks])
+        bot = MockBot([channel])
+        message_tracker.track_show_hints_message(1, "all", channel.id, show_hints.id)
+        message_tracker.track_show_hints_message(
+            1, "item", channel.id, show_item_hints.id
+        )
+        message_tracker.track_show_checks_message(
+            2, channel.id, show_checks.id, show_checks.content
+        )
+
+        hint_count = 10
+        for i in range(hint_count):
+            hint_result = record_item_hint(
+                hint_times, f"item {i}", [f"World 2 check {i}"]
+            )
+            scheduler.schedule(bot, hint_result)
+            await asyncio.sleep(0.01)
+        assert show_hints.edit_count == 0  # still waiting for more hints
+        await scheduler.flush()
+
+        assert show_hints.edit_count == 1
+        assert show_item_hints.edit_count == 1
+        assert show_checks.edit_count == 1
+        expected_content = compose_show_hints_message(
+            [HintType.ITEM], hint_times.past_hints[1]
+        )
+        assert show_hints.content == expected_content
+        assert show_item_hints.content == expected_content
+        assert show_checks.content == "\n".join(
+            f"- check {i}: Player 1 item {i}" for i in range(hint_count)
+        )
+
+    asyncio.run(test())
+
+
+def test_max_delay():
+    async def test():
+        # Hints that keep coming shouldn't hold back updates past the max delay
+        hint_times = HintTimes(TEST_GUILD_ID)
+        message_tracker = MessageTracker(TEST_GUILD_ID)
+        scheduler = UpdateScheduler(
+            message_tracker, hint_times, asyncio.Lock(), 0.05, 0.15
+        )
+
+        show_hints = MockMessage(1, "initial content")
+        channel = MockChannel(1, [show_hints])
+        bot = MockBot([channel])
+        message_tracker.track_show_hints_message(1, "all", channel.id, show_hints.id)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        first_edit_time = None
+        for i in range(20):
+            hint_result = record_item_hint(
+                hint_times, f"item {i}", [f"World 2 check {i}"]
+            )
+            scheduler.schedule(bot, hint_result)
+            await asyncio.sleep(0.03)
+            if first_edit_time is None and show_hints.edit_count:
+                first_edit_time = loop.time()
+        await scheduler.flush()
+
+        assert first_edit_time is not None
+        assert first_edit_time - start < 0.3
+        # Every hint is reflected once updates settle
+        assert show_hints.content == compose_show_hints_message(
+            [HintType.ITEM], hint_times.past_hints[1]
+        )
+
+    asyncio.run(test())
+
+
+def test_cancel():
+    async def test():
+        hint_times = HintTimes(TEST_GUILD_ID)
+        message_tracker = MessageTracker(TEST_GUILD_ID)
+        scheduler = UpdateScheduler(
+            message_tracker, hint_times, asyncio.Lock(), 0.01, 1
+        )
+
+        show_hints = MockMessage(1, "initial content")
+        channel = MockChannel(1, [show_hints])
+        bot = MockBot([channel])
+        message_tracker.track_show_hints_message(1, "all", channel.id, show_hints.id)
+
+        scheduler.schedule(bot, record_item_hint(hint_times, "foo", ["World 2 bar"]))
+        scheduler.cancel()
+        await asyncio.sleep(0.05)
+        await scheduler.flush()
+        assert show_hints.edit_count == 0
+
+    asyncio.run(test())
+
+
+def test_cancel_while_waiting_for_lock():
+    async def test():
+        # A pass queued behind a command holding the lock, e.g. !set-log, should be dropped if the command cancels
+        hint_times = HintTimes(TEST_GUILD_ID)
+        message_tracker = MessageTracker(TEST_GUILD_ID)
+        lock = asyncio.Lock()
+        scheduler = UpdateScheduler(message_tracker, hint_times, lock, 0.01, 1)
+
+        show_hints = MockMessage(1, "initial content")
+        channel = MockChannel(1, [show_hints])
+        bot = MockBot([channel])
+        message_tracker.track_show_hints_message(1, "all", channel.id, show_hints.id)
+
+        async with lock:
+            scheduler.schedule(
+                bot, record_item_hint(hint_times, "foo", ["World 2 bar"])
+            )
+            await asyncio.sleep(0.05)  # the pass is now waiting for the lock
+            scheduler.cancel()
+            # The command replaces the guild's state, leaving the old tracker to the cancelled pass
+            MessageTracker(TEST_GUILD_ID).clear_tracked_messages()
+        await asyncio.sleep(0.01)
+        await scheduler.flush()
+        assert show_hints.edit_count == 0
+
+    asyncio.run(test())
@@ -1,25 +1,91 @@
+import asyncio
+import itertools
+import time
+from collections import deque
 from unittest.mock import MagicMock
 
 from discord.errors import NotFound
 
 
+class MockRateLimiter:
+    """Allows up to limit requests in any window_sec window, like one of Discord's rate limit buckets."""
+
+    def __init__(self, limit: int, window_sec: float):
+        self.limit = limit
+        self.window_sec = window_sec
+        self.request_times = deque()
+        self.request_count = 0
+        self.rate_limited_count = 0
+
+    def try_request(self) -> float:
+        """Records a request and returns 0 if it's allowed, or else returns how long to wait before retrying."""
+        now = time.monotonic()
+        while (
+            len(self.request_times) and self.request_times[0] <= now - self.window_sec
+        ):
+            self.request_times.popleft()
+        self.request_count += 1
+        if len(self.request_times) >= self.limit:
+            self.rate_limited_count += 1
+            return self.request_times[0] + self.window_sec - now
+        self.request_times.append(now)
+        return 0
+
+    async def wait(self):
+        """Records a request, waiting out rate limits like discord.py's HTTP client does."""
+        while retry_after := self.try_request():
+            await asyncio.sleep(retry_after)
+
+
 class MockMessage:
-    def __init__(self, id, content):
+    def __init__(self, id, content, latency=0):
         self.id = id
         self.content = content
+        self.latency = latency  # simulated API round trip time in seconds
+        self.edit_count = 0
 
     async def edit(self, content):
+        self.edit_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
         self.content = content
 
 
+class MockPartialMessage:
+    def __init__(self, channel, id):
+        self.channel = channel
+        self.id = id
+
+    async def edit(self, content):
+        if self.channel.rate_limiter is not None:
+            await self.channel.rate_limiter.wait()
+        message = self.channel.messages.get(self.id)
+        if message is None:
+            if self.channel.latency:
+                await asyncio.sleep(self.channel.latency)
+            raise NotFound(MagicMock(status=404), None)
+        await message.edit(content)
+
+
 class MockChannel:
-    def __init__(self, id, messages=None):
+    def __init__(self, id, messages=None, latency=0, rate_limiter=None):
         self.id = id
         self.messages = (
             {} if messages is None else {message.id: message for message in messages}
         )
+        self.latency = latency  # simulated API round trip time in seconds
+        self.rate_limiter: MockRateLimiter | None = rate_limiter
+        self.fetch_count = 0
+
+    def get_partial_message(self, message_id):
+        return MockPartialMessage(self, message_id)
 
     async def fetch_message(self, message_id):
+        self.fetch_count += 1
+        if self.rate_limiter is not None:
+            await self.rate_limiter.wait()
+        if self.latency:
+            await asyncio.sleep(self.latency)
         message = self.messages.get(message_id)
         if message is None:
             raise NotFound(MagicMock(status=404), None)
@@ -34,3 +100,71 @@ class MockBot:
 
     def get_channel(self, channel_id):
         return self.channels.get(channel_id)
+
+
+_role_ids = itertools.count(2_000_000)
+
+
+class MockRole:
+    def __init__(self, name: str, id: int | None = None):
+        self.name = name
+        self.id = next(_role_ids) if id is None else id
+
+
+class MockAuthor:
+    def __init__(self, id, *roles: str):
+        self.id = id
+        self.roles = [MockRole(r) for r in roles]
+
+
+class MockUser:
+    """Message author outside a guild, e.g. in a DM, which has no roles"""
+
+    def __init__(self, id):
+        self.id = id
+
+
+class MockGuild:
+    def __init__(self, id):
+        self.id = id
+
+
+class MockAttachment:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def read(self):
+        return self.data
+
+
+class MockCommandMessage:
+    def __init__(self, attachments=None):
+        self.attachments = [] if attachments is None else attachments
+
+
+# Message IDs for bot responses, increasing over time like Discord's
+_response_ids = itertools.count(1_000_000)
+
+
+class MockContext:
+    def __init__(self, guild_id, author, channel, attachments=None, latency=0):
+        # No guild for DMs
+        self.guild = MockGuild(guild_id) if guild_id is not None else None
+        self.author = author
+        self.channel = channel
+        self.message = MockCommandMessage(attachments)
+        self.latency = latency  # simulated API round trip time in seconds
+        self.sent: list[str] = []
+        self.sent_files: list = []
+
+    async def send(self, content, file=None):
+        if self.channel.rate_limiter is not None:
+            await self.channel.rate_limiter.wait()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = MockMessage(next(_response_ids), content, self.channel.latency)
+        self.channel.messages[message.id] = message
+        self.sent.append(content)
+        if file is not None:
+            self.sent_files.append(file)
+        return message
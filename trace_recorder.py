@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class TraceEntry:
+    """
+    One recorded command invocation. Serialized as one JSON object per line:
+    {
+        TIME_KEY: seconds since the epoch,
+        GUILD_KEY: guild ID,
+        CHANNEL_KEY: channel ID,
+        AUTHOR_KEY: author ID,
+        ROLES_KEY: [[role ID, role name], ...],
+        COMMAND_KEY: command name,
+        ARGS_KEY: [positional args after ctx],
+        KWARGS_KEY: {keyword-only args},
+        ATTACHMENTS_KEY: [attachment file name, ...]  # omitted if there are none
+    }
+    """
+
+    TIME_KEY = "t"
+    GUILD_KEY = "g"
+    CHANNEL_KEY = "ch"
+    AUTHOR_KEY = "a"
+    ROLES_KEY = "r"
+    COMMAND_KEY = "c"
+    ARGS_KEY = "args"
+    KWARGS_KEY = "kw"
+    ATTACHMENTS_KEY = "att"
+
+    def __init__(
+        self,
+        timestamp: float,
+        guild_id,
+        channel_id,
+        author_id,
+        roles: list[tuple[int, str]],
+        command: str,
+        args: list,
+        kwargs: dict,
+        attachments: Optional[list[str]] = None,
+    ):
+        self.timestamp = timestamp
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.roles = roles
+        self.command = command
+        self.args = args
+        self.kwargs = kwargs
+        self.attachments = attachments or []
+
+    def to_json(self) -> str:
+        data = {
+            TraceEntry.TIME_KEY: round(self.timestamp, 3),
+            TraceEntry.GUILD_KEY: self.guild_id,
+            TraceEntry.CHANNEL_KEY: self.channel_id,
+            TraceEntry.AUTHOR_KEY: self.author_id,
+            TraceEntry.ROLES_KEY: self.roles,
+            TraceEntry.COMMAND_KEY: self.command,
+            TraceEntry.ARGS_KEY: self.args,
+            TraceEntry.KWARGS_KEY: self.kwargs,
+        }
+        if len(self.attachments):
+            data[TraceEntry.ATTACHMENTS_KEY] = self.attachments
+        return json.dumps(data, separators=(",", ":"))
+
+    @staticmethod
+    def from_json(line: str) -> "TraceEntry":
+        data = json.loads(line)
+        return TraceEntry(
+            data[TraceEntry.TIME_KEY],
+            data[TraceEntry.GUILD_KEY],
+            data[TraceEntry.CHANNEL_KEY],
+            data[TraceEntry.AUTHOR_KEY],
+            [(role_id, name) for role_id, name in data[TraceEntry.ROLES_KEY]],
+            data[TraceEntry.COMMAND_KEY],
+            data[TraceEntry.ARGS_KEY],
+            data[TraceEntry.KWARGS_KEY],
+            data.get(TraceEntry.ATTACHMENTS_KEY),
+        )
+
+
+def trace_attachments_dir(trace_filename: str) -> str:
+    """Attachments are stored next to the trace, named by content hash so each is stored once."""
+    return f"{trace_filename}.attachments"
+
+
+class TraceRecorder:
+    """Appends each command invocation to a JSONL trace file, for replaying with bench/replay_trace.py."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.attachments_dir = trace_attachments_dir(filename)
+        # Line buffered, so a crash loses at most the command being recorded
+        self.file = open(filename, "a", buffering=1)
+
+    async def record(self, ctx):
+        """
+        Records the invocation in ctx. Must be called after its arguments are parsed. Commands run outside a guild,
+        e.g. !help in a DM, aren't recorded since they don't touch any game's state.
+        """
+        if ctx.guild is None:
+            return
+        attachments = []
+        for attachment in ctx.message.attachments:
+            attachments.append(self._store_attachment(await attachment.read()))
+        entry = TraceEntry(
+            time.time(),
+            ctx.guild.id,
+            ctx.channel.id,
+            ctx.author.id,
+            [(role.id, role.name) for role in ctx.author.roles],
+            ctx.command.name,
+            list(ctx.args[1:]),  # skip ctx
+            ctx.kwargs,
+            attachments,
+        )
+        self.file.write(entry.to_json() + "\n")
+
+    def _store_attachment(self, data: bytes) -> str:
+        name = hashlib.sha256(data).hexdigest()[:16] + ".txt"
+        path = os.path.join(self.attachments_dir, name)
+        if not os.path.exists(path):
+            os.makedirs(self.attachments_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        return name
+
+    def close(self):
+        self.file.close()
+
+
+def read_trace(filename: str) -> list[TraceEntry]:
+    entries = []
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                entries.append(TraceEntry.from_json(line))
+    return entries
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import Optional
+
+from hint_times import HintTimes
+from message_tracker import MessageTracker
+from utils import SuccessfulHintResult
+
+log = logging.getLogger(__name__)
+
+# After a hint, wait this long for more hints before updating tracked messages
+DEFAULT_UPDATE_WINDOW_SEC = 2.0
+# Never hold back updates for longer than this after the first pending hint, even if hints keep coming
+DEFAULT_MAX_UPDATE_DELAY_SEC = 10.0
+
+
+class UpdateScheduler:
+    """
+    Debounces updates to a guild's tracked !show-hints and !show-checks messages. Hints redeemed in quick
+    succession are collected and applied in a single MessageTracker pass, so each affected message is edited once
+    with its latest content.
+    """
+
+    def __init__(
+        self,
+        message_tracker: MessageTracker,
+        hint_times: HintTimes,
+        lock: asyncio.Lock,
+        window_sec: Optional[float] = None,
+        max_delay_sec: Optional[float] = None,
+    ):
+        self.message_tracker = message_tracker
+        self.hint_times = hint_times
+        # Held during each update pass, so it doesn't interleave with commands changing the guild's state, and so an
+        # older pass can't overwrite a newer one's edits
+        self.lock = lock
+        self.window_sec = (
+            DEFAULT_UPDATE_WINDOW_SEC if window_sec is None else window_sec
+        )
+        self.max_delay_sec = (
+            DEFAULT_MAX_UPDATE_DELAY_SEC if max_delay_sec is None else max_delay_sec
+        )
+        self.pending: list[SuccessfulHintResult] = []
+        self._first_pending_time: Optional[float] = None
+        self._deadline = 0.0
+        self._task: Optional[asyncio.Task] = None
+        # Incremented by cancel, so a pass already waiting for the lock when it's cancelled finds out once it gets it
+        self._generation = 0
+
+    def schedule(self, bot, hint_result: SuccessfulHintResult):
+        """Queues an update for the given new hint. Must be called from the bot's event loop."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._first_pending_time is None:
+            self._first_pending_time = now
+        self.pending.append(hint_result)
+        self._deadline = min(
+            now + self.window_sec, self._first_pending_time + self.max_delay_sec
+        )
+        if self._task is None:
+            self._task = loop.create_task(self._run(bot))
+
+    async def flush(self):
+        """Waits for any pending update to be applied. Must not be called while holding the lock."""
+        if self._task is not None:
+            await self._task
+        async with self.lock:
+            pass  # wait out a pass that's already in progress
+
+    def cancel(self):
+        """Drops pending updates, e.g. when the guild's spoiler log is replaced."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._generation += 1
+        self.pending = []
+        self._first_pending_time = None
+
+    async def _run(self, bot):
+        loop = asyncio.get_running_loop()
+        while (delay := self._deadline - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        hint_results = self.pending
+        self.pending = []
+        self._first_pending_time = None
+        # Hints arriving from here on start a new pass
+        self._task = None
+        generation = self._generation
+        async with self.lock:
+            if generation != self._generation:
+                # Cancelled while waiting, e.g. by !set-log, so these hints are for state that's been replaced
+                return
+            try:
+                await self.message_tracker.update_messages(
+                    bot, hint_results, self.hint_times.get_show_hints
+                )
+            except Exception:
+                log.exception(
+                    f"Failed to update tracked messages for {len(hint_results)} hint(s)"
+                )
@@ -1,6 +1,9 @@
 import json
+import sys
 from enum import Enum
+from typing import Callable
 
+import metrics
 from consts import DISCORD_MAX_MSG_LENGTH
 
 
@@ -53,15 +56,112 @@ def get_hint_types(query) -> list[HintType]:
 def compose_show_hints_message(
     hint_types: list[HintType], player_past_hints: dict[HintType, dict[str, list[str]]]
 ):
-    message = ""
-    for ht in hint_types:
-        if ht in player_past_hints:
-            message += f"**{ht.value.capitalize()} hints:**\n"
-            for hint_query, hint_results in player_past_hints[ht].items():
-                message += f"- {hint_query}: {", ".join(hint_results)}\n"
-        if len(message) > DISCORD_MAX_MSG_LENGTH:
-            break
-    return curtail_message(message)
+    return PlayerShowHints(player_past_hints).compose(hint_types)
+
+
+def _render_show_hints_header(hint_type: HintType) -> str:
+    return f"**{hint_type.value.capitalize()} hints:**\n"
+
+
+def _render_show_hints_line(hint_query: str, hint_results: list[str]) -> str:
+    return f"- {hint_query}: {", ".join(hint_results)}\n"
+
+
+class PlayerShowHints:
+    """
+    Pre-rendered !show-hints content for one player. Each hint type keeps its rendered section lines, so a new
+    hint renders only its own line, and composed (curtailed) messages are cached per hint type combination.
+    """
+
+    def __init__(self, player_past_hints: dict[HintType, dict[str, list[str]]]):
+        self.sections: dict[HintType, list[str]] = {}
+        self.section_lengths: dict[HintType, int] = {}
+        for ht, hints in player_past_hints.items():
+            section = [_render_show_hints_header(ht)]
+            section += [_render_show_hints_line(q, r) for q, r in hints.items()]
+            self.sections[ht] = section
+            self.section_lengths[ht] = sum(len(line) for line in section)
+        # Composed messages, keyed by the tuple of hint types they show
+        self._messages: dict[tuple[HintType, ...], str] = {}
+
+    def add_hint(self, hint_type: HintType, hint_query: str, hint_results: list[str]):
+        """Appends a newly redeemed hint, patching any cached messages that show its hint type."""
+        addition = _render_show_hints_line(hint_query, hint_results)
+        if hint_type not in self.sections:
+            addition = _render_show_hints_header(hint_type) + addition
+            self.sections[hint_type] = [addition]
+            self.section_lengths[hint_type] = 0
+        else:
+            self.sections[hint_type].append(addition)
+
+        for key, message in list(self._messages.items()):
+            if hint_type not in key:
+                continue
+            # The new line goes at the end of its hint type's section
+            insert_pos = 0
+            for ht in key[: key.index(hint_type) + 1]:
+                insert_pos += self.section_lengths.get(ht, 0)
+            full_length = sum(self.section_lengths.get(ht, 0) for ht in key)
+            if insert_pos > DISCORD_MAX_MSG_LENGTH:
+                # Already curtailed before the insertion point, so the message doesn't change
+                continue
+            if full_length + len(addition) <= DISCORD_MAX_MSG_LENGTH:
+                self._messages[key] = (
+                    message[:insert_pos] + addition + message[insert_pos:]
+                )
+            else:
+                # Newly curtailed; recompose when next requested
+                del self._messages[key]
+        self.section_lengths[hint_type] += len(addition)
+
+    def compose(self, hint_types: list[HintType]) -> str:
+        """Returns the !show-hints message for the given hint types, curtailed to Discord's max message length."""
+        key = tuple(hint_types)
+        message = self._messages.get(key)
+        metrics.record_cache_lookup("show_hints_message", message is not None)
+        if message is None:
+            parts = []
+            length = 0
+            for ht in key:
+                if ht in self.sections:
+                    parts += self.sections[ht]
+                    length += self.section_lengths[ht]
+                if length > DISCORD_MAX_MSG_LENGTH:
+                    break
+            message = curtail_message("".join(parts))
+            self._messages[key] = message
+        return message
+
+
+class ShowHintsCache:
+    """Lazily built PlayerShowHints for each player, kept in sync with a guild's past hints."""
+
+    def __init__(self):
+        self.players: dict[int, PlayerShowHints] = {}
+
+    def get(
+        self, player_num: int, past_hints: dict[int, dict[HintType, dict[str, list]]]
+    ) -> PlayerShowHints:
+        player_show_hints = self.players.get(player_num)
+        metrics.record_cache_lookup("show_hints_player", player_show_hints is not None)
+        if player_show_hints is None:
+            player_show_hints = PlayerShowHints(past_hints.get(player_num, {}))
+            self.players[player_num] = player_show_hints
+        return player_show_hints
+
+    def add_hint(
+        self,
+        player_num: int,
+        hint_type: HintType,
+        hint_query: str,
+        hint_results: list[str],
+    ):
+        # Players that haven't been rendered yet will be built from past hints when first requested
+        if player_num in self.players:
+            self.players[player_num].add_hint(hint_type, hint_query, hint_results)
+
+    def clear(self):
+        self.players = {}
 
 
 def curtail_message(message, end_note="\n...and more"):
@@ -103,11 +203,54 @@ def get_owl_aliases(owl_location):
     return aliases
 
 
-def store(data, filename: str):
-    with open(filename, "w") as f:
-        json.dump(data, f)
+# Only turned off to measure what interning saves, e.g. by bench/memory_bench.py --no-sharing
+_interning_enabled = True
+
+
+def set_interning_enabled(enabled: bool):
+    global _interning_enabled
+    _interning_enabled = enabled
+
+
+def get_interner() -> Callable[[str], str]:
+    """Returns sys.intern, or str (which returns a str as is) if interning is turned off."""
+    return sys.intern if _interning_enabled else str
+
+
+def intern_strings(data):
+    """
+    Returns the JSON data with every string in it, keys included, interned. Item, check and entrance names repeat
+    across players' results and across guilds, so interning stores each name once for the whole process. The pool
+    only ever holds names from the game, so it stays bounded.
+    """
+    return _intern_strings(data) if _interning_enabled else data
+
+
+def _intern_strings(data):
+    if isinstance(data, str):
+        return sys.intern(data)
+    if isinstance(data, dict):
+        return {sys.intern(k): _intern_strings(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_intern_strings(v) for v in data]
+    return data
+
+
+def store(data, filename: str) -> str:
+    """Writes the data to the file as JSON. Returns the JSON written."""
+    with metrics.timer("store_seconds"), open(filename, "w") as f:
+        content = json.dumps(data)
+        f.write(content)
+    # JSON is ASCII-encoded, so characters are bytes
+    metrics.increment_for_command("disk_bytes_written_total", len(content))
+    return content
 
 
 def load(filename: str):
-    with open(filename, "r") as f:
+    with metrics.timer("load_seconds"), open(filename, "r") as f:
         return json.load(f)
+
+
+def read(filename: str) -> str:
+    with metrics.timer("load_seconds"), open(filename, "r") as f:
+        return f.read()